@@ -9,6 +9,14 @@ def convert_inline_markdown(text: str) -> str:
     return text
 
 
+def top_level_blocks(tokens) -> int:
+    """
+    Number of top-level blocks (headings, paragraphs, lists, tables,
+    code) in a markdown-it token stream.
+    """
+    return sum(1 for token in tokens if token.level == 0 and token.nesting != -1)
+
+
 def analyze_markdown(content: str, file_path: str) -> StructuredDocument:
     lines = content.splitlines()
     blocks = []
@@ -0,0 +1,247 @@
+"""
+Streaming WordprocessingML writer.
+
+python-docx builds the whole document as a live lxml tree and serializes
+it on save, which is slow and memory-hungry for documents with tens of
+thousands of blocks. DocxWriter instead writes `word/document.xml`
+straight into the output ZIP as blocks are added, in buffered chunks.
+Every other part (styles, numbering, settings, theme) is copied
+unchanged from a package python-docx builds once per template, so the
+output uses the same styles as a python-docx document.
+"""
+import io
+import re
+import zipfile
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from docx import Document
+from docx.shared import Pt
+
+from app.enums.templates import PDFTemplate
+from app.utils.syntax_highlighter import highlight_spans
+
+DOCUMENT_PART = "word/document.xml"
+
+# Characters XML 1.0 cannot represent; python-docx would reject them
+INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+# Bytes of document XML collected before they are compressed into the ZIP
+FLUSH_BYTES = 256 * 1024
+
+# Text width of the default template's page (twips), shared by table columns
+TEXT_WIDTH_TWIPS = 8640
+
+_TEXT_OPEN = '<w:t xml:space="preserve">'
+_BREAKS = {
+    "\t": "</w:t><w:tab/>" + _TEXT_OPEN,
+    "\n": "</w:t><w:br/>" + _TEXT_OPEN,
+}
+
+
+def docx_font(template: PDFTemplate) -> str:
+    """
+    Body font of DOCX output for `template`.
+    """
+    if template == PDFTemplate.CLASSIC:
+        return 'Times New Roman'
+    if template == PDFTemplate.MINIMAL:
+        return 'Courier New'
+    return 'Arial'
+
+
+@lru_cache(maxsize=None)
+def template_package(template: PDFTemplate) -> bytes:
+    """
+    An empty python-docx document with the template's Normal style,
+    as .docx bytes. Built once per template.
+    """
+    doc = Document()
+    style = doc.styles['Normal']
+    style.font.name = docx_font(template)
+    style.font.size = Pt(11)
+
+    output = io.BytesIO()
+    doc.save(output)
+    return output.getvalue()
+
+
+@lru_cache(maxsize=None)
+def _document_frame(template: PDFTemplate) -> Tuple[str, str]:
+    """
+    The template's document.xml split around the body content: (everything
+    up to <w:body>, the section properties and closing tags).
+    """
+    with zipfile.ZipFile(io.BytesIO(template_package(template))) as package:
+        xml = package.read(DOCUMENT_PART).decode("utf-8")
+    body = xml.index(">", xml.index("<w:body")) + 1
+    section = xml.find("<w:sectPr", body)
+    if section < 0:
+        section = xml.index("</w:body>", body)
+    return xml[:body], xml[section:]
+
+
+def text_xml(text: str) -> str:
+    """
+    Run content for `text`: <w:t> elements, with tabs and line breaks as
+    <w:tab/> and <w:br/> like python-docx's Run.text.
+    """
+    text = INVALID_XML_CHARS.sub("", text.replace("\r\n", "\n").replace("\r", "\n"))
+    text = escape(text)
+    for char, replacement in _BREAKS.items():
+        if char in text:
+            text = text.replace(char, replacement)
+    return _TEXT_OPEN + text + "</w:t>"
+
+
+def run_xml(text: str, bold: bool = False, italic: bool = False, font: Optional[str] = None,
+            color: Optional[str] = None, size: Optional[float] = None) -> str:
+    """
+    A <w:r> element. `color` is hex RGB (e.g. "C83232"), `size` in points.
+    """
+    props = []
+    # Child order is fixed by the schema
+    if font:
+        props.append(f'<w:rFonts w:ascii="{font}" w:hAnsi="{font}"/>')
+    if bold:
+        props.append('<w:b/>')
+    if italic:
+        props.append('<w:i/>')
+    if color:
+        props.append(f'<w:color w:val="{color}"/>')
+    if size:
+        props.append(f'<w:sz w:val="{round(size * 2)}"/>')
+
+    rpr = f"<w:rPr>{''.join(props)}</w:rPr>" if props else ""
+    return f"<w:r>{rpr}{text_xml(text)}</w:r>"
+
+
+def code_runs(code: str, language: Optional[str] = None, font: str = 'Courier New', size: float = 10,
+              color: str = '323232') -> List[str]:
+    """
+    Syntax-highlighted runs for a code block, from the same Pygments
+    tokens as PDF output. Without `language` the code is plain text in
+    `color`. Each run property set is built once per block and the runs
+    are generated in bulk.
+    """
+    if not language:
+        return [run_xml(code, font=font, color=color, size=size)]
+
+    properties = {}
+    runs = []
+    for text, span_color, bold in highlight_spans(code, language):
+        key = (span_color, bold)
+        if key not in properties:
+            # Run properties without the text: "<w:r><w:rPr>...</w:rPr>"
+            sample = run_xml("", bold=bold, font=font, color=span_color.lstrip("#") if span_color else color,
+                             size=size)
+            properties[key] = sample[:sample.index(_TEXT_OPEN)]
+        runs.append(properties[key] + text_xml(text) + "</w:r>")
+    return runs
+
+
+def paragraph_xml(runs: Iterable[str], style: Optional[str] = None, indent: Optional[float] = None,
+                  align: Optional[str] = None) -> str:
+    """
+    A <w:p> element from run XML. `style` is a style id (e.g. "Heading1"),
+    `indent` the left indent in points, `align` a w:jc value.
+    """
+    props = []
+    if style:
+        props.append(f'<w:pStyle w:val="{style}"/>')
+    if indent:
+        props.append(f'<w:ind w:left="{round(indent * 20)}"/>')
+    if align:
+        props.append(f'<w:jc w:val="{align}"/>')
+
+    ppr = f"<w:pPr>{''.join(props)}</w:pPr>" if props else ""
+    return f"<w:p>{ppr}{''.join(runs)}</w:p>"
+
+
+def table_xml(rows: Iterable[Iterable[Iterable[str]]], columns: int, header_rows: int = 0,
+              alignments: Optional[List[Optional[str]]] = None, style: str = "TableGrid") -> str:
+    """
+    A <w:tbl> element with `columns` equal columns, built in one pass.
+    Each row is a list of cells, each cell a list of run XML; rows with
+    fewer cells are padded with empty ones. The first `header_rows` rows
+    repeat at the top of every page. `alignments` holds a w:jc value (or
+    None) per column.
+    """
+    width = TEXT_WIDTH_TWIPS // columns
+    cell_props = f'<w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>'
+    alignments = list(alignments or [])[:columns]
+    alignments += [None] * (columns - len(alignments))
+    paragraph_props = [f'<w:pPr><w:jc w:val="{align}"/></w:pPr>' if align else "" for align in alignments]
+
+    parts = [
+        f'<w:tbl><w:tblPr><w:tblStyle w:val="{style}"/><w:tblW w:type="auto" w:w="0"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+        'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr><w:tblGrid>',
+        f'<w:gridCol w:w="{width}"/>' * columns,
+        '</w:tblGrid>',
+    ]
+    for index, row in enumerate(rows):
+        cells = list(row)[:columns]
+        cells += [()] * (columns - len(cells))
+        parts.append('<w:tr><w:trPr><w:tblHeader/></w:trPr>' if index < header_rows else '<w:tr>')
+        for runs, ppr in zip(cells, paragraph_props):
+            parts.append(f"<w:tc>{cell_props}<w:p>{ppr}{''.join(runs)}</w:p></w:tc>")
+        parts.append("</w:tr>")
+    parts.append("</w:tbl>")
+    return "".join(parts)
+
+
+class DocxWriter:
+    """
+    Writes a .docx package to `output` (a path or writable binary stream),
+    appending body elements to word/document.xml as they are added.
+
+        with DocxWriter(output, template) as writer:
+            writer.paragraph([run_xml("Hello")], style="Heading1")
+    """
+
+    def __init__(self, output, template: PDFTemplate):
+        self._zip = zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED)
+        head, self._tail = _document_frame(template)
+
+        with zipfile.ZipFile(io.BytesIO(template_package(template))) as package:
+            for info in package.infolist():
+                if info.filename != DOCUMENT_PART:
+                    self._zip.writestr(info, package.read(info))
+
+        self._part = self._zip.open(DOCUMENT_PART, "w")
+        self._pending = [head]
+        self._pending_size = len(head)
+
+    def write(self, xml: str):
+        """
+        Appends raw body XML (paragraphs, tables).
+        """
+        self._pending.append(xml)
+        self._pending_size += len(xml)
+        if self._pending_size >= FLUSH_BYTES:
+            self._flush()
+
+    def paragraph(self, runs: Iterable[str], style: Optional[str] = None, indent: Optional[float] = None,
+                  align: Optional[str] = None):
+        self.write(paragraph_xml(runs, style, indent, align))
+
+    def _flush(self):
+        self._part.write("".join(self._pending).encode("utf-8"))
+        self._pending, self._pending_size = [], 0
+
+    def close(self):
+        if self._part is None:
+            return
+        self._pending.append(self._tail)
+        self._flush()
+        self._part.close()
+        self._part = None
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,38 +1,26 @@
 import logging
 from markdown_it import MarkdownIt
-from docx import Document
-from docx.shared import Pt, RGBColor, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
 
+from app.docx.docx_writer import DocxWriter, code_runs, paragraph_xml, run_xml, table_xml
 from app.enums.templates import PDFTemplate
+from app.analyzers.markdown_analyzer import top_level_blocks
+from app.utils.metrics import count
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class MDToDocxConverter:
     def __init__(self, template_choice: PDFTemplate):
         self.md = MarkdownIt("commonmark", {"breaks": True, "html": True}).enable("table")
-        self.doc = Document()
         self.template = template_choice
-        self._setup_styles()
-
-    def _setup_styles(self):
-        # Configure base font
-        font_name = 'Arial'
-        if self.template == PDFTemplate.CLASSIC:
-            font_name = 'Times New Roman'
-        elif self.template == PDFTemplate.MINIMAL:
-            font_name = 'Courier New'
-            
-        style = self.doc.styles['Normal']
-        style.font.name = font_name
-        style.font.size = Pt(11)
+        self.writer = None
 
     def convert(self, text: str, output_path: str):
         tokens = self.md.parse(text)
-        self._process_tokens(tokens)
-        self.doc.save(output_path)
+        count("blocks", top_level_blocks(tokens))
+        # Body XML is streamed into the package as tokens are processed;
+        # styles come unchanged from the template's package
+        with DocxWriter(output_path, self.template) as self.writer:
+            self._process_tokens(tokens)
 
     def _process_tokens(self, tokens):
         i = 0
@@ -44,7 +32,7 @@ class MDToDocxConverter:
                 level = int(token.tag[1])
                 content = tokens[i+1].content
                 # Word headings are 1-9.
-                self.doc.add_heading(content, level=min(level, 9))
+                self.writer.paragraph([run_xml(content)], style=f'Heading{min(level, 9)}')
                 i += 3
                 continue
                 
@@ -71,49 +59,39 @@ class MDToDocxConverter:
                 continue
                 
             elif type_ == 'fence' or type_ == 'code_block':
-                p = self.doc.add_paragraph(token.content)
-                p.style = 'No Spacing'
-                p.paragraph_format.left_indent = Pt(24)
                 # Word doesn't support background color trivially on paragraphs without XML hacking
-                # Just change font for now
-                for run in p.runs:
-                    run.font.name = 'Courier New'
-                    run.font.size = Pt(10)
-                    run.font.color.rgb = RGBColor(50, 50, 50)
+                # Highlighted like PDF output, from the fence's language
+                language = token.info.strip() if token.type == 'fence' else ''
+                self.writer.paragraph(code_runs(token.content, language), style='NoSpacing', indent=24)
                 i += 1
                 continue
                 
             i += 1
 
     def _add_formatted_paragraph(self, inline_token, style=None):
-        if style:
-            p = self.doc.add_paragraph(style=style)
-        else:
-            p = self.doc.add_paragraph()
-            
-        self._render_inline_to_paragraph(p, inline_token)
+        self.writer.write(paragraph_xml(self._inline_runs(inline_token), style=style))
 
-    def _render_inline_to_paragraph(self, paragraph, inline_token):
+    def _inline_runs(self, inline_token):
         if not inline_token.children:
-            paragraph.add_run(inline_token.content)
-            return
+            return [run_xml(inline_token.content)]
 
         # Simple state machine for bold/italic/code
+        runs = []
         is_bold = False
         is_italic = False
         is_code = False
-        
+
         for child in inline_token.children:
             if child.type == 'text':
-                run = paragraph.add_run(child.content)
-                run.bold = is_bold
-                run.italic = is_italic
+                if not child.content:
+                    continue
                 if is_code:
-                    run.font.name = 'Courier New'
-                    run.font.color.rgb = RGBColor(200, 50, 50)
-            
+                    runs.append(run_xml(child.content, is_bold, is_italic, font='Courier New', color='C83232'))
+                else:
+                    runs.append(run_xml(child.content, is_bold, is_italic))
+
             elif child.type == 'softbreak':
-                paragraph.add_run(" ")
+                runs.append(run_xml(" "))
             elif child.type == 'strong_open':
                 is_bold = True
             elif child.type == 'strong_close':
@@ -123,16 +101,15 @@ class MDToDocxConverter:
             elif child.type == 'em_close':
                 is_italic = False
             elif child.type == 'code_inline':
-                run = paragraph.add_run(child.content)
-                run.font.name = 'Courier New'
                 # Highlight or distinct color
-                run.font.color.rgb = RGBColor(100, 100, 100)
+                runs.append(run_xml(child.content, font='Courier New', color='646464'))
+        return runs
 
     def _handle_list(self, tokens, start_index, ordered=False):
-        # python-docx list support is tricky for nesting.
-        # We rely on 'List Bullet' and 'List Number' styles.
+        # Nested lists are not indented further.
+        # We rely on the 'List Bullet' and 'List Number' styles.
         close_type = 'ordered_list_close' if ordered else 'bullet_list_close'
-        style_name = 'List Number' if ordered else 'List Bullet'
+        style_name = 'ListNumber' if ordered else 'ListBullet'
         
         i = start_index + 1
         while i < len(tokens):
@@ -147,9 +124,8 @@ class MDToDocxConverter:
                     if tokens[j].type == 'inline':
                         # Add paragraph with list style
                         self._add_formatted_paragraph(tokens[j], style=style_name)
-                    # Recurse for nested lists? 
-                    # python-docx doesn't handle indentation level automatically with just style name usually
-                    # but simple flat lists work.
+                    # Recurse for nested lists?
+                    # The list styles carry no indentation level, but simple flat lists work.
                     if tokens[j].type in ['bullet_list_open', 'ordered_list_open']:
                          # Recurse
                          consumed = self._handle_list(tokens, j, ordered=('ordered' in tokens[j].type))
@@ -160,34 +136,45 @@ class MDToDocxConverter:
         return (i - start_index) + 1
 
     def _handle_table(self, tokens, start_index):
-        # Gather data
-        rows_data = []
-        current_row = []
+        # One pass over the tokens; the table XML is then written in one go
+        rows = []
+        alignments = []
+        header_rows = 0
         i = start_index + 1
-        
+
         while i < len(tokens):
-            if tokens[i].type == 'table_close':
+            token = tokens[i]
+            if token.type == 'table_close':
                 break
-            if tokens[i].type == 'tr_close':
-                rows_data.append(current_row)
-                current_row = []
-            if tokens[i].type == 'inline' and tokens[i-1].type in ['th_open', 'td_open']:
-                current_row.append(tokens[i].content) # Simplified text content for cells
-            elif tokens[i].type in ['th_open', 'td_open'] and tokens[i+1].type != 'inline':
-                # Empty cell
-                current_row.append("")
+            if token.type == 'tr_open':
+                rows.append([])
+            elif token.type in ['th_open', 'td_open']:
+                inline = tokens[i+1]
+                if inline.type == 'inline' and inline.content:
+                    rows[-1].append(self._inline_runs(inline))
+                else:
+                    # Empty cell
+                    rows[-1].append([])
+                if len(rows) == 1:
+                    alignments.append(_cell_alignment(token))
+            elif token.type == 'thead_close':
+                # Header rows repeat on every page
+                header_rows = len(rows)
             i += 1
-            
-        if rows_data:
-            table = self.doc.add_table(rows=len(rows_data), cols=len(rows_data[0]))
-            table.style = 'Table Grid'
-            for r_idx, row_content in enumerate(rows_data):
-                row_cells = table.rows[r_idx].cells
-                for c_idx, text in enumerate(row_content):
-                    row_cells[c_idx].text = text
-                    
+
+        if rows:
+            self.writer.write(table_xml(rows, len(rows[0]), header_rows=header_rows, alignments=alignments))
+
         return (i - start_index) + 1
 
+def _cell_alignment(token):
+    # markdown-it marks column alignment as style="text-align:right"
+    style = token.attrGet('style') or ''
+    for align in ('left', 'center', 'right'):
+        if f'text-align:{align}' in style:
+            return align
+    return None
+
 def convert_md_to_docx(text: str, output_path: str, template: PDFTemplate):
     converter = MDToDocxConverter(template)
     converter.convert(text, output_path)
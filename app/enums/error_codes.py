@@ -1,5 +1,7 @@
 from enum import Enum
 
+from app.utils.constants import MAX_DECOMPRESSED_SIZE
+
 
 class AppErrorCode(Enum):
     INVALID_FILE_TYPE = "Unsupported file format"
@@ -7,3 +9,12 @@ class AppErrorCode(Enum):
     FILE_READ_ERROR = "Unable to read file"
     PARSING_ERROR = "Error while parsing file content"
     EMPTY_FILE = "Uploaded file is empty"
+    DECOMPRESSED_TOO_LARGE = f"Decompressed content exceeds {MAX_DECOMPRESSED_SIZE // (1024 * 1024)} MB limit"
+    ARCHIVE_ERROR = "Unable to read compressed file or archive"
+    CONTENT_MISMATCH = "File content does not match its extension"
+    SERVICE_BUSY = "Server is busy, please try again shortly"
+    CONVERSION_TIMEOUT = "Conversion took too long and was stopped"
+    RESOURCE_LIMIT = "Conversion exceeded its memory or CPU time limit"
+    CONVERSION_CANCELLED = "Conversion was cancelled"
+    RENDER_BUDGET_EXCEEDED = "Document is too large to render"
+    MIXED_ARCHIVE = "Archive must contain files of a single supported type"
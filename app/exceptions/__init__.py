@@ -1 +1 @@
-from .custom_exceptions import FileValidationError, ParsingError
+from .custom_exceptions import FileValidationError, ParsingError, ServiceBusyError, ConversionAbortedError
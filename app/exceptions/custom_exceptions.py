@@ -18,3 +18,25 @@ class ParsingError(Exception):
 
     def __init__(self, message: str):
         super().__init__(message)
+
+
+class ServiceBusyError(Exception):
+    """
+    Raised when a conversion cannot be accepted because the service is
+    at capacity. The request can be retried later.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class ConversionAbortedError(Exception):
+    """
+    Raised when a conversion is stopped before it finishes:
+    - Wall-clock timeout
+    - CPU time or memory limit reached
+    - Cancelled by the user
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message)
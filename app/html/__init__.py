@@ -0,0 +1 @@
+from .html_preview import render_document_html, render_markdown_html
@@ -0,0 +1,133 @@
+import html
+import re
+
+from markdown_it import MarkdownIt
+
+from app.analyzers.document_model import StructuredDocument
+from app.enums.templates import PDFTemplate
+from app.templates.pdf_templates import PDF_TEMPLATES
+from app.utils.constants import PREVIEW_BLOCKS
+
+# CSS stacks for the ReportLab base fonts used by the templates
+CSS_FONT_FAMILIES = {
+    "Times": '"Times New Roman", Times, serif',
+    "Helvetica": "Helvetica, Arial, sans-serif",
+    "Courier": '"Courier New", Courier, monospace',
+}
+
+CSS_ALIGNMENT = {
+    "CENTER": "center",
+    "JUSTIFY": "justify",
+    "LEFT": "left",
+    "RIGHT": "right",
+}
+
+# ReportLab inline markup produced by the analyzers that is also valid HTML
+INLINE_TAGS = re.compile(r"&lt;(/?)(b|i|u|br\s*/?)&gt;")
+
+
+def _font_css(font_name: str) -> str:
+    family, _, variant = font_name.partition("-")
+    css = f"font-family: {CSS_FONT_FAMILIES.get(family, CSS_FONT_FAMILIES['Helvetica'])};"
+    if "Bold" in variant:
+        css += " font-weight: bold;"
+    if "Italic" in variant or "Oblique" in variant:
+        css += " font-style: italic;"
+    return css
+
+
+def template_css(template: PDFTemplate) -> str:
+    """
+    Stylesheet approximating the PDF template's fonts, spacing and page frame.
+    """
+    cfg = PDF_TEMPLATES[template]
+    title, body, page = cfg["title_style"], cfg["body_style"], cfg["page"]
+
+    border = f"{page.get('border_width', 1)}pt solid #333" if page.get("border") else "none"
+
+    return f"""
+        .doc-preview {{ {_font_css(body["font"])} font-size: {body["size"]}pt;
+            line-height: {body["leading"]}pt; text-align: {CSS_ALIGNMENT[body["alignment"]]};
+            padding: {page["margin"] / 2}pt; border: {border}; background: #fff; color: #000; }}
+        .doc-preview .doc-title {{ {_font_css(title["font"])} font-size: {title["size"]}pt;
+            text-align: {CSS_ALIGNMENT[title["alignment"]]}; margin-bottom: {title["space_after"]}pt; }}
+        .doc-preview p, .doc-preview ul, .doc-preview ol {{ margin: 0 0 {body["space_after"]}pt 0; }}
+        .doc-preview pre {{ font-family: "Courier New", monospace; font-size: 9pt; line-height: 12pt;
+            background: #eee; padding: 6pt 12pt; white-space: pre-wrap; }}
+        .doc-preview blockquote {{ border: 1px solid #999; background: #f5f5f5; color: #555;
+            font-style: italic; padding: 10pt 12pt; margin: 10pt 20pt 14pt 0; }}
+        .doc-preview table {{ border-collapse: collapse; width: 100%; margin-bottom: 12pt; }}
+        .doc-preview th, .doc-preview td {{ border: 1px solid #999; padding: 6pt; vertical-align: top; }}
+        .doc-preview th {{ background: #f5f5f5; }}
+        .doc-preview .doc-truncated {{ color: #777; font-style: italic; text-align: center; }}
+    """
+
+
+def _inline(content: str) -> str:
+    return INLINE_TAGS.sub(r"<\1\2>", html.escape(content, quote=False))
+
+
+def _wrap(body: str, template: PDFTemplate, truncated: bool) -> str:
+    note = '<p class="doc-truncated">Preview truncated</p>' if truncated else ""
+    return f'<style>{template_css(template)}</style><div class="doc-preview">{body}{note}</div>'
+
+
+def render_document_html(document: StructuredDocument, template: PDFTemplate,
+                         max_blocks: int = PREVIEW_BLOCKS) -> str:
+    """
+    Renders a StructuredDocument straight to HTML, block for block as
+    generate_pdf would lay it out, without any ReportLab layout.
+    """
+    parts = []
+    if document.title:
+        parts.append(f'<div class="doc-title">{_inline(document.title)}</div>')
+
+    in_list = False
+    for block in document.blocks[:max_blocks]:
+        if block.type == "bullet":
+            if not in_list:
+                parts.append("<ul>")
+                in_list = True
+            parts.append(f"<li>{_inline(block.content)}</li>")
+            continue
+
+        if in_list:
+            parts.append("</ul>")
+            in_list = False
+
+        if block.type in ("h1", "h2", "h3"):
+            parts.append(f"<{block.type}>{_inline(block.content)}</{block.type}>")
+        elif block.type == "quote":
+            parts.append(f"<blockquote>{_inline(block.content)}</blockquote>")
+        elif block.type == "code":
+            parts.append(f"<pre><code>{html.escape(block.content)}</code></pre>")
+        else:
+            parts.append(f"<p>{_inline(block.content)}</p>")
+
+    if in_list:
+        parts.append("</ul>")
+
+    return _wrap("".join(parts), template, len(document.blocks) > max_blocks)
+
+
+def _truncate_tokens(tokens, max_blocks: int):
+    """
+    Cuts a markdown-it token stream after `max_blocks` top-level blocks.
+    """
+    blocks = 0
+    for index, token in enumerate(tokens):
+        if token.level == 0 and token.nesting <= 0:
+            blocks += 1
+            if blocks == max_blocks:
+                return tokens[:index + 1], index + 1 < len(tokens)
+    return tokens, False
+
+
+def render_markdown_html(text: str, template: PDFTemplate, max_blocks: int = PREVIEW_BLOCKS) -> str:
+    """
+    Renders markdown with markdown-it's HTML renderer. Raw HTML in the
+    source is escaped, as the PDF path does not render it either.
+    """
+    md = MarkdownIt("commonmark", {"breaks": True, "html": False}).enable("table")
+    tokens, truncated = _truncate_tokens(md.parse(text), max_blocks)
+    return _wrap(md.renderer.render(tokens, md.options, {}), template, truncated)
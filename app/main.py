@@ -1,114 +1,233 @@
+import html
+import logging
 import os
-import tempfile
 import gradio as gr
 
-from app.validators.file_validator import validate_file
-from app.parsers.txt_parser import parse_txt
-from app.parsers.md_parser import parse_md
-from app.parsers.docx_parser import parse_docx
-from app.parsers.bin_parser import parse_bin
-from app.parsers.csv_parser import parse_csv
-from app.parsers.html_parser import parse_html
-from app.parsers.ipynb_parser import parse_ipynb
-
-from app.analyzers.content_analyzer import normalize_content
-from app.analyzers.markdown_analyzer import analyze_markdown
-from app.analyzers.plaintext_analyzer import analyze_plaintext
-from app.analyzers.structure_scanner import scan_structure, bulletize_text
-
-from app.pdf.md_complete_conversion import convert_md_complete
-from app.pdf.pdf_generator import generate_pdf
-from app.docx.docx_generator import generate_docx
-from app.docx.md_docx_converter import convert_md_to_docx
-
+from app.pipeline.batch import zip_as_completed
+from app.pipeline.conversion import ConversionOptions, load_source, render_source_html, convert_upload
+from app.workers.scheduler import SizeAwareScheduler
+from app.storage.output_store import OutputStore
 from app.enums.templates import PDFTemplate
-from app.enums.file_types import SupportedFileType
-from app.exceptions.custom_exceptions import FileValidationError, ParsingError
+from app.exceptions.custom_exceptions import FileValidationError, ParsingError, ServiceBusyError, ConversionAbortedError
+from app.utils.input_stream import source_name
+from app.utils.constants import PREVIEW_PAGES, RENDER_CONCURRENCY, QUEUE_MAX_SIZE, OUTPUT_TTL_SECONDS
+
+# Progress bar position at the start of each pipeline stage
+STAGE_PROGRESS = {
+    "validate": 0.05,
+    "parse": 0.15,
+    "analyze": 0.3,
+    "render": 0.4,
+    "save": 0.95,
+}
+
+_scheduler = None
+_output_store = None
+
+
+def get_scheduler() -> SizeAwareScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = SizeAwareScheduler()
+    return _scheduler
+
+
+def get_output_store() -> OutputStore:
+    global _output_store
+    if _output_store is None:
+        _output_store = OutputStore()
+    return _output_store
+
+
+def _options(template_choice, use_filename_as_heading, output_format, auto_structure, bulletize, navigation=False,
+             linearize=False, profile=False):
+    return ConversionOptions(
+        template=PDFTemplate(template_choice),
+        output_format=output_format,
+        use_filename_as_heading=use_filename_as_heading,
+        auto_structure=auto_structure,
+        bulletize=bulletize,
+        navigation=navigation,
+        linearize=linearize,
+        profile=profile
+    )
 
-def convert_file(file, template_choice, use_filename_as_heading, output_format="PDF", auto_structure=False, bulletize=False):
+
+def convert_file(file, template_choice, use_filename_as_heading, output_format="PDF", auto_structure=False, bulletize=False, navigation=False, linearize=False, profile=False):
+    """
+    Converts one upload in this process. With `profile` the conversion is
+    profiled and <name>.prof / <name>.folded are written next to the result.
+    """
+    options = _options(template_choice, use_filename_as_heading, output_format, auto_structure, bulletize, navigation, linearize, profile)
     try:
-        file_type = validate_file(file)
+        return convert_upload(file, options, get_output_store().new_job_dir())
 
-        # --- MARKDOWN / IPYNB HANDLING ---
-        if file_type == SupportedFileType.MD or file_type == SupportedFileType.IPYNB:
-            if file_type == SupportedFileType.IPYNB:
-                 text_content = parse_ipynb(file)
-            else:
-                 text_content = parse_md(file)
-            
-            # Apply heading ONLY if requested
-            if use_filename_as_heading and not text_content.lstrip().startswith("#"):
-                filename = os.path.basename(file.name)
-                title = os.path.splitext(filename)[0].replace("_", " ").title()
-                text_content = f"# {title}\n\n{text_content}"
-
-            # Prepare Output Filename
-            original_name = os.path.splitext(os.path.basename(file.name))[0]
-            temp_dir = tempfile.mkdtemp()
-            
-            if output_format == "DOCX":
-                output_path = os.path.join(temp_dir, f"{original_name}.docx")
-                convert_md_to_docx(text_content, output_path, PDFTemplate(template_choice))
-                return output_path
-            else:
-                output_path = os.path.join(temp_dir, f"{original_name}.pdf")
-                convert_md_complete(text_content, output_path, PDFTemplate(template_choice))
-                return output_path
-
-        # --- OTHER FORMATS ---
-        if file_type == SupportedFileType.TXT:
-            content = parse_txt(file)
-            
-            if bulletize:
-                 document = bulletize_text(content, file.name)
-            elif auto_structure:
-                 document = scan_structure(content, file.name)
+    except (FileValidationError, ParsingError) as e:
+        raise gr.Error(str(e))
+
+
+def convert_file_with_preview(file, template_choice, use_filename_as_heading, output_format="PDF", auto_structure=False, bulletize=False, navigation=False, linearize=False, progress=gr.Progress()):
+    """
+    Streams (preview, result) pairs from a render worker (picked by the
+    size-aware scheduler): the first PDF
+    page(s) as soon as they are laid out, then the full document, which
+    the worker renders from the same parsed source.
+
+    Each job runs in a sandboxed child process; if the event is cancelled
+    (Cancel button, closed tab) that process is stopped.
+    """
+    if file is None:
+        raise gr.Error("No file uploaded")
+
+    options = _options(template_choice, use_filename_as_heading, output_format, auto_structure, bulletize, navigation, linearize)
+    try:
+        job = get_scheduler().submit(file.name, options, get_output_store().new_job_dir(), preview_pages=PREVIEW_PAGES)
+    except ServiceBusyError as e:
+        raise gr.Error(str(e))
+    progress(0, desc="queued")
+
+    finished = False
+    try:
+        preview_path = None
+        for kind, value in job.iter_events():
+            if kind == "stage":
+                progress(STAGE_PROGRESS[value], desc=value)
+            elif kind == "preview":
+                preview_path = value
+                yield preview_path, None
+
+        result = job.future.result()
+        finished = True
+        yield preview_path, result
+
+    except (FileValidationError, ParsingError, ConversionAbortedError) as e:
+        finished = True
+        raise gr.Error(str(e))
+    finally:
+        if not finished:
+            job.cancel()
+
+
+def convert_batch(files, template_choice, use_filename_as_heading, output_format="PDF", auto_structure=False, bulletize=False, navigation=False, linearize=False, progress=gr.Progress()):
+    """
+    Converts several uploads at once. Files are submitted to the
+    scheduler as it has room for them (see zip_as_completed), and each
+    result is added to one ZIP as soon as it is ready. Yields (report,
+    zip) pairs; the ZIP is returned once all files are done. Files that
+    fail are listed in the report (and in the archive's ERRORS.txt)
+    without stopping the rest.
+    """
+    if not files:
+        raise gr.Error("No file uploaded")
+
+    options = _options(template_choice, use_filename_as_heading, output_format, auto_structure, bulletize, navigation, linearize)
+    job_dir = get_output_store().new_job_dir()
+    render_jobs = []
+
+    def submitter(path, output_dir):
+        def submit():
+            job = get_scheduler().submit(path, options, output_dir)
+            render_jobs.append(job)
+            return job.future
+        return submit
+
+    waiting = []
+    for index, file in enumerate(files):
+        path = getattr(file, "name", file)
+        # Separate directories keep same-named outputs apart
+        output_dir = os.path.join(job_dir, str(index))
+        os.makedirs(output_dir)
+        waiting.append((os.path.basename(path), submitter(path, output_dir)))
+
+    zip_path = os.path.join(job_dir, "converted.zip")
+    lines = []
+    finished = False
+    try:
+        for done, result in enumerate(zip_as_completed({}, zip_path, waiting=waiting), start=1):
+            if result.error:
+                lines.append(f"❌ **{result.source}**: {html.escape(result.error)}")
             else:
-                 document = analyze_plaintext(content, file.name)
-                 
-        elif file_type == SupportedFileType.DOCX:
-            content = parse_docx(file)
-            document = analyze_plaintext(content, file.name)
-        elif file_type == SupportedFileType.CSV:
-            content = parse_csv(file)
-            document = analyze_plaintext(content, file.name)
-        elif file_type == SupportedFileType.HTML:
-            content = parse_html(file)
-            document = analyze_plaintext(content, file.name)
-        else:
-            content = parse_bin(file)
-            document = analyze_plaintext(content, file.name)
-        
-        # Remove title from StructuredDocument if toggle is OFF
-        if not use_filename_as_heading:
-            document.title = ""
-        
-        # Prepare Output Filename for other formats
-        original_name = os.path.splitext(os.path.basename(file.name))[0]
-        temp_dir = tempfile.mkdtemp()
-
-        if output_format == "DOCX":
-             output_path = os.path.join(temp_dir, f"{original_name}.docx")
-             generate_docx(document, PDFTemplate(template_choice), output_path)
-             return output_path
-        else:
-            output_path = os.path.join(temp_dir, f"{original_name}.pdf")
-            generate_pdf(
-                document=document,
-                template=PDFTemplate(template_choice),
-                output_path=output_path
-            )
-            return output_path
+                lines.append(f"✅ **{result.source}** → {result.archive_name}")
+            progress(done / len(files), desc=f"{done}/{len(files)} files")
+            yield "  \n".join(lines), None
 
-    except (FileValidationError, ParsingError) as e:
+        finished = True
+        yield "  \n".join(lines), zip_path
+    finally:
+        if not finished:
+            for job in render_jobs:
+                job.cancel()
+
+
+def convert_book_upload(files, template_choice, use_filename_as_heading, auto_structure=False, bulletize=False, navigation=False, linearize=False, progress=gr.Progress()):
+    """
+    Binds several uploads into one PDF, one chapter per file in file name
+    order. The book is made by a bulk-lane worker, sandboxed like other
+    jobs, and stopped if the event is cancelled. Yields (report, pdf).
+    """
+    if not files:
+        raise gr.Error("No file uploaded")
+
+    options = _options(template_choice, use_filename_as_heading, "PDF", auto_structure, bulletize, navigation, linearize)
+    paths = sorted((getattr(f, "name", f) for f in files), key=os.path.basename)
+    chapters = "  \n".join(f"{index}. {os.path.basename(path)}" for index, path in enumerate(paths, start=1))
+    report = f"**Book chapters:**  \n{chapters}"
+    try:
+        job = get_scheduler().submit_book(paths, options, get_output_store().new_job_dir())
+    except ServiceBusyError as e:
         raise gr.Error(str(e))
+    progress(0, desc="queued")
+
+    finished = False
+    try:
+        for kind, value in job.iter_events():
+            if kind == "stage":
+                progress(STAGE_PROGRESS[value], desc=value)
+                yield report, None
+
+        output_path = job.future.result()
+        finished = True
+        yield report, output_path
+
+    except (FileValidationError, ParsingError, ConversionAbortedError) as e:
+        finished = True
+        raise gr.Error(str(e))
+    finally:
+        if not finished:
+            job.cancel()
+
+
+def queue_status():
+    lines = []
+    for lane, stats in get_scheduler().snapshot().items():
+        p95 = f"{stats['p95']:.1f}s" if stats["p95"] is not None else "n/a"
+        lines.append(
+            f"**{lane.title()} lane:** {stats['running']} running · {stats['waiting']} waiting · p95 {p95}"
+        )
+
+    store = get_output_store().stats()
+    lines.append(f"**Stored outputs:** {store['files']} files · {store['bytes'] / (1024 * 1024):.1f} MB")
+    return "  \n".join(lines)
+
+def preview_html(file, template_choice, use_filename_as_heading, auto_structure=False, bulletize=False):
+    """
+    Instant structure preview: parse and analyze only, rendered as HTML.
+    """
+    if file is None:
+        return ""
+
+    options = _options(template_choice, use_filename_as_heading, "PDF", auto_structure, bulletize)
+    try:
+        return render_source_html(load_source(file, options), options)
+    except (FileValidationError, ParsingError) as e:
+        return f"<p><b>Preview unavailable:</b> {html.escape(str(e))}</p>"
 
 def update_txt_visibility(file):
     if file is None:
         return gr.update(visible=False), gr.update(visible=False)
     
-    filename = file.name if hasattr(file, 'name') else ""
-    if filename.lower().endswith('.txt'):
+    filename = source_name(file.name) if hasattr(file, 'name') else ""
+    if filename.lower().endswith(('.txt', '.log')):
         return gr.update(visible=True), gr.update(visible=True)
     
     return gr.update(visible=False), gr.update(visible=False)
@@ -129,7 +248,9 @@ def launch_app():
         radius_size="lg",
     )
 
-    with gr.Blocks(theme=theme, css=custom_css, title="Semantic File Converter") as app:
+    # Gradio keeps its own copy of every served file; expire it like the store
+    with gr.Blocks(theme=theme, css=custom_css, title="Semantic File Converter",
+                   delete_cache=(OUTPUT_TTL_SECONDS, OUTPUT_TTL_SECONDS)) as app:
         with gr.Column(elem_classes="container"):
             # --- Header ---
             gr.Markdown(
@@ -189,13 +310,44 @@ def launch_app():
                             visible=False,
                             info="Applies to TXT files: Formats all text as a list."
                         )
+                        navigation = gr.Checkbox(
+                            label="Table of Contents & Page Numbers",
+                            value=False,
+                            info="PDF only: Adds a contents page, bookmarks and \"Page X of Y\" footers."
+                        )
+                        linearize = gr.Checkbox(
+                            label="Fast Web View (Linearized PDF)",
+                            value=False,
+                            info="PDF only: Browsers can show the first page before the whole file has downloaded."
+                        )
 
             # --- Action & Output ---
             with gr.Row():
                 with gr.Column():
-                    convert_btn = gr.Button("Process and Convert", variant="primary", size="lg")
+                    with gr.Row():
+                        convert_btn = gr.Button("Process and Convert", variant="primary", size="lg")
+                        cancel_btn = gr.Button("Cancel", variant="secondary", size="lg")
+                    queue_info = gr.Markdown(queue_status)
+                    preview_file = gr.File(label="Quick Preview (First Page)", interactive=False)
                     output_file = gr.File(label="Download Processed Document", interactive=False)
 
+            # --- Batch Conversion ---
+            with gr.Accordion("Batch Conversion (Multiple Files)", open=False):
+                batch_input = gr.File(
+                    label="Upload Documents",
+                    file_count="multiple",
+                    height=200
+                )
+                with gr.Row():
+                    batch_btn = gr.Button("Convert All to ZIP", variant="primary")
+                    book_btn = gr.Button("Bind into One PDF (Book)", variant="secondary")
+                batch_report = gr.Markdown()
+                batch_output = gr.File(label="Download Batch Result", interactive=False)
+
+            # --- Structure Preview ---
+            with gr.Accordion("Structure Preview", open=True):
+                html_preview = gr.HTML()
+
             # --- Footer ---
             gr.Markdown(
                 """
@@ -215,20 +367,67 @@ def launch_app():
             outputs=[auto_structure, bulletize]
         )
 
-        convert_btn.click(
-            fn=convert_file,
+        preview_inputs = [file_input, template_dropdown, use_heading, auto_structure, bulletize]
+        for component in preview_inputs:
+            component.change(
+                fn=preview_html,
+                inputs=preview_inputs,
+                outputs=html_preview
+            )
+
+        convert_event = convert_btn.click(
+            fn=convert_file_with_preview,
             inputs=[
                 file_input, 
                 template_dropdown, 
                 use_heading, 
                 output_format, 
                 auto_structure, 
-                bulletize
+                bulletize,
+                navigation,
+                linearize
+            ],
+            outputs=[preview_file, output_file],
+            concurrency_limit=RENDER_CONCURRENCY
+        )
+        batch_event = batch_btn.click(
+            fn=convert_batch,
+            inputs=[
+                batch_input,
+                template_dropdown,
+                use_heading,
+                output_format,
+                auto_structure,
+                bulletize,
+                navigation,
+                linearize
             ],
-            outputs=output_file
+            outputs=[batch_report, batch_output],
+            concurrency_limit=RENDER_CONCURRENCY
         )
+        book_event = book_btn.click(
+            fn=convert_book_upload,
+            inputs=[
+                batch_input,
+                template_dropdown,
+                use_heading,
+                auto_structure,
+                bulletize,
+                navigation,
+                linearize
+            ],
+            outputs=[batch_report, batch_output],
+            concurrency_limit=RENDER_CONCURRENCY
+        )
+        cancel_btn.click(fn=None, cancels=[convert_event, batch_event, book_event])
+
+        gr.Timer(2).tick(fn=queue_status, outputs=queue_info)
 
+    get_output_store().start()
+    get_scheduler().warm_up()
+    app.queue(max_size=QUEUE_MAX_SIZE)
     app.launch()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     launch_app()
\ No newline at end of file
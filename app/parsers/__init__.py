@@ -1,4 +1,18 @@
-from .txt_parser import parse_txt
-from .md_parser import parse_md
-from .docx_parser import parse_docx
-from .bin_parser import parse_bin
+"""
+Parsers are imported on first use, so importing one does not load the
+libraries (python-docx, BeautifulSoup) behind the others.
+"""
+import importlib
+
+_EXPORTS = {
+    "parse_txt": ".txt_parser",
+    "parse_md": ".md_parser",
+    "parse_docx": ".docx_parser",
+    "parse_bin": ".bin_parser",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,6 @@
-from app.exceptions.custom_exceptions import ParsingError
+from app.exceptions.custom_exceptions import FileValidationError, ParsingError
 from app.enums.error_codes import AppErrorCode
+from app.utils.input_stream import open_input
 
 
 def parse_bin(file):
@@ -8,7 +9,9 @@ def parse_bin(file):
     Non-decodable bytes are ignored.
     """
     try:
-        with open(file.name, "rb") as f:
+        with open_input(file, "rb") as f:
             return f.read().decode("utf-8", errors="ignore")
+    except FileValidationError:
+        raise
     except Exception:
         raise ParsingError(AppErrorCode.PARSING_ERROR.value)
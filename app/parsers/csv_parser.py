@@ -1,5 +1,6 @@
 import csv
-from app.exceptions.custom_exceptions import ParsingError
+from app.exceptions.custom_exceptions import FileValidationError, ParsingError
+from app.utils.input_stream import open_input
 
 def parse_csv(file):
     """
@@ -8,12 +9,14 @@ def parse_csv(file):
     try:
         content = []
         # file.name is the path to the temp file created by Gradio
-        with open(file.name, 'r', encoding='utf-8', newline='') as f:
+        with open_input(file, 'r', newline='') as f:
             reader = csv.reader(f)
             for row in reader:
                 # Join columns with a comma and space for readability
                 content.append(", ".join(row))
         
         return "\n".join(content)
+    except FileValidationError:
+        raise
     except Exception as e:
         raise ParsingError(f"Failed to parse CSV: {str(e)}")
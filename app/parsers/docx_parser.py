@@ -1,6 +1,10 @@
+import io
+
 from docx import Document
-from app.exceptions.custom_exceptions import ParsingError
+from app.exceptions.custom_exceptions import FileValidationError, ParsingError
 from app.enums.error_codes import AppErrorCode
+from app.utils.input_stream import open_input
+from app.validators.content_sniffer import check_docx_package
 
 
 def parse_docx(file):
@@ -8,8 +12,18 @@ def parse_docx(file):
     Extracts text from a DOCX file.
     """
     try:
-        document = Document(file.name)
+        with open_input(file, "rb") as f:
+            # python-docx needs a seekable stream; decompressed input is
+            # buffered in memory (bounded by the decompression limit)
+            if f.seekable():
+                stream = f
+            else:
+                stream = io.BytesIO(f.read())
+                check_docx_package(stream)
+            document = Document(stream)
         paragraphs = [p.text for p in document.paragraphs if p.text.strip()]
         return "\n".join(paragraphs)
+    except FileValidationError:
+        raise
     except Exception:
         raise ParsingError(AppErrorCode.PARSING_ERROR.value)
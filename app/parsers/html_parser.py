@@ -1,14 +1,17 @@
 from bs4 import BeautifulSoup
-from app.exceptions.custom_exceptions import ParsingError
+from app.exceptions.custom_exceptions import FileValidationError, ParsingError
+from app.utils.input_stream import open_input
 
 def parse_html(file):
     """
     Parses an HTML file and extracts the text content.
     """
     try:
-        with open(file.name, 'r', encoding='utf-8') as f:
+        with open_input(file, 'r') as f:
             soup = BeautifulSoup(f, 'html.parser')
             # get_text(separator='\n') ensures that text blocks are separated by newlines
             return soup.get_text(separator='\n', strip=True)
+    except FileValidationError:
+        raise
     except Exception as e:
         raise ParsingError(f"Failed to parse HTML: {str(e)}")
@@ -1,6 +1,9 @@
 import json
 import os
 
+from app.exceptions.custom_exceptions import FileValidationError
+from app.utils.input_stream import open_input
+
 def parse_ipynb(file) -> str:
     """
     Parses an .ipynb file and converts it into a Markdown string representation.
@@ -12,7 +15,7 @@ def parse_ipynb(file) -> str:
             if isinstance(content, bytes):
                 content = content.decode('utf-8')
         else:
-            with open(file, 'r', encoding='utf-8') as f:
+            with open_input(file, 'r') as f:
                 content = f.read()
 
         nb = json.loads(content)
@@ -43,5 +46,7 @@ def parse_ipynb(file) -> str:
                 
         return "\n".join(md_output)
 
+    except FileValidationError:
+        raise
     except Exception as e:
         raise ValueError(f"Failed to parse IPYNB: {str(e)}")
@@ -1,5 +1,6 @@
-from app.exceptions.custom_exceptions import ParsingError
+from app.exceptions.custom_exceptions import FileValidationError, ParsingError
 from app.enums.error_codes import AppErrorCode
+from app.utils.input_stream import open_input
 
 
 def parse_md(file):
@@ -7,7 +8,9 @@ def parse_md(file):
     Parses a Markdown file as plain text.
     """
     try:
-        with open(file.name, "r", encoding="utf-8") as f:
+        with open_input(file, "r") as f:
             return f.read()
+    except FileValidationError:
+        raise
     except Exception:
         raise ParsingError(AppErrorCode.FILE_READ_ERROR.value)
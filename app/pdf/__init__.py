@@ -1 +1,17 @@
-from .pdf_generator import generate_pdf
+"""
+Renderers are imported on first use, so helpers such as pdf_file do not
+load ReportLab.
+"""
+import importlib
+
+_EXPORTS = {
+    "generate_pdf": ".pdf_generator",
+    "generate_book": ".book",
+    "linearize": ".linearize",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
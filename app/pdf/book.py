@@ -0,0 +1,76 @@
+"""
+Book mode: several parsed inputs laid out as chapters of one PDF.
+
+Every chapter goes into the same story and a single `build`, so styles
+are created once per book rather than per file, and page numbers,
+bookmarks and the table of contents span the whole book.
+"""
+from typing import List, Union
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+from app.analyzers.document_model import StructuredDocument
+from app.enums.templates import PDFTemplate
+from app.pdf import md_complete_conversion, pdf_generator
+from app.pdf.md_complete_conversion import MDCompleteConverter
+from app.pdf.navigation import NavigationDocTemplate
+from app.pdf.pdf_generator import build_styles, draw_page_border, iter_story
+from app.templates.pdf_templates import PDF_TEMPLATES
+
+# Outline levels of both renderers' heading styles
+HEADING_LEVELS = {**pdf_generator.HEADING_LEVELS, **md_complete_conversion.HEADING_LEVELS}
+
+# A chapter is markdown text or an analyzed document
+Chapter = Union[str, StructuredDocument]
+
+
+def _style_name(flowable):
+    return getattr(getattr(flowable, "style", None), "name", None)
+
+
+def generate_book(chapters: List[Chapter], template: PDFTemplate, output_path,
+                  fast: bool = False, navigation: bool = False) -> int:
+    """
+    Renders `chapters` in order to `output_path`, each starting on a new
+    page, and returns the page count. `fast` and `navigation` work as in
+    MDCompleteConverter.convert / generate_pdf.
+    """
+    cfg = PDF_TEMPLATES[template]
+    margin = cfg["page"]["margin"]
+    doc_kwargs = dict(pagesize=A4, leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin)
+
+    # One set of styles for the whole book
+    markdown = MDCompleteConverter(template)
+    markdown.margin = margin
+    markdown.fast = fast
+    styles = build_styles(cfg)
+
+    frame_width, frame_height = A4[0] - 2 * margin, A4[1] - 2 * margin
+    story = []
+    for index, chapter in enumerate(chapters):
+        if index:
+            story.append(PageBreak())
+        if isinstance(chapter, str):
+            story.extend(markdown.build_story(chapter))
+        else:
+            story.extend(iter_story(chapter, styles, frame_width, frame_height))
+
+    if navigation:
+        doc = NavigationDocTemplate(
+            output_path,
+            heading_levels=HEADING_LEVELS,
+            expected_headings=sum(_style_name(f) in HEADING_LEVELS for f in story),
+            font=cfg["body_style"]["font"],
+            font_size=cfg["body_style"]["size"],
+            **doc_kwargs
+        )
+    else:
+        doc = SimpleDocTemplate(output_path, **doc_kwargs)
+
+    def on_page(c, d):
+        if cfg["page"].get("border"):
+            draw_page_border(c, d, cfg["page"].get("border_width", 1))
+
+    doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+    return doc.page
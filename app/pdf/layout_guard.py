@@ -0,0 +1,172 @@
+import re
+from typing import List
+
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# Inline tags nested deeper than this are dropped (their text is kept)
+MAX_NESTING_DEPTH = 8
+
+# Fraction of a page a single paragraph chunk may fill. Each chunk is
+# laid out on its own, so split cost stays bounded by the chunk size
+PARAGRAPH_CHUNK_PAGES = 0.5
+
+# Broken pieces fill at most this fraction of the line, leaving room for
+# bold glyphs and the space that joins them
+BREAK_WIDTH_FACTOR = 0.9
+
+# Markup units that must never be cut: tags and character entities
+MARKUP_TOKEN = re.compile(r"<[^>]*>|&#?\w+;")
+# Words (tags inside them kept whole, spaces in attributes included) and
+# the whitespace between them
+WORD_OR_SPACE = re.compile(r"(?:<[^>]*>|[^\s<]|<)+|\s+")
+TAG = re.compile(r"<\s*(/)?\s*([a-zA-Z][\w:-]*)[^>]*?(/)?\s*>")
+
+
+def _units(word: str) -> List[str]:
+    """
+    Splits a word into characters, keeping tags and entities whole.
+    """
+    units, position = [], 0
+    for match in MARKUP_TOKEN.finditer(word):
+        units.extend(word[position:match.start()])
+        units.append(match.group())
+        position = match.end()
+    units.extend(word[position:])
+    return units
+
+
+def _unit_width(unit: str, font: str, size: float, cache: dict) -> float:
+    if unit not in cache:
+        if unit.startswith("<"):
+            cache[unit] = 0
+        elif unit.startswith("&"):
+            cache[unit] = stringWidth("W", font, size)
+        else:
+            cache[unit] = stringWidth(unit, font, size)
+    return cache[unit]
+
+
+def break_long_tokens(text: str, font: str, size: float, width: float) -> str:
+    """
+    Inserts a space into every whitespace-free run wider than `width`,
+    so ReportLab never has to split a word character by character.
+    """
+    if stringWidth("W", font, size) * max(map(len, text.split()), default=0) <= width:
+        # Fast path: no word can be wider than the frame
+        return text
+
+    width *= BREAK_WIDTH_FACTOR
+    parts, widths = [], {}
+    for part in WORD_OR_SPACE.findall(text):
+        if part.isspace() or stringWidth(part, font, size) <= width:
+            parts.append(part)
+            continue
+
+        pieces, line, line_width = [], [], 0
+        for unit in _units(part):
+            unit_width = _unit_width(unit, font, size, widths)
+            if line and line_width + unit_width > width:
+                pieces.append("".join(line))
+                line, line_width = [], 0
+            line.append(unit)
+            line_width += unit_width
+        pieces.append("".join(line))
+        parts.append(" ".join(pieces))
+
+    return "".join(parts)
+
+
+def cap_nesting(text: str, max_depth: int = MAX_NESTING_DEPTH) -> str:
+    """
+    Drops inline tags opened (and their closing tags) beyond `max_depth`
+    levels of nesting. Self-closing tags are kept.
+    """
+    if "<" not in text:
+        return text
+
+    depth, dropped, parts, position = 0, [], [], 0
+    for match in TAG.finditer(text):
+        parts.append(text[position:match.start()])
+        position = match.end()
+        closing, self_closing = match.group(1), match.group(3)
+
+        if self_closing:
+            parts.append(match.group())
+        elif closing:
+            if dropped and dropped[-1] == depth:
+                dropped.pop()
+            else:
+                parts.append(match.group())
+            depth = max(depth - 1, 0)
+        else:
+            depth += 1
+            if depth > max_depth:
+                dropped.append(depth)
+            else:
+                parts.append(match.group())
+
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def split_paragraph(text: str, max_chars: int) -> List[str]:
+    """
+    Splits `text` at whitespace into chunks of about `max_chars`, never
+    inside a tag or entity. Inline tags still open at a cut are closed
+    and re-opened in the next chunk.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks, current, size, open_tags = [], [], 0, []
+    for part in WORD_OR_SPACE.findall(text):
+        if size >= max_chars and part.isspace():
+            chunks.append("".join(current) + "".join(f"</{name}>" for name, _ in reversed(open_tags)))
+            current, size = [tag for _, tag in open_tags], 0
+            continue
+
+        for match in TAG.finditer(part):
+            closing, name, self_closing = match.group(1), match.group(2).lower(), match.group(3)
+            if self_closing:
+                continue
+            if closing:
+                for index in range(len(open_tags) - 1, -1, -1):
+                    if open_tags[index][0] == name:
+                        del open_tags[index]
+                        break
+            else:
+                open_tags.append((name, match.group()))
+
+        current.append(part)
+        size += len(part)
+
+    if current:
+        chunks.append("".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def chunk_chars(style: ParagraphStyle, frame_width: float, frame_height: float) -> int:
+    """
+    Characters of body text that fill PARAGRAPH_CHUNK_PAGES of a frame,
+    from the style's average glyph width and leading.
+    """
+    average_width = stringWidth("abcdefghijklmnopqrstuvwxyz ", style.fontName, style.fontSize) / 27
+    chars_per_line = max(int(frame_width / average_width), 1)
+    lines_per_page = max(int(frame_height / style.leading), 1)
+    return max(int(chars_per_line * lines_per_page * PARAGRAPH_CHUNK_PAGES), chars_per_line)
+
+
+def guard_text(text: str, style: ParagraphStyle, frame_width: float, frame_height: float,
+               split: bool = True) -> List[str]:
+    """
+    Pre-layout pass for one block of paragraph markup: caps nesting,
+    force-breaks overlong tokens and, unless `split` is False, splits it
+    into page-bounded chunks.
+    """
+    width = frame_width - style.leftIndent - style.rightIndent
+    text = cap_nesting(text)
+    text = break_long_tokens(text, style.fontName, style.fontSize, width)
+    if not split:
+        return [text]
+    return split_paragraph(text, chunk_chars(style, width, frame_height))
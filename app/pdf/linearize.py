@@ -0,0 +1,285 @@
+"""
+Linearized ("fast web view") PDF output, as described in Annex F of
+the PDF specification.
+
+The file is rewritten so that everything needed to show the first page
+comes first: the linearization dictionary, a cross-reference table for
+the first-page objects, the catalog, the hint stream and the first page
+with all objects it uses. The other pages follow in order, each with
+its own objects, then objects shared between later pages, then the
+rest. A viewer can display page one as soon as that part has arrived.
+"""
+from typing import Dict, List
+
+from app.pdf.pdf_file import PDF_HEADER, PDFReader, PDFRef, PDFStream, serialize, serialize_object
+from app.pdf.pdf_merge import leaf_pages, renumber
+
+# Width of the offsets written before they are known (fixed, so the
+# file layout does not change when they are filled in)
+OFFSET_DIGITS = 10
+
+
+class _BitWriter:
+    """
+    Packs unsigned integers MSB first, as hint tables require.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self._value, self._bits = 0, 0
+
+    def write(self, value: int, bits: int):
+        for shift in range(bits - 1, -1, -1):
+            self._value = (self._value << 1) | ((value >> shift) & 1)
+            self._bits += 1
+            if self._bits == 8:
+                self.data.append(self._value)
+                self._value, self._bits = 0, 0
+
+    def flush(self):
+        """
+        Pads the last byte; hint table items start on byte boundaries.
+        """
+        if self._bits:
+            self.write(0, 8 - self._bits)
+
+
+def _references(value, found: list):
+    if isinstance(value, PDFRef):
+        found.append(value.number)
+    elif isinstance(value, PDFStream):
+        _references(value.dictionary, found)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            # Parents lead back up the page tree, not to what a page uses
+            if key != "Parent":
+                _references(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _references(item, found)
+
+
+def _reachable(objects: dict, start: int, stop: set) -> List[int]:
+    """
+    Objects used by `start`, depth first, without entering `stop`.
+    """
+    order, seen, pending = [], {start}, [start]
+    while pending:
+        number = pending.pop()
+        order.append(number)
+        found = []
+        _references(objects.get(number), found)
+        for ref in reversed(found):
+            if ref in objects and ref not in seen and ref not in stop:
+                seen.add(ref)
+                pending.append(ref)
+    return order
+
+
+def _bits(value: int) -> int:
+    return max(value, 0).bit_length()
+
+
+def _page_offset_hints(counts, lengths, shared_refs, first_page_offset) -> bytes:
+    """
+    Page offset hint table (Table F.3 / F.4).
+    """
+    writer = _BitWriter()
+    least_count, least_length = min(counts), min(lengths)
+    count_bits = _bits(max(counts) - least_count)
+    length_bits = _bits(max(lengths) - least_length)
+    shared_count_bits = _bits(max(len(refs) for refs in shared_refs))
+    shared_id_bits = _bits(max((max(refs) for refs in shared_refs if refs), default=0))
+
+    # Content streams are described as spanning the whole page
+    for value, bits in ((least_count, 32), (first_page_offset, 32), (count_bits, 16), (least_length, 32),
+                        (length_bits, 16), (0, 32), (0, 16), (least_length, 32), (length_bits, 16),
+                        (shared_count_bits, 16), (shared_id_bits, 16), (0, 16), (1, 16)):
+        writer.write(value, bits)
+
+    for count in counts:
+        writer.write(count - least_count, count_bits)
+    writer.flush()
+    for length in lengths:
+        writer.write(length - least_length, length_bits)
+    writer.flush()
+    for refs in shared_refs:
+        writer.write(len(refs), shared_count_bits)
+    writer.flush()
+    for refs in shared_refs:
+        for ref in refs:
+            writer.write(ref, shared_id_bits)
+    writer.flush()
+    # Numerators (0 bits each) and content stream offsets (all 0)
+    for length in lengths:
+        writer.write(length - least_length, length_bits)
+    writer.flush()
+    return bytes(writer.data)
+
+
+def _shared_object_hints(lengths, first_page_entries, first_shared_number, first_shared_offset) -> bytes:
+    """
+    Shared object hint table (Table F.5 / F.6); one object per group.
+    """
+    writer = _BitWriter()
+    least_length = min(lengths, default=0)
+    length_bits = _bits(max(lengths, default=0) - least_length)
+
+    for value, bits in ((first_shared_number, 32), (first_shared_offset, 32), (first_page_entries, 32),
+                        (len(lengths), 32), (0, 16), (least_length, 32), (length_bits, 16)):
+        writer.write(value, bits)
+
+    for length in lengths:
+        writer.write(length - least_length, length_bits)
+    writer.flush()
+    # No signatures
+    for _ in lengths:
+        writer.write(0, 1)
+    writer.flush()
+    return bytes(writer.data)
+
+
+def _xref_entries(offsets: List[int]) -> bytes:
+    return b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+
+
+def linearize(data: bytes) -> bytes:
+    """
+    Returns the PDF in `data` rewritten as a linearized file with the
+    same objects (renumbered) and the same pages.
+    """
+    reader = PDFReader(data)
+    objects = {number: reader.get(number) for number in reader}
+    root = reader.trailer["Root"].number
+    info = reader.trailer.get("Info")
+
+    page_entries, tree = [], []
+    leaf_pages(reader, objects[root]["Pages"], {}, page_entries, tree)
+    if not page_entries:
+        return data
+    pages = [number for number, _ in page_entries]
+
+    # Inherited attributes are copied into each page
+    for number, inherited in page_entries:
+        for key, value in inherited.items():
+            objects[number].setdefault(key, value)
+
+    # Objects per page: the first page takes everything it uses; later
+    # pages own what only they use, the rest is shared
+    stop = set(pages) | set(tree) | {root}
+    reach = [_reachable(objects, page, stop - {page}) for page in pages]
+    first = reach[0]
+    first_set = set(first)
+
+    users: Dict[int, int] = {}
+    for refs in reach[1:]:
+        for number in refs:
+            if number not in first_set:
+                users[number] = users.get(number, 0) + 1
+    own = [[number for number in refs if number not in first_set and users[number] == 1] for refs in reach[1:]]
+    shared = list(dict.fromkeys(n for refs in reach[1:] for n in refs if n not in first_set and users[n] > 1))
+    placed = first_set | set(shared) | {n for refs in own for n in refs} | {root}
+    other = [number for number in sorted(objects) if number not in placed]
+
+    # Main part is numbered from 1, the first-page part after it
+    main_order = [n for refs in own for n in refs] + shared + other
+    main_size = len(main_order) + 1
+    linearization_number, hint_number = main_size, main_size + 1
+    first_order = [root] + first
+    mapping = {number: index for index, number in enumerate(main_order, start=1)}
+    mapping.update({number: hint_number + index for index, number in enumerate(first_order, start=1)})
+    size = hint_number + len(first_order) + 1
+
+    body = {number: serialize_object(mapping[number], renumber(value, mapping)) for number, value in objects.items()}
+    first_page_number = mapping[pages[0]]
+
+    file_id = reader.trailer.get("ID")
+    trailer_extra = b" /Info %d 0 R" % mapping[info.number] if info is not None else b""
+    if file_id is not None:
+        trailer_extra += b" /ID " + serialize(file_id)
+
+    def linearization_dict(length, hint_offset, hint_length, first_page_end, main_xref_entry):
+        return b"%d 0 obj\n<< /Linearized 1 /L %0*d /H [ %0*d %0*d ] /O %d /E %0*d /N %d /T %0*d >>\nendobj\n" % (
+            linearization_number, OFFSET_DIGITS, length, OFFSET_DIGITS, hint_offset, OFFSET_DIGITS,
+            hint_length, first_page_number, OFFSET_DIGITS, first_page_end, len(pages),
+            OFFSET_DIGITS, main_xref_entry
+        )
+
+    def layout(hint_data: bytes, values):
+        """
+        Assembles the file; `values` are the offsets found by the previous pass.
+        """
+        out = bytearray(PDF_HEADER)
+        out += linearization_dict(*values)
+
+        # First-page cross-reference table; offsets filled in below
+        first_xref_offset = len(out)
+        first_numbers = [linearization_number, hint_number] + [mapping[n] for n in first_order]
+        out += b"xref\n%d %d\n" % (linearization_number, len(first_numbers))
+        first_entries_at = len(out)
+        out += _xref_entries([0] * len(first_numbers))
+        out += b"trailer\n<< /Size %d /Root %d 0 R%s /Prev %0*d >>\nstartxref\n0\n%%%%EOF\n" % (
+            size, mapping[root], trailer_extra, OFFSET_DIGITS, values[4] - len(b"xref\n0 %d" % main_size)
+        )
+
+        offsets = {}
+        offsets[mapping[root]] = len(out)
+        out += body[root]
+
+        hint_offset = len(out)
+        offsets[hint_number] = hint_offset
+        out += b"%d 0 obj\n<< /Length %d /S %0*d >>\nstream\n" % (hint_number, len(hint_data), OFFSET_DIGITS,
+                                                                  hint_split[0])
+        out += hint_data + b"\nendstream\nendobj\n"
+        hint_length = len(out) - hint_offset
+
+        for number in first:
+            offsets[mapping[number]] = len(out)
+            out += body[number]
+        first_page_end = len(out)
+
+        for number in main_order:
+            offsets[mapping[number]] = len(out)
+            out += body[number]
+
+        out += b"xref\n0 %d\n" % main_size
+        main_xref_entry = len(out) - 1
+        out += b"0000000000 65535 f \n" + _xref_entries([offsets[n] for n in range(1, main_size)])
+        out += b"trailer\n<< /Size %d >>\nstartxref\n%d\n%%%%EOF\n" % (main_size, first_xref_offset)
+
+        offsets[linearization_number] = len(PDF_HEADER)
+        out[first_entries_at:first_entries_at + 20 * len(first_numbers)] = _xref_entries(
+            [offsets[n] for n in first_numbers]
+        )
+        return out, offsets, (len(out), hint_offset, hint_length, first_page_end, main_xref_entry)
+
+    def hints(offsets, first_page_end) -> bytes:
+        lengths = [len(body[n]) for n in first] + [len(body[n]) for n in shared]
+        entry = {n: index for index, n in enumerate(first + shared)}
+        counts = [len(first)] + [len(refs) for refs in own]
+        page_lengths = [first_page_end - offsets[first_page_number]] + [
+            sum(len(body[n]) for n in refs) for refs in own
+        ]
+        shared_refs = [[]] + [[entry[n] for n in refs if n in entry] for refs in reach[1:]]
+        page_table = _page_offset_hints(counts, page_lengths, shared_refs, offsets[first_page_number])
+        shared_table = _shared_object_hints(
+            lengths, len(first),
+            mapping[shared[0]] if shared else 0,
+            offsets[mapping[shared[0]]] if shared else 0,
+        )
+        hint_split[0] = len(page_table)
+        return page_table + shared_table
+
+    # Offsets depend on the hint stream's size and the hints on the
+    # offsets; reserve space and repeat until the hints fit
+    hint_split = [0]
+    hint_data, values = b"", (0, 0, 0, 0, 0)
+    for _ in range(8):
+        out, offsets, new_values = layout(hint_data, values)
+        new_hints = hints(offsets, new_values[3])
+        if new_values == values and len(new_hints) <= len(hint_data):
+            return bytes(out)
+        reserve = max(len(new_hints), len(hint_data))
+        hint_data = new_hints.ljust(reserve, b"\0")
+        values = new_values
+    return bytes(layout(hint_data, values)[0])
@@ -7,23 +7,34 @@ from reportlab.platypus import (
     ListFlowable, ListItem, Image, Preformatted, KeepTogether, XPreformatted
 )
 from app.utils.syntax_highlighter import highlight_code
+from app.utils.metrics import count
+from app.analyzers.markdown_analyzer import top_level_blocks
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 
 from app.enums.templates import PDFTemplate
+from app.pdf.preview import LazyStory, PreviewDocTemplate
+from app.pdf.navigation import NavigationDocTemplate
+
+# Outline level of each heading style, for navigation
+HEADING_LEVELS = {"MD_H1": 0, "MD_H2": 1, "MD_H3": 2, "MD_H4": 3}
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def markdown_parser() -> MarkdownIt:
+    return MarkdownIt("commonmark", {"breaks": True, "html": True}).enable("table")
+
+
 class MDCompleteConverter:
     def __init__(self, template_choice: PDFTemplate = PDFTemplate.CLASSIC):
-        self.md = MarkdownIt("commonmark", {"breaks": True, "html": True}).enable("table")
+        self.md = markdown_parser()
         self.width, self.height = A4
         self.margin = 50
         self.styles = self._get_styles(template_choice)
         self.story = []
+        self.fast = False
 
     def _get_styles(self, template_choice: PDFTemplate):
         styles = getSampleStyleSheet()
@@ -37,6 +48,7 @@ class MDCompleteConverter:
         }
         
         body_font, head_font = font_map.get(template_choice, ("Helvetica", "Helvetica-Bold"))
+        self.body_font = body_font
         
         # Heading Styles
         styles.add(ParagraphStyle(name='MD_H1', parent=styles['Heading1'], fontName=head_font, fontSize=24, spaceAfter=16, spaceBefore=24, keepWithNext=True))
@@ -71,20 +83,59 @@ class MDCompleteConverter:
         
         return styles
 
-    def convert(self, text: str, output_path: str):
+    def convert(self, text: str, output_path: str, max_pages: int = None, fast: bool = False,
+                navigation: bool = False) -> int:
+        """
+        Renders markdown `text` to `output_path` and returns the page count.
+
+        With `max_pages` set, layout stops after that many pages (preview
+        mode) and flowables are only created for the part that is laid out.
+        `fast` renders code blocks as plain preformatted text, without
+        syntax highlighting (used when a job is over its render budget).
+        `navigation` adds a table of contents, bookmarks and "Page X of Y"
+        footers, all from the single layout pass.
+        """
+        self.fast = fast
         tokens = self.md.parse(text)
-        self._process_tokens(tokens)
-        
-        doc = SimpleDocTemplate(
-            output_path,
+        count("blocks", top_level_blocks(tokens))
+
+        doc_kwargs = dict(
             pagesize=A4,
             leftMargin=self.margin,
             rightMargin=self.margin,
             topMargin=self.margin,
             bottomMargin=self.margin
         )
-        doc.build(self.story)
-        logger.info(f"PDF generated at {output_path}")
+
+        if max_pages:
+            doc = PreviewDocTemplate(output_path, max_pages=max_pages, **doc_kwargs)
+            doc.build(LazyStory(self._iter_story(tokens)))
+        else:
+            self._process_tokens(tokens)
+            if navigation:
+                doc = NavigationDocTemplate(
+                    output_path,
+                    heading_levels=HEADING_LEVELS,
+                    expected_headings=sum(
+                        t.type == 'heading_open' and t.tag in ('h1', 'h2', 'h3', 'h4') for t in tokens
+                    ),
+                    font=self.body_font,
+                    **doc_kwargs
+                )
+            else:
+                doc = SimpleDocTemplate(output_path, **doc_kwargs)
+            doc.build(self.story)
+        logger.debug("PDF generated at %s", output_path)
+        return doc.page
+
+    def build_story(self, text: str) -> list:
+        """
+        Returns the flowables for markdown `text` without laying them out,
+        so several documents can share one build (book mode).
+        """
+        self.story = []
+        self._process_tokens(self.md.parse(text))
+        return self.story
 
     def _process_tokens(self, tokens):
         """
@@ -92,77 +143,106 @@ class MDCompleteConverter:
         A state machine or recursive approach is often needed for nested lists/tables.
         Here we use a simplified iterative approach with buffers for complex blocks.
         """
+        for _ in self._iter_story(tokens):
+            pass
+
+    def _iter_story(self, tokens):
+        """
+        Processes tokens block by block, yielding the flowables each block
+        adds to the story.
+        """
         i = 0
         while i < len(tokens):
-            token = tokens[i]
-            type_ = token.type
+            start = len(self.story)
+            i = self._process_token(tokens, i)
+            yield from self.story[start:]
+
+    def _process_token(self, tokens, i):
+        """
+        Handles the block starting at tokens[i] and returns the index of the
+        next unprocessed token.
+        """
+        token = tokens[i]
+        type_ = token.type
+
+        if type_ == 'heading_open':
+            # heading_open -> inline -> heading_close
+            level = token.tag  # h1, h2...
+            content = tokens[i+1].content
+            self._add_heading(level, content)
+            return i + 3 # skip inline and close
             
-            if type_ == 'heading_open':
-                # heading_open -> inline -> heading_close
-                level = token.tag  # h1, h2...
+        elif type_ == 'paragraph_open':
+            # paragraph_open -> inline -> paragraph_close
+            # Check for if it's inside a list item? 
+            # (Simple approach: just render text)
+            if tokens[i+1].type == 'inline':
                 content = tokens[i+1].content
-                self._add_heading(level, content)
-                i += 3 # skip inline and close
-                continue
-                
-            elif type_ == 'paragraph_open':
-                # paragraph_open -> inline -> paragraph_close
-                # Check for if it's inside a list item? 
-                # (Simple approach: just render text)
-                if tokens[i+1].type == 'inline':
-                    content = tokens[i+1].content
-                    # Apply inline formatting (bold/italic) conversion if needed
-                    # ReportLab supports basic XML like <b>, <i>. 
-                    # MarkdownIt returns raw text or nested tokens for inline.
-                    # For robust inline support, we would need to map children.
-                    # As a quick fix, let's just use the rendered HTML or simple text.
-                    # Actually, we can use the `children` of the inline token to reconstruct with tags.
-                    formatted_text = self._render_inline(tokens[i+1])
-                    self.story.append(Paragraph(formatted_text, self.styles['MD_Body']))
-                i += 3
-                continue
+                # Apply inline formatting (bold/italic) conversion if needed
+                # ReportLab supports basic XML like <b>, <i>. 
+                # MarkdownIt returns raw text or nested tokens for inline.
+                # For robust inline support, we would need to map children.
+                # As a quick fix, let's just use the rendered HTML or simple text.
+                # Actually, we can use the `children` of the inline token to reconstruct with tags.
+                formatted_text = self._render_inline(tokens[i+1])
+                self.story.append(Paragraph(formatted_text, self.styles['MD_Body']))
+            return i + 3
+        
+        elif type_ == 'bullet_list_open' or type_ == 'ordered_list_open':
+            # Delegate to list handler which returns the consumed count
+            consumed = self._handle_list(tokens, i)
+            return i + consumed
             
-            elif type_ == 'bullet_list_open' or type_ == 'ordered_list_open':
-                # Delegate to list handler which returns the consumed count
-                consumed = self._handle_list(tokens, i)
-                i += consumed
-                continue
-                
-            elif type_ == 'table_open':
-                consumed = self._handle_table(tokens, i)
-                i += consumed
-                continue
-                
-            elif type_ == 'fence' or type_ == 'code_block':
-                content = token.content
-                info = token.info.strip() if hasattr(token, 'info') else ""
-                
-                # Apply Syntax Highlighting
-                try:
-                    highlighted_content = highlight_code(content, info if info else "text")
-                except:
-                    highlighted_content = content.replace("<", "&lt;").replace(">", "&gt;")
+        elif type_ == 'table_open':
+            consumed = self._handle_table(tokens, i)
+            return i + consumed
+            
+        elif type_ == 'fence' or type_ == 'code_block':
+            content = token.content
+            info = token.info.strip() if hasattr(token, 'info') else ""
 
-                # Issue: XPreformatted does NOT wrap long lines.
-                # Issue: Table wrapper CRASHES on multi-page blocks.
-                # Solution: Use Paragraph with backColor style. It splits correctly.
-                formatted_code = highlighted_content.replace("\n", "<br/>")
-                
-                # Add spacing before code block as requested ("two 1.5 \n space")
+            if self.fast:
+                # Plain text lays out in linear time, unlike highlighted markup.
+                # Preformatted does not wrap either, so long lines (minified
+                # JSON, base64) are broken at the width of the code box
                 self.story.append(Spacer(1, 30))
-                
-                # Create a Paragraph with the code style (which now has backColor/border)
-                self.story.append(Paragraph(formatted_code, self.styles['MD_Code']))
-                i += 1
-                continue
+                self.story.append(Preformatted(content.rstrip("\n"), self.styles['MD_Code'],
+                                               maxLineLength=self._code_line_length()))
+                return i + 1
             
-            elif type_ == 'hr':
-                self.story.append(Spacer(1, 12))
-                # Add a line drawing if desired
-                i += 1
-                continue
-                
-            i += 1
+            # Apply Syntax Highlighting
+            try:
+                highlighted_content = highlight_code(content, info if info else "text")
+            except:
+                highlighted_content = content.replace("<", "&lt;").replace(">", "&gt;")
+
+            # Issue: XPreformatted does NOT wrap long lines.
+            # Issue: Table wrapper CRASHES on multi-page blocks.
+            # Solution: Use Paragraph with backColor style. It splits correctly.
+            formatted_code = highlighted_content.replace("\n", "<br/>")
+            
+            # Add spacing before code block as requested ("two 1.5 \n space")
+            self.story.append(Spacer(1, 30))
+            
+            # Create a Paragraph with the code style (which now has backColor/border)
+            self.story.append(Paragraph(formatted_code, self.styles['MD_Code']))
+            return i + 1
+        
+        elif type_ == 'hr':
+            self.story.append(Spacer(1, 12))
+            # Add a line drawing if desired
+            return i + 1
+            
+        return i + 1
+
+    def _code_line_length(self) -> int:
+        """
+        Characters of the monospaced code style that fit on one line.
+        """
+        style = self.styles['MD_Code']
+        # Frame padding (6pt a side) and the style's indents
+        available = self.width - 2 * self.margin - 12 - style.leftIndent - style.rightIndent
+        return max(1, int(available // stringWidth("M", style.fontName, style.fontSize)))
 
     def _render_inline(self, inline_token):
         """
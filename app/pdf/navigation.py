@@ -0,0 +1,192 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, List
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable, PageBreak, SimpleDocTemplate
+
+# Named forms filled in once layout is done: the total page count shown
+# in every footer, and one per table-of-contents page
+TOTAL_PAGES_FORM = "NavTotalPages"
+TOC_PAGE_FORM = "NavContents{}"
+
+TOC_TITLE = "Contents"
+TOC_TITLE_HEIGHT = 40
+TOC_ENTRY_HEIGHT = 18
+TOC_LEVEL_INDENT = 16
+TOC_PAGE_NUMBER_WIDTH = 36
+
+FOOTER_FONT = "Helvetica"
+FOOTER_SIZE = 9
+
+
+@dataclass
+class TocEntry:
+    level: int
+    text: str
+    page: int
+    key: str
+
+
+class FormPage(Flowable):
+    """
+    Fills the rest of the frame with a named form, which may be defined
+    after the page itself has been laid out.
+    """
+
+    def __init__(self, form_name: str):
+        super().__init__()
+        self.form_name = form_name
+
+    def wrap(self, availWidth, availHeight):
+        self.width, self.height = availWidth, availHeight
+        return availWidth, availHeight
+
+    def draw(self):
+        self.canv.doForm(self.form_name)
+
+
+def _fit(text: str, font: str, size: float, width: float) -> str:
+    """
+    Truncates `text` with an ellipsis to fit `width`.
+    """
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(text + "...", font, size) > width:
+        text = text[:-1]
+    return text.rstrip() + "..."
+
+
+def footer_position(label: str, page_width: float, bottom_margin: float):
+    """
+    Where the footer starts: `label` ("Page N of ") is centred on the
+    page and the total page count follows it.
+    """
+    x = page_width / 2 - stringWidth(label, FOOTER_FONT, FOOTER_SIZE) / 2
+    y = bottom_margin / 2 - FOOTER_SIZE / 2
+    return x, y
+
+
+class NavigationDocTemplate(SimpleDocTemplate):
+    """
+    Single-pass table of contents, PDF bookmarks and "Page X of Y" footers.
+
+    Headings are recognised by style name as they are laid out; each gets
+    a bookmark and outline entry straight away. The TOC pages at the
+    start and the total page count are named forms: the TOC reserves one
+    page per `entries_per_page` expected headings, and the forms are drawn
+    after the only layout pass, once every heading's page is known.
+
+    With `footers` off no page numbers are drawn; sectioned rendering
+    adds them once the sections have been joined.
+    """
+
+    def __init__(self, filename, heading_levels: Dict[str, int], expected_headings: int,
+                 font: str = "Helvetica", font_size: float = 11, footers: bool = True, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.heading_levels = heading_levels
+        self.font, self.font_size = font, font_size
+        self.footers = footers
+        self.entries: List[TocEntry] = []
+
+        self.entries_per_page = max(int((self.height - TOC_TITLE_HEIGHT) / TOC_ENTRY_HEIGHT), 1)
+        self.toc_pages = math.ceil(expected_headings / self.entries_per_page)
+
+    def toc_story(self) -> list:
+        story = []
+        for index in range(self.toc_pages):
+            story += [FormPage(TOC_PAGE_FORM.format(index)), PageBreak()]
+        return story
+
+    def afterFlowable(self, flowable):
+        style = getattr(flowable, "style", None)
+        level = self.heading_levels.get(getattr(style, "name", None))
+        if level is None:
+            return
+
+        # Outline levels may only go one deeper than the previous entry
+        if self.entries:
+            level = min(level, self.entries[-1].level + 1)
+        else:
+            level = 0
+
+        text = flowable.getPlainText().strip()
+        key = f"nav{len(self.entries)}"
+        self.canv.bookmarkPage(key)
+        self.canv.addOutlineEntry(text, key, level=level, closed=level > 0)
+        self.entries.append(TocEntry(level, text, self.canv.getPageNumber(), key))
+
+    def _draw_footer(self, canv):
+        if not self.footers:
+            return
+        label = f"Page {canv.getPageNumber()} of "
+        x, y = footer_position(label, self.pagesize[0], self.bottomMargin)
+
+        canv.saveState()
+        canv.setFont(FOOTER_FONT, FOOTER_SIZE)
+        canv.drawString(x, y, label)
+        canv.translate(x + stringWidth(label, FOOTER_FONT, FOOTER_SIZE), y)
+        canv.doForm(TOTAL_PAGES_FORM)
+        canv.restoreState()
+
+    def _define_forms(self):
+        canv = self.canv
+        canv.beginForm(TOTAL_PAGES_FORM)
+        canv.setFont(FOOTER_FONT, FOOTER_SIZE)
+        canv.drawString(0, 0, str(self.page))
+        canv.endForm()
+
+        # Form coordinates are relative to the FormPage, i.e. the frame
+        width = self.width - 12
+        top = self.height - 12
+        for index in range(self.toc_pages):
+            canv.beginForm(TOC_PAGE_FORM.format(index))
+            y = top
+            if index == 0:
+                canv.setFont(self.font, self.font_size + 5)
+                canv.drawString(0, y - self.font_size - 5, TOC_TITLE)
+            y -= TOC_TITLE_HEIGHT
+
+            canv.setFont(self.font, self.font_size)
+            start = index * self.entries_per_page
+            for entry in self.entries[start:start + self.entries_per_page]:
+                indent = entry.level * TOC_LEVEL_INDENT
+                text = _fit(entry.text, self.font, self.font_size,
+                            width - indent - TOC_PAGE_NUMBER_WIDTH)
+                canv.drawString(indent, y, text)
+                canv.drawRightString(width, y, str(entry.page))
+
+                # Dot leaders between the heading and its page number
+                dots_from = indent + stringWidth(text, self.font, self.font_size) + 4
+                dots_to = width - stringWidth(str(entry.page), self.font, self.font_size) - 4
+                dot = stringWidth(". ", self.font, self.font_size)
+                if dots_to > dots_from:
+                    canv.drawString(dots_from, y, ". " * int((dots_to - dots_from) / dot))
+                y -= TOC_ENTRY_HEIGHT
+            canv.endForm()
+
+    def _endBuild(self):
+        # Forms are defined once the last page is done, before saving
+        self._doSave = 0
+        super()._endBuild()
+        self._define_forms()
+        self.canv.save()
+
+    def build(self, flowables, onFirstPage=lambda c, d: None, onLaterPages=lambda c, d: None, **kwargs):
+        def with_footer(on_page):
+            def decorated(canv, doc):
+                on_page(canv, doc)
+                self._draw_footer(canv)
+            return decorated
+
+        story = self.toc_story() + list(flowables)
+        if story and not flowables:
+            # Contents pages only; no break after the last one
+            story.pop()
+
+        super().build(
+            story,
+            onFirstPage=with_footer(onFirstPage),
+            onLaterPages=with_footer(onLaterPages),
+            **kwargs
+        )
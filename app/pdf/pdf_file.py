@@ -0,0 +1,310 @@
+"""
+Minimal PDF object reader and writer.
+
+Covers the files ReportLab writes: a classic cross-reference table,
+no object streams and no encryption. Objects are parsed into plain
+Python values so documents can be combined and rewritten without
+external tools:
+
+    dictionary  -> dict with PDFName keys
+    array       -> list
+    name        -> PDFName
+    string      -> PDFString (the raw token, written back unchanged)
+    reference   -> PDFRef
+    stream      -> PDFStream (dictionary plus encoded data)
+    numbers, booleans and null -> int / float, bool, None
+"""
+import io
+from dataclasses import dataclass
+from typing import Any, Dict, NamedTuple
+
+WHITESPACE = b"\x00\t\n\x0c\r "
+DELIMITERS = b"()<>[]{}/%"
+
+PDF_HEADER = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+
+
+class PDFName(str):
+    """
+    A name object, stored without its leading slash.
+    """
+
+
+class PDFString(bytes):
+    """
+    A string object as its raw token, e.g. b'(Title)' or b'<FEFF00>'.
+    """
+
+    @classmethod
+    def literal(cls, text: str) -> "PDFString":
+        escaped = text.encode("latin-1", "replace")
+        for char in (b"\\", b"(", b")"):
+            escaped = escaped.replace(char, b"\\" + char)
+        return cls(b"(" + escaped + b")")
+
+
+class PDFRef(NamedTuple):
+    number: int
+    generation: int = 0
+
+
+@dataclass
+class PDFStream:
+    dictionary: dict
+    data: bytes
+
+
+def _skip_space(data: bytes, pos: int) -> int:
+    length = len(data)
+    while pos < length:
+        char = data[pos]
+        if char in WHITESPACE:
+            pos += 1
+        elif char == 0x25:  # % comment, to end of line
+            while pos < length and data[pos] not in b"\r\n":
+                pos += 1
+        else:
+            break
+    return pos
+
+
+def _regular_token(data: bytes, pos: int):
+    end = pos
+    while end < len(data) and data[end] not in WHITESPACE and data[end] not in DELIMITERS:
+        end += 1
+    return data[pos:end], end
+
+
+def _number(token: bytes):
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def _literal_string_end(data: bytes, pos: int) -> int:
+    depth, pos = 0, pos
+    while pos < len(data):
+        char = data[pos]
+        if char == 0x5C:  # backslash escapes the next byte
+            pos += 2
+            continue
+        if char == 0x28:
+            depth += 1
+        elif char == 0x29:
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    raise ValueError("Unterminated string")
+
+
+def parse_value(data: bytes, pos: int):
+    """
+    Parses the object starting at or after `pos`. Returns (value, end).
+    """
+    pos = _skip_space(data, pos)
+    char = data[pos:pos + 1]
+
+    if data.startswith(b"<<", pos):
+        result, pos = {}, pos + 2
+        while True:
+            pos = _skip_space(data, pos)
+            if data.startswith(b">>", pos):
+                return result, pos + 2
+            key, pos = parse_value(data, pos)
+            result[key], pos = parse_value(data, pos)
+
+    if char == b"<":
+        end = data.index(b">", pos) + 1
+        return PDFString(data[pos:end]), end
+
+    if char == b"(":
+        end = _literal_string_end(data, pos)
+        return PDFString(data[pos:end]), end
+
+    if char == b"[":
+        result, pos = [], pos + 1
+        while True:
+            pos = _skip_space(data, pos)
+            if data.startswith(b"]", pos):
+                return result, pos + 1
+            value, pos = parse_value(data, pos)
+            result.append(value)
+
+    if char == b"/":
+        token, end = _regular_token(data, pos + 1)
+        return PDFName(token.decode("latin-1")), end
+
+    token, end = _regular_token(data, pos)
+    if token == b"true":
+        return True, end
+    if token == b"false":
+        return False, end
+    if token == b"null":
+        return None, end
+    if not token:
+        raise ValueError(f"Unexpected byte at offset {pos}")
+
+    value = _number(token)
+    if isinstance(value, int):
+        # "12 0 R" is a reference
+        generation_pos = _skip_space(data, end)
+        generation, after = _regular_token(data, generation_pos)
+        if generation.isdigit():
+            marker_pos = _skip_space(data, after)
+            marker, marker_end = _regular_token(data, marker_pos)
+            if marker == b"R":
+                return PDFRef(value, int(generation)), marker_end
+    return value, end
+
+
+class PDFReader:
+    """
+    Random access to the objects of a PDF through its cross-reference table.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offsets: Dict[int, int] = {}
+        self.trailer: dict = {}
+        self._cache: Dict[int, Any] = {}
+
+        start = data.rfind(b"startxref")
+        if start < 0:
+            raise ValueError("Not a PDF file: no startxref")
+        offset, _ = parse_value(data, start + len(b"startxref"))
+
+        # Newest section first; older entries never override newer ones
+        while offset is not None:
+            offset = self._read_xref(offset)
+
+    def _read_xref(self, pos: int):
+        pos = _skip_space(self.data, pos)
+        if not self.data.startswith(b"xref", pos):
+            raise ValueError("Unsupported PDF: cross-reference streams")
+        pos += len(b"xref")
+
+        while True:
+            pos = _skip_space(self.data, pos)
+            if self.data.startswith(b"trailer", pos):
+                break
+            first, pos = parse_value(self.data, pos)
+            count, pos = parse_value(self.data, pos)
+            for number in range(first, first + count):
+                pos = _skip_space(self.data, pos)
+                offset, generation, kind = self.data[pos:pos + 18].split()
+                pos += 18
+                if kind == b"n":
+                    self.offsets.setdefault(number, int(offset))
+
+        trailer, _ = parse_value(self.data, pos + len(b"trailer"))
+        for key, value in trailer.items():
+            self.trailer.setdefault(key, value)
+        return trailer.get("Prev")
+
+    def __iter__(self):
+        return iter(sorted(self.offsets))
+
+    def get(self, number: int):
+        if number not in self._cache:
+            self._cache[number] = self._parse_object(self.offsets[number])
+        return self._cache[number]
+
+    def resolve(self, value):
+        return self.get(value.number) if isinstance(value, PDFRef) else value
+
+    def _parse_object(self, pos: int):
+        _number, pos = parse_value(self.data, pos)
+        _generation, pos = parse_value(self.data, pos)
+        keyword, pos = _regular_token(self.data, _skip_space(self.data, pos))
+        if keyword != b"obj":
+            raise ValueError(f"Broken object at offset {pos}")
+
+        value, pos = parse_value(self.data, pos)
+        pos = _skip_space(self.data, pos)
+        if not (isinstance(value, dict) and self.data.startswith(b"stream", pos)):
+            return value
+
+        pos += len(b"stream")
+        pos += 2 if self.data.startswith(b"\r\n", pos) else 1
+        length = self.resolve(value["Length"])
+        return PDFStream(value, self.data[pos:pos + length])
+
+
+def _format_number(value) -> bytes:
+    if isinstance(value, float):
+        text = repr(value)
+        if "e" in text or "E" in text:
+            text = f"{value:.10f}".rstrip("0").rstrip(".")
+        return text.encode()
+    return str(value).encode()
+
+
+def serialize(value) -> bytes:
+    """
+    PDF syntax for a parsed value.
+    """
+    if isinstance(value, PDFStream):
+        dictionary = dict(value.dictionary, Length=len(value.data))
+        return serialize(dictionary) + b"\nstream\n" + value.data + b"\nendstream"
+    if isinstance(value, PDFRef):
+        return b"%d %d R" % (value.number, value.generation)
+    if isinstance(value, PDFName):
+        return b"/" + value.encode("latin-1")
+    if isinstance(value, PDFString):
+        return bytes(value)
+    if isinstance(value, dict):
+        items = b" ".join(serialize(PDFName(k)) + b" " + serialize(v) for k, v in value.items())
+        return b"<< " + items + b" >>"
+    if isinstance(value, list):
+        return b"[ " + b" ".join(serialize(v) for v in value) + b" ]"
+    if value is True:
+        return b"true"
+    if value is False:
+        return b"false"
+    if value is None:
+        return b"null"
+    return _format_number(value)
+
+
+def serialize_object(number: int, value) -> bytes:
+    return b"%d 0 obj\n" % number + serialize(value) + b"\nendobj\n"
+
+
+def xref_table(offsets: Dict[int, int], size: int) -> bytes:
+    """
+    Cross-reference table for objects 0..size-1; missing numbers are free.
+    """
+    lines = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+    for number in range(1, size):
+        if number in offsets:
+            lines.append(b"%010d 00000 n \n" % offsets[number])
+        else:
+            lines.append(b"0000000000 65535 f \n")
+    return b"".join(lines)
+
+
+def write_pdf(objects: Dict[int, Any], trailer: dict, output):
+    """
+    Writes numbered objects and a trailer (Root, Info, ID) as a complete
+    PDF to `output`, a path or a writable binary stream.
+    """
+    buffer = io.BytesIO()
+    buffer.write(PDF_HEADER)
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = buffer.tell()
+        buffer.write(serialize_object(number, objects[number]))
+
+    size = max(objects, default=0) + 1
+    startxref = buffer.tell()
+    buffer.write(xref_table(offsets, size))
+    buffer.write(b"trailer\n" + serialize(dict(trailer, Size=size)) + b"\n")
+    buffer.write(b"startxref\n%d\n%%%%EOF\n" % startxref)
+
+    if isinstance(output, (str, bytes)) or hasattr(output, "__fspath__"):
+        with open(output, "wb") as f:
+            f.write(buffer.getvalue())
+    else:
+        output.write(buffer.getvalue())
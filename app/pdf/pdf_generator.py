@@ -16,6 +16,9 @@ from reportlab.pdfgen import canvas
 from app.templates.pdf_templates import PDF_TEMPLATES
 from app.enums.templates import PDFTemplate
 from app.analyzers.document_model import StructuredDocument
+from app.pdf.preview import LazyStory, PreviewDocTemplate
+from app.pdf.layout_guard import guard_text
+from app.pdf.navigation import NavigationDocTemplate
 
 
 # -------------------------------------------------
@@ -35,58 +38,39 @@ def draw_page_border(c: canvas.Canvas, doc, border_width: int = 1):
 
 
 # -------------------------------------------------
-# PDF Generator
+# Styles
 # -------------------------------------------------
-def generate_pdf(
-    document: StructuredDocument,
-    template: PDFTemplate,
-    output_path: str
-):
-    cfg = PDF_TEMPLATES[template]
-
-    doc = SimpleDocTemplate(
-        output_path,
-        pagesize=A4,
-        leftMargin=cfg["page"]["margin"],
-        rightMargin=cfg["page"]["margin"],
-        topMargin=cfg["page"]["margin"],
-        bottomMargin=cfg["page"]["margin"]
-    )
-
-    story = []
+def build_styles(cfg: dict) -> dict:
+    body_cfg = cfg["body_style"]
 
-    # -------------------------------------------------
-    # Title
-    # -------------------------------------------------
-    if document.title:
-        title_style = ParagraphStyle(
+    return {
+        # -------------------------------------------------
+        # Title
+        # -------------------------------------------------
+        "title": ParagraphStyle(
             name="Title",
             fontName=cfg["title_style"]["font"],
             fontSize=cfg["title_style"]["size"],
             alignment=TA_CENTER,
             spaceAfter=cfg["title_style"]["space_after"]
-        )
-        story.append(Paragraph(document.title, title_style))
-
-    # -------------------------------------------------
-    # Base Body Style
-    # -------------------------------------------------
-    body_cfg = cfg["body_style"]
+        ),
 
-    body_style = ParagraphStyle(
-        name="Body",
-        fontName=body_cfg["font"],
-        fontSize=body_cfg["size"],
-        leading=body_cfg["leading"],
-        alignment=TA_JUSTIFY,
-        spaceBefore=6,
-        spaceAfter=14  # Increased from 10
-    )
+        # -------------------------------------------------
+        # Base Body Style
+        # -------------------------------------------------
+        "body": ParagraphStyle(
+            name="Body",
+            fontName=body_cfg["font"],
+            fontSize=body_cfg["size"],
+            leading=body_cfg["leading"],
+            alignment=TA_JUSTIFY,
+            spaceBefore=6,
+            spaceAfter=14  # Increased from 10
+        ),
 
-    # -------------------------------------------------
-    # Heading Styles
-    # -------------------------------------------------
-    h_styles = {
+        # -------------------------------------------------
+        # Heading Styles
+        # -------------------------------------------------
         "h1": ParagraphStyle(
             "H1", fontSize=16, spaceBefore=18, spaceAfter=14
         ),
@@ -96,92 +80,189 @@ def generate_pdf(
         "h3": ParagraphStyle(
             "H3", fontSize=12, spaceBefore=14, spaceAfter=10
         ),
+
+        # -------------------------------------------------
+        # Bullet Style (Indented / Hanging)
+        # -------------------------------------------------
+        "bullet": ParagraphStyle(
+            name="Bullet",
+            fontName=body_cfg["font"],
+            fontSize=body_cfg["size"],
+            leading=body_cfg["leading"],
+            leftIndent=24,
+            bulletIndent=12,
+            spaceBefore=4,
+            spaceAfter=10  # Increased from 6
+        ),
+
+        "quote": ParagraphStyle(
+            name="QuoteText",
+            fontName=body_cfg["font"],
+            fontSize=body_cfg["size"],
+            leading=body_cfg["leading"],
+            italic=True,
+            textColor=colors.darkgrey
+        ),
+
+        "code": ParagraphStyle(
+            name="Code",
+            fontName="Courier",
+            fontSize=9,
+            leading=12,
+            backColor=lightgrey,
+            leftIndent=12,
+            rightIndent=12,
+            spaceBefore=12,
+            spaceAfter=12
+        ),
     }
 
-    # -------------------------------------------------
-    # Bullet Style (Indented / Hanging)
-    # -------------------------------------------------
-    bullet_style = ParagraphStyle(
-        name="Bullet",
-        fontName=body_cfg["font"],
-        fontSize=body_cfg["size"],
-        leading=body_cfg["leading"],
-        leftIndent=24,
-        bulletIndent=12,
-        spaceBefore=4,
-        spaceAfter=10  # Increased from 6
+
+HEADING_TYPES = ("h1", "h2", "h3")
+
+# Outline level of each heading style, for navigation
+HEADING_LEVELS = {"H1": 0, "H2": 1, "H3": 2}
+
+
+# -------------------------------------------------
+# Story Generation
+# -------------------------------------------------
+def _chunk_styles(style: ParagraphStyle) -> tuple:
+    """
+    Styles for the first, middle and last chunk of a split paragraph, so
+    the chunks keep the spacing of a single paragraph.
+    """
+    return (
+        ParagraphStyle(f"{style.name}First", parent=style, spaceAfter=0),
+        ParagraphStyle(f"{style.name}Middle", parent=style, spaceBefore=0, spaceAfter=0),
+        ParagraphStyle(f"{style.name}Last", parent=style, spaceBefore=0),
     )
 
-    # -------------------------------------------------
-    # Document Blocks Rendering
-    # -------------------------------------------------
+
+def _guarded_paragraphs(text: str, style: ParagraphStyle, frame_width: float,
+                        frame_height: float, chunk_styles: dict, split: bool = True, **kwargs):
+    """
+    Paragraphs for one block after the layout guard. Bullets are only
+    drawn on the first chunk.
+    """
+    chunks = guard_text(text, style, frame_width, frame_height, split=split)
+    if len(chunks) == 1:
+        yield Paragraph(chunks[0], style, **kwargs)
+        return
+
+    if style.name not in chunk_styles:
+        chunk_styles[style.name] = _chunk_styles(style)
+    first, middle, last = chunk_styles[style.name]
+
+    for index, chunk in enumerate(chunks):
+        if index == 0:
+            yield Paragraph(chunk, first, **kwargs)
+        else:
+            yield Paragraph(chunk, last if index == len(chunks) - 1 else middle)
+
+
+def iter_story(document: StructuredDocument, styles: dict, frame_width: float,
+               frame_height: float = A4[1]):
+    """
+    Yields the flowables for `document` one block at a time. Text blocks
+    go through the layout guard first, so overlong tokens and giant
+    paragraphs cannot make layout time blow up.
+    """
+    chunk_styles = {}
+
+    def guarded(text, style, width=frame_width, split=True, **kwargs):
+        return _guarded_paragraphs(text, style, width, frame_height, chunk_styles, split=split, **kwargs)
+
+    if document.title:
+        yield from guarded(document.title, styles["title"])
+
     for block in document.blocks:
 
-        if block.type in h_styles:
-            story.append(Paragraph(block.content, h_styles[block.type]))
+        if block.type in HEADING_TYPES:
+            # Kept whole: navigation finds headings by their style name
+            yield from guarded(block.content, styles[block.type], split=False)
 
         elif block.type == "paragraph":
-            story.append(Paragraph(block.content, body_style))
+            yield from guarded(block.content, styles["body"])
 
         elif block.type == "bullet":
-            story.append(
-                Paragraph(
-                    block.content,
-                    bullet_style,
-                    bulletText="•"
-                )
+            yield from guarded(
+                block.content,
+                styles["bullet"],
+                bulletText="•"
             )
 
         elif block.type == "quote":
-            quote_para = Paragraph(
-                block.content,
-                ParagraphStyle(
-                    name="QuoteText",
-                    fontName=body_cfg["font"],
-                    fontSize=body_cfg["size"],
-                    leading=body_cfg["leading"],
-                    italic=True,
-                    textColor=colors.darkgrey
-                )
-            )
+            # Cell padding and the table's own inset
+            for quote_para in guarded(block.content, styles["quote"], width=frame_width - 64):
 
-            quote_table = Table(
-                [[quote_para]],
-                colWidths=[doc.width - 40]
-            )
+                quote_table = Table(
+                    [[quote_para]],
+                    colWidths=[frame_width - 40]
+                )
 
-            quote_table.setStyle(
-                TableStyle([
-                    ("BOX", (0, 0), (-1, -1), 1, colors.grey),
-                    ("BACKGROUND", (0, 0), (-1, -1), colors.whitesmoke),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 12),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 12),
-                    ("TOPPADDING", (0, 0), (-1, -1), 10),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
-                ])
-            )
+                quote_table.setStyle(
+                    TableStyle([
+                        ("BOX", (0, 0), (-1, -1), 1, colors.grey),
+                        ("BACKGROUND", (0, 0), (-1, -1), colors.whitesmoke),
+                        ("LEFTPADDING", (0, 0), (-1, -1), 12),
+                        ("RIGHTPADDING", (0, 0), (-1, -1), 12),
+                        ("TOPPADDING", (0, 0), (-1, -1), 10),
+                        ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
+                    ])
+                )
 
-            story.append(Spacer(1, 10))
-            story.append(quote_table)
-            story.append(Spacer(1, 14))
+                yield Spacer(1, 10)
+                yield quote_table
+                yield Spacer(1, 14)
 
         elif block.type == "code":
-            story.append(
-                Preformatted(
-                    block.content,
-                    style=ParagraphStyle(
-                        name="Code",
-                        fontName="Courier",
-                        fontSize=9,
-                        leading=12,
-                        backColor=lightgrey,
-                        leftIndent=12,
-                        rightIndent=12,
-                        spaceBefore=12,
-                        spaceAfter=12
-                    )
-                )
-            )
+            yield Preformatted(block.content, style=styles["code"])
+
+
+# -------------------------------------------------
+# PDF Generator
+# -------------------------------------------------
+def generate_pdf(
+    document: StructuredDocument,
+    template: PDFTemplate,
+    output_path: str,
+    max_pages: int = None,
+    navigation: bool = False
+) -> int:
+    """
+    Renders `document` to `output_path` and returns the page count.
+
+    With `max_pages` set, only the first pages are laid out (preview mode)
+    and the story is generated lazily as layout consumes it. `navigation`
+    adds a table of contents, bookmarks and "Page X of Y" footers.
+    """
+    cfg = PDF_TEMPLATES[template]
+
+    doc_kwargs = dict(
+        pagesize=A4,
+        leftMargin=cfg["page"]["margin"],
+        rightMargin=cfg["page"]["margin"],
+        topMargin=cfg["page"]["margin"],
+        bottomMargin=cfg["page"]["margin"]
+    )
+
+    if max_pages:
+        doc = PreviewDocTemplate(output_path, max_pages=max_pages, **doc_kwargs)
+    elif navigation:
+        doc = NavigationDocTemplate(
+            output_path,
+            heading_levels=HEADING_LEVELS,
+            expected_headings=sum(block.type in HEADING_TYPES for block in document.blocks),
+            font=cfg["body_style"]["font"],
+            font_size=cfg["body_style"]["size"],
+            **doc_kwargs
+        )
+    else:
+        doc = SimpleDocTemplate(output_path, **doc_kwargs)
+
+    story = iter_story(document, build_styles(cfg), doc.width, doc.height)
+    story = LazyStory(story) if max_pages else list(story)
 
     # -------------------------------------------------
     # Page Decoration Hook
@@ -199,3 +280,4 @@ def generate_pdf(
         onFirstPage=on_page,
         onLaterPages=on_page
     )
+    return doc.page
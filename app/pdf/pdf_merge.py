@@ -0,0 +1,216 @@
+"""
+Concatenates PDF documents page by page without external tools.
+
+Every object of every input is copied under a new object number; the
+inputs' page trees are replaced by one flat page tree and their outlines
+are chained into one, so bookmarks keep pointing at their pages.
+"""
+import hashlib
+from typing import Callable, List, Optional
+
+from app.pdf.pdf_file import PDFName, PDFReader, PDFRef, PDFStream, PDFString, write_pdf
+
+# Page attributes that may be inherited from the page tree
+INHERITED_PAGE_KEYS = ("Resources", "MediaBox", "CropBox", "Rotate")
+
+# Resource name of the font used by page overlays
+OVERLAY_FONT = "FOverlay"
+
+
+def renumber(value, mapping: dict):
+    """
+    Copy of `value` with every reference replaced through `mapping`.
+    References to objects not in `mapping` become null.
+    """
+    if isinstance(value, PDFRef):
+        return PDFRef(mapping[value.number]) if value.number in mapping else None
+    if isinstance(value, PDFStream):
+        return PDFStream(renumber(value.dictionary, mapping), value.data)
+    if isinstance(value, dict):
+        return {key: renumber(item, mapping) for key, item in value.items()}
+    if isinstance(value, list):
+        return [renumber(item, mapping) for item in value]
+    return value
+
+
+def leaf_pages(reader: PDFReader, node_ref: PDFRef, inherited: dict, pages: list, tree: list):
+    """
+    Walks the page tree under `node_ref`, appending (page number,
+    inherited attributes) to `pages` in order and every intermediate
+    node's number to `tree`.
+    """
+    node = reader.get(node_ref.number)
+    tree.append(node_ref.number)
+    if node.get("Type") == "Page":
+        tree.pop()
+        pages.append((node_ref.number, inherited))
+        return
+
+    inherited = dict(inherited, **{key: node[key] for key in INHERITED_PAGE_KEYS if key in node})
+    for kid in node.get("Kids", []):
+        leaf_pages(reader, kid, inherited, pages, tree)
+
+
+def _outline_items(objects: dict, first: Optional[PDFRef]) -> List[PDFRef]:
+    items = []
+    while first is not None:
+        items.append(first)
+        first = objects[first.number].get("Next")
+    return items
+
+
+class PDFConcatenator:
+    """
+    Collects the objects of several PDFs into one numbering.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.pages: List[PDFRef] = []
+        self.outline_items: List[PDFRef] = []
+        self.outline_count = 0
+        self.info = None
+        self.page_mode = None
+        self._digest = hashlib.md5()
+        self._overlay_fonts = {}
+        self._save_state_ref = None
+        # Numbers 1-3: catalog, page tree root, outline root
+        self.catalog_ref, self.pages_ref, self.outlines_ref = PDFRef(1), PDFRef(2), PDFRef(3)
+        self._next = 4
+
+    def _allocate(self, value) -> PDFRef:
+        ref = PDFRef(self._next)
+        self.objects[self._next] = value
+        self._next += 1
+        return ref
+
+    def append(self, data: bytes):
+        """
+        Appends every page of the PDF in `data`.
+        """
+        reader = PDFReader(data)
+        self._digest.update(data)
+        catalog = reader.resolve(reader.trailer["Root"])
+
+        pages, tree = [], [reader.trailer["Root"].number]
+        leaf_pages(reader, catalog["Pages"], {}, pages, tree)
+        outlines = reader.resolve(catalog.get("Outlines")) or {}
+        if "Outlines" in catalog:
+            tree.append(catalog["Outlines"].number)
+        info = reader.trailer.get("Info")
+        if info is not None and self.info is not None:
+            tree.append(info.number)
+
+        # Catalog, page tree nodes and outline root are replaced by ours
+        dropped = set(tree)
+        mapping = {number: self._next + index for index, number in enumerate(n for n in reader if n not in dropped)}
+        for number, new_number in mapping.items():
+            self.objects[new_number] = renumber(reader.get(number), mapping)
+        self._next += len(mapping)
+
+        if info is not None and self.info is None:
+            self.info = PDFRef(mapping[info.number])
+        if self.page_mode is None and "PageMode" in catalog:
+            self.page_mode = catalog["PageMode"]
+
+        for number, inherited in pages:
+            page = self.objects[mapping[number]]
+            for key, value in inherited.items():
+                page.setdefault(key, renumber(value, mapping))
+            page["Parent"] = self.pages_ref
+            self.pages.append(PDFRef(mapping[number]))
+
+        first = outlines.get("First")
+        items = _outline_items(self.objects, renumber(first, mapping)) if first is not None else []
+        for item in items:
+            self.objects[item.number]["Parent"] = self.outlines_ref
+        if self.outline_items and items:
+            self.objects[self.outline_items[-1].number]["Next"] = items[0]
+            self.objects[items[0].number]["Prev"] = self.outline_items[-1]
+        self.outline_items += items
+        self.outline_count += outlines.get("Count", len(items))
+
+    def add_overlay(self, page_index: int, content: bytes, font: str = "Helvetica"):
+        """
+        Draws `content` (a page content stream) on top of a page. The
+        content may use the font `font` under the resource name FOverlay.
+        """
+        page = self.objects[self.pages[page_index].number]
+
+        resources = page.setdefault("Resources", {})
+        if isinstance(resources, PDFRef):
+            resources = self.objects[resources.number]
+        fonts = resources.setdefault("Font", {})
+        if isinstance(fonts, PDFRef):
+            fonts = self.objects[fonts.number]
+        if OVERLAY_FONT not in fonts:
+            fonts[OVERLAY_FONT] = self._overlay_font(font)
+
+        contents = page.get("Contents", [])
+        contents = contents if isinstance(contents, list) else [contents]
+        # The page's own content runs inside q/Q, so its graphics state
+        # cannot leak into the overlay
+        page["Contents"] = [self._save_state()] + contents + [self._allocate(PDFStream({}, b"Q\n" + content))]
+
+    def _overlay_font(self, font: str) -> PDFRef:
+        if font not in self._overlay_fonts:
+            self._overlay_fonts[font] = self._allocate({
+                "Type": PDFName("Font"),
+                "Subtype": PDFName("Type1"),
+                "BaseFont": PDFName(font),
+                "Encoding": PDFName("WinAnsiEncoding"),
+            })
+        return self._overlay_fonts[font]
+
+    def _save_state(self) -> PDFRef:
+        if self._save_state_ref is None:
+            self._save_state_ref = self._allocate(PDFStream({}, b"q\n"))
+        return self._save_state_ref
+
+    def write(self, output):
+        """
+        Writes the combined document to `output`, a path or binary stream.
+        """
+        self.objects[self.pages_ref.number] = {
+            "Type": PDFName("Pages"),
+            "Kids": list(self.pages),
+            "Count": len(self.pages),
+        }
+        catalog = {"Type": PDFName("Catalog"), "Pages": self.pages_ref}
+        if self.outline_items:
+            self.objects[self.outlines_ref.number] = {
+                "Type": PDFName("Outlines"),
+                "First": self.outline_items[0],
+                "Last": self.outline_items[-1],
+                "Count": self.outline_count,
+            }
+            catalog["Outlines"] = self.outlines_ref
+        if self.page_mode is not None:
+            catalog["PageMode"] = self.page_mode
+        self.objects[self.catalog_ref.number] = catalog
+
+        file_id = PDFString(b"<" + self._digest.hexdigest().encode() + b">")
+        trailer = {"Root": self.catalog_ref, "ID": [file_id, file_id]}
+        if self.info is not None:
+            trailer["Info"] = self.info
+        write_pdf(self.objects, trailer, output)
+
+
+def concatenate(documents: List[bytes], output,
+                overlay: Callable[[int, int], bytes] = None, overlay_font: str = "Helvetica") -> int:
+    """
+    Writes the pages of `documents`, in order, as one PDF to `output` and
+    returns the page count. `overlay(page_number, total_pages)` may
+    return extra content to draw on each page, e.g. a page number footer.
+    """
+    merged = PDFConcatenator()
+    for data in documents:
+        merged.append(data)
+
+    total = len(merged.pages)
+    if overlay is not None:
+        for index in range(total):
+            merged.add_overlay(index, overlay(index + 1, total), overlay_font)
+
+    merged.write(output)
+    return total
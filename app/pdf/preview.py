@@ -0,0 +1,82 @@
+from reportlab.platypus import SimpleDocTemplate
+
+
+class LazyStory(list):
+    """
+    Story list that pulls flowables from a generator only as layout
+    reaches them.
+
+    ReportLab's build loop only ever inspects the front of the story, so
+    keeping a short buffer of upcoming flowables is enough. The buffer is
+    extended while its last flowable must be kept with the next one, so
+    headings still move to the next page together with their content.
+    """
+
+    LOOKAHEAD = 8
+
+    def __init__(self, source):
+        super().__init__()
+        self._source = iter(source)
+
+    def _fill(self):
+        while self._source is not None:
+            size = list.__len__(self)
+            if size >= self.LOOKAHEAD and not _keeps_with_next(list.__getitem__(self, -1)):
+                return
+            try:
+                list.append(self, next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+    def stop(self):
+        """
+        Discards the buffer without generating the rest of the story.
+        """
+        self._source = None
+        del self[:]
+
+
+def _keeps_with_next(flowable) -> bool:
+    try:
+        return bool(flowable.getKeepWithNext())
+    except AttributeError:
+        return False
+
+
+class PreviewDocTemplate(SimpleDocTemplate):
+    """
+    SimpleDocTemplate that stops laying out the story once `max_pages`
+    pages have been drawn. The remaining flowables are never wrapped or
+    split, so the cost of a preview does not depend on document length.
+    """
+
+    def __init__(self, filename, max_pages: int = 1, **kw):
+        super().__init__(filename, **kw)
+        self.max_pages = max_pages
+        self._story = None
+
+    def build(self, flowables, *args, **kwargs):
+        self._story = flowables
+        try:
+            super().build(flowables, *args, **kwargs)
+        finally:
+            self._story = None
+
+    def handle_pageEnd(self):
+        super().handle_pageEnd()
+
+        # The page begin hung by the base class is dropped by _endBuild
+        # once the story is empty, so no blank page is added
+        if self._story is not None and self.page >= self.max_pages:
+            if isinstance(self._story, LazyStory):
+                self._story.stop()
+            else:
+                del self._story[:]
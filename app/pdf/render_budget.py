@@ -0,0 +1,307 @@
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from app.analyzers.document_model import StructuredDocument
+from app.enums.error_codes import AppErrorCode
+from app.enums.templates import PDFTemplate
+from app.exceptions.custom_exceptions import FileValidationError
+from app.pdf.md_complete_conversion import MDCompleteConverter
+from app.templates.pdf_templates import PDF_TEMPLATES
+from app.utils.constants import RENDER_TIME_BUDGET, RENDER_PAGE_BUDGET
+from app.utils.metrics import count
+
+logger = logging.getLogger(__name__)
+
+# Layout cost per page of plain flowables, in seconds
+SECONDS_PER_PAGE = 0.01
+
+# Highlighted code is laid out as one markup Paragraph per block, whose
+# split cost grows with the square of its length
+SECONDS_PER_HIGHLIGHTED_CHAR = 5e-5
+SECONDS_PER_HIGHLIGHTED_CHAR_SQUARED = 6e-9
+
+# Code is set in 9pt Courier on 12pt leading by generate_pdf
+CODE_CHAR_WIDTH = stringWidth("x", "Courier", 9)
+CODE_LEADING = 12
+
+# SimpleDocTemplate frames pad their content by 6pt a side
+FRAME_PADDING = 12
+
+FENCE_MARKERS = ("```", "~~~")
+HEADING = re.compile(r"^(#{1,6})\s")
+LIST_ITEM = re.compile(r"^(?:[-*+]|\d+[.)])\s")
+TABLE_SEPARATOR = re.compile(r"^\|?[\s:|-]+\|?$")
+
+
+@dataclass
+class RenderEstimate:
+    pages: float
+    seconds: float
+    fast_seconds: float
+    code_blocks: List[int] = field(default_factory=list)
+
+
+def _chars_per_line(width: float, font: str, size: float) -> int:
+    average_width = stringWidth("abcdefghijklmnopqrstuvwxyz ", font, size) / 27
+    return max(int(width / average_width), 1)
+
+
+@dataclass
+class TextMetrics:
+    """
+    Height of wrapped text in one paragraph style, in points.
+    """
+    chars_per_line: int
+    leading: float
+    space: float
+
+    @classmethod
+    def from_style(cls, style: ParagraphStyle, width: float) -> "TextMetrics":
+        return cls(_chars_per_line(width, style.fontName, style.fontSize), style.leading,
+                   style.spaceBefore + style.spaceAfter)
+
+    def height(self, chars: int) -> float:
+        return max(math.ceil(chars / self.chars_per_line), 1) * self.leading + self.space
+
+
+class PageMetrics:
+    """
+    Page and block sizes for one renderer and template. Heights are in
+    points, so pages are the summed heights over the frame height.
+    """
+
+    def __init__(self, frame_width: float, frame_height: float, body: TextMetrics, code: TextMetrics,
+                 code_space: float, headings: Optional[Dict[int, TextMetrics]] = None,
+                 list_indent: float = 0, table_padding: float = 0, table_space: float = 0):
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.body = body
+        self.code = code
+        self.code_space = code_space
+        self.headings = headings or {}
+        self.list_item = TextMetrics(
+            max(int(body.chars_per_line * (frame_width - list_indent) / frame_width), 1),
+            body.leading, body.space
+        )
+        self.table_padding = table_padding
+        self.table_space = table_space
+
+    @classmethod
+    def for_template(cls, template: PDFTemplate) -> "PageMetrics":
+        """
+        Metrics of generate_pdf output, from the template's body style and margins.
+        """
+        cfg = PDF_TEMPLATES[template]
+        body, margin = cfg["body_style"], cfg["page"]["margin"]
+        frame_width, frame_height = A4[0] - 2 * margin, A4[1] - 2 * margin
+        return cls(
+            frame_width, frame_height,
+            body=TextMetrics(_chars_per_line(frame_width, body["font"], body["size"]),
+                             body["leading"], body["space_after"]),
+            code=TextMetrics(max(int(frame_width / CODE_CHAR_WIDTH), 1), CODE_LEADING, 0),
+            code_space=body["space_after"],
+        )
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def for_markdown(cls, template: PDFTemplate) -> "PageMetrics":
+        """
+        Metrics of MDCompleteConverter output, from the converter's own
+        styles and margin, which do not follow PDF_TEMPLATES.
+        """
+        converter = MDCompleteConverter(template)
+        styles = converter.styles
+        frame_width = converter.width - 2 * converter.margin - FRAME_PADDING
+        frame_height = converter.height - 2 * converter.margin - FRAME_PADDING
+        code = styles["MD_Code"]
+        return cls(
+            frame_width, frame_height,
+            body=TextMetrics.from_style(styles["MD_Body"], frame_width),
+            code=TextMetrics(max(converter._code_line_length(), 1), code.leading, 0),
+            # Each code block is preceded by a 30pt Spacer
+            code_space=30 + code.spaceBefore + code.spaceAfter,
+            headings={
+                level: TextMetrics.from_style(styles[f"MD_H{level}"], frame_width)
+                for level in range(1, 5)
+            },
+            # ListFlowable indent, and the cell padding of tables and the
+            # Spacer after them
+            list_indent=20,
+            table_padding=6,
+            table_space=12,
+        )
+
+    def text_height(self, chars: int) -> float:
+        return self.body.height(chars)
+
+    def heading_height(self, level: int, chars: int) -> float:
+        return self.headings.get(level, self.body).height(chars)
+
+    def table_row_height(self, cells: List[str]) -> float:
+        column_width = self.frame_width / max(len(cells), 1) - 2 * self.table_padding
+        chars_per_line = max(int(self.body.chars_per_line * column_width / self.frame_width), 1)
+        lines = max(max(math.ceil(len(cell.strip()) / chars_per_line), 1) for cell in cells)
+        return lines * self.body.leading + self.table_padding
+
+    def code_height(self, code: str) -> float:
+        lines = sum(math.ceil(max(len(line), 1) / self.code.chars_per_line) for line in code.split("\n"))
+        return lines * self.code.leading + self.code_space
+
+
+def _estimate(height: float, code_blocks: List[int], metrics: PageMetrics,
+              highlighted: bool) -> RenderEstimate:
+    pages = height / metrics.frame_height
+    fast_seconds = pages * SECONDS_PER_PAGE
+    highlight_seconds = sum(
+        n * SECONDS_PER_HIGHLIGHTED_CHAR + n * n * SECONDS_PER_HIGHLIGHTED_CHAR_SQUARED
+        for n in code_blocks
+    ) if highlighted else 0
+    return RenderEstimate(pages, fast_seconds + highlight_seconds, fast_seconds, code_blocks)
+
+
+def estimate_markdown(text: str, template: PDFTemplate) -> RenderEstimate:
+    """
+    Estimates MDCompleteConverter rendering from a single pass over the
+    lines: headings, paragraphs, list items, table rows and fenced code
+    blocks, each sized with the converter's style for it.
+    """
+    metrics = PageMetrics.for_markdown(template)
+    height, code_blocks = 0.0, []
+    fence, code = None, []
+    # The paragraph or list item being read, and its size function
+    paragraph, paragraph_height = 0, metrics.text_height
+    in_table = False
+
+    def flush() -> float:
+        nonlocal paragraph
+        block, paragraph = (paragraph_height(paragraph) if paragraph else 0.0), 0
+        return block
+
+    for line in text.split("\n"):
+        stripped = line.strip()
+
+        if fence is not None:
+            if stripped.startswith(fence):
+                block = "\n".join(code)
+                height += metrics.code_height(block)
+                code_blocks.append(len(block))
+                fence, code = None, []
+            else:
+                code.append(line)
+            continue
+
+        if in_table and not stripped.startswith("|"):
+            height += metrics.table_space
+            in_table = False
+
+        heading = HEADING.match(stripped)
+        if stripped.startswith(FENCE_MARKERS):
+            height += flush()
+            fence = stripped[:3]
+        elif heading:
+            height += flush()
+            height += metrics.heading_height(len(heading.group(1)), len(stripped) - heading.end())
+        elif stripped.startswith("|"):
+            height += flush()
+            in_table = True
+            if not TABLE_SEPARATOR.match(stripped):
+                height += metrics.table_row_height(stripped.strip("|").split("|"))
+        elif LIST_ITEM.match(stripped):
+            height += flush()
+            paragraph, paragraph_height = len(stripped) + 1, metrics.list_item.height
+        elif stripped:
+            if not paragraph:
+                paragraph_height = metrics.text_height
+            paragraph += len(stripped.lstrip("> ")) + 1
+        else:
+            height += flush()
+
+    height += flush()
+    if in_table:
+        height += metrics.table_space
+    if fence is not None:
+        # Unclosed fence runs to the end of the document
+        block = "\n".join(code)
+        height += metrics.code_height(block)
+        code_blocks.append(len(block))
+
+    return _estimate(height, code_blocks, metrics, highlighted=True)
+
+
+def estimate_document(document: StructuredDocument, template: PDFTemplate) -> RenderEstimate:
+    """
+    Estimates generate_pdf output for an analyzed document. Code blocks
+    are plain Preformatted text there, so there is no highlighting cost.
+    """
+    metrics = PageMetrics.for_template(template)
+    height = metrics.text_height(len(document.title)) if document.title else 0.0
+
+    for block in document.blocks:
+        if block.type == "code":
+            height += metrics.code_height(block.content)
+        else:
+            height += metrics.text_height(len(block.content))
+
+    return _estimate(height, [], metrics, highlighted=False)
+
+
+def combine_estimates(estimates: List[RenderEstimate]) -> RenderEstimate:
+    """
+    Estimate for rendering several documents in one build.
+    """
+    return RenderEstimate(
+        pages=sum(e.pages for e in estimates),
+        seconds=sum(e.seconds for e in estimates),
+        fast_seconds=sum(e.fast_seconds for e in estimates),
+        code_blocks=[n for e in estimates for n in e.code_blocks],
+    )
+
+
+def admit(estimate: RenderEstimate, time_budget: float = RENDER_TIME_BUDGET,
+          page_budget: int = RENDER_PAGE_BUDGET) -> bool:
+    """
+    Applies the render budget. Returns True when the job has to render
+    in fast mode, and raises FileValidationError when even that would
+    exceed the budget.
+    """
+    if estimate.pages > page_budget or estimate.fast_seconds > time_budget:
+        raise FileValidationError(
+            f"{AppErrorCode.RENDER_BUDGET_EXCEEDED.value} (about {math.ceil(estimate.pages)} pages)"
+        )
+
+    if estimate.seconds > time_budget:
+        logger.warning(
+            "Estimated render time %.1fs exceeds budget %.1fs; rendering without highlighting",
+            estimate.seconds, time_budget
+        )
+        return True
+
+    return False
+
+
+def record_estimate(estimate: RenderEstimate, pages: Optional[int], seconds: float, fast: bool):
+    """
+    Adds an estimate and the render it was made for to the current
+    conversion's counts (estimate_pages / estimate_actual_pages and
+    estimate_ms / estimate_actual_ms). The trace carries them back from
+    workers, and METRICS reports the actual-to-estimated ratios, which
+    show how far the coefficients above are off on real traffic.
+    """
+    expected = estimate.fast_seconds if fast else estimate.seconds
+    logger.info(
+        "Render estimate %.1f pages / %.2fs, actual %s pages / %.2fs%s",
+        estimate.pages, expected, pages, seconds, " (fast mode)" if fast else ""
+    )
+    if pages:
+        count("estimate_pages", math.ceil(estimate.pages))
+        count("estimate_actual_pages", pages)
+    count("estimate_ms", round(expected * 1000))
+    count("estimate_actual_ms", round(seconds * 1000))
@@ -0,0 +1,205 @@
+"""
+Sectioned rendering: one large document laid out on several cores.
+
+The source is cut at top-level headings into sections of at least
+SECTION_MIN_CHARS characters. Each section is laid out and rendered to
+PDF in its own worker process, and the section PDFs are joined with
+pdf_merge.concatenate. Every section starts on a new page.
+
+With navigation, sections only collect their headings (bookmarks are
+written as usual); once every section's page count is known the
+contents pages are rendered with the final page numbers, and
+"Page X of Y" is stamped on every page of the joined document.
+"""
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from itertools import repeat
+from typing import List, Tuple
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate
+
+from app.analyzers.document_model import StructuredDocument
+from app.enums.templates import PDFTemplate
+from app.pdf.book import HEADING_LEVELS, Chapter
+from app.pdf.md_complete_conversion import MDCompleteConverter, markdown_parser
+from app.pdf.navigation import FOOTER_FONT, FOOTER_SIZE, NavigationDocTemplate, TocEntry, footer_position
+from app.pdf.pdf_generator import HEADING_TYPES, build_styles, draw_page_border, iter_story
+from app.pdf.pdf_merge import OVERLAY_FONT, concatenate
+from app.templates.pdf_templates import PDF_TEMPLATES
+from app.utils.constants import SECTION_WORKERS
+
+# Smallest section worth a process of its own
+SECTION_MIN_CHARS = 50_000
+
+
+def sections_available(workers: int = SECTION_WORKERS) -> bool:
+    """
+    Whether sections can be rendered in parallel from this process
+    (daemonic processes may not start workers of their own).
+    """
+    return workers > 1 and not multiprocessing.current_process().daemon
+
+
+def _group(sizes: List[int], cuts: List[int], min_chars: int) -> List[int]:
+    """
+    Cut points, from `cuts`, that leave every group at least `min_chars`.
+    """
+    kept, size, previous = [], 0, 0
+    for cut in cuts:
+        size += sum(sizes[previous:cut])
+        previous = cut
+        if size >= min_chars:
+            kept.append(cut)
+            size = 0
+    # A short tail joins the section before it
+    if kept and sum(sizes[kept[-1]:]) < min_chars:
+        kept.pop()
+    return kept
+
+
+def split_markdown(text: str, min_chars: int = SECTION_MIN_CHARS) -> List[str]:
+    """
+    Cuts markdown before top-level (h1) headings. Headings inside code
+    blocks or lists are not cut points.
+    """
+    lines = text.split("\n")
+    cuts = [
+        token.map[0] for token in markdown_parser().parse(text)
+        if token.type == "heading_open" and token.tag == "h1" and token.level == 0 and token.map
+    ]
+    cuts = _group([len(line) + 1 for line in lines], [cut for cut in cuts if cut > 0], min_chars)
+    bounds = [0] + cuts + [len(lines)]
+    return ["\n".join(lines[start:end]) for start, end in zip(bounds, bounds[1:])]
+
+
+def split_document(document: StructuredDocument, min_chars: int = SECTION_MIN_CHARS) -> List[StructuredDocument]:
+    """
+    Cuts an analyzed document before its top-level headings (the highest
+    heading level it uses). The title stays with the first section.
+    """
+    blocks = document.blocks
+    top_level = min((block.type for block in blocks if block.type in HEADING_TYPES), default=None)
+    cuts = [index for index, block in enumerate(blocks) if block.type == top_level and index > 0]
+    cuts = _group([len(block.content) for block in blocks], cuts, min_chars)
+    bounds = [0] + cuts + [len(blocks)]
+    return [
+        StructuredDocument(document.title if start == 0 else "", blocks[start:end])
+        for start, end in zip(bounds, bounds[1:])
+    ]
+
+
+def _no_decoration(c, d):
+    pass
+
+
+def _page_setup(chapter: Chapter, template: PDFTemplate):
+    """
+    (margin, TOC font, TOC font size, page callback) as the single-pass
+    renderer uses them for this kind of chapter.
+    """
+    if isinstance(chapter, str):
+        converter = MDCompleteConverter(template)
+        # MDCompleteConverter.convert keeps NavigationDocTemplate's font size
+        return converter.margin, converter.body_font, 11, _no_decoration
+
+    cfg = PDF_TEMPLATES[template]
+
+    def on_page(c, d):
+        if cfg["page"].get("border"):
+            draw_page_border(c, d, cfg["page"].get("border_width", 1))
+
+    return cfg["page"]["margin"], cfg["body_style"]["font"], cfg["body_style"]["size"], on_page
+
+
+def _story(chapter: Chapter, template: PDFTemplate, fast: bool) -> list:
+    if isinstance(chapter, str):
+        converter = MDCompleteConverter(template)
+        converter.fast = fast
+        return converter.build_story(chapter)
+
+    cfg = PDF_TEMPLATES[template]
+    margin = cfg["page"]["margin"]
+    return list(iter_story(chapter, build_styles(cfg), A4[0] - 2 * margin, A4[1] - 2 * margin))
+
+
+def _doc_kwargs(margin: float) -> dict:
+    return dict(pagesize=A4, leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin)
+
+
+def _render_section(chapter: Chapter, template: PDFTemplate, fast: bool,
+                    navigation: bool) -> Tuple[bytes, List[TocEntry], int]:
+    """
+    Worker: renders one section. Returns (pdf, headings, page count).
+    """
+    margin, font, font_size, on_page = _page_setup(chapter, template)
+    story = _story(chapter, template, fast)
+    output = io.BytesIO()
+
+    if navigation:
+        doc = NavigationDocTemplate(
+            output, heading_levels=HEADING_LEVELS, expected_headings=0,
+            font=font, font_size=font_size, footers=False, **_doc_kwargs(margin)
+        )
+    else:
+        doc = SimpleDocTemplate(output, **_doc_kwargs(margin))
+    doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+
+    return output.getvalue(), doc.entries if navigation else [], doc.page
+
+
+def _contents_pdf(entries: List[TocEntry], chapter: Chapter, template: PDFTemplate) -> Tuple[bytes, int]:
+    """
+    Renders the contents pages for `entries`, laid out like `chapter`.
+    Entry page numbers count from the first page after the contents.
+    Returns (pdf, pages).
+    """
+    margin, font, font_size, on_page = _page_setup(chapter, template)
+    output = io.BytesIO()
+    doc = NavigationDocTemplate(
+        output, heading_levels={}, expected_headings=len(entries),
+        font=font, font_size=font_size, footers=False, **_doc_kwargs(margin)
+    )
+    if not doc.toc_pages:
+        return b"", 0
+
+    doc.entries = [replace(entry, page=entry.page + doc.toc_pages) for entry in entries]
+    doc.build([], onFirstPage=on_page, onLaterPages=on_page)
+    return output.getvalue(), doc.toc_pages
+
+
+def _footer(margin: float):
+    def overlay(page: int, total: int) -> bytes:
+        x, y = footer_position(f"Page {page} of ", A4[0], margin)
+        return b"BT /%s %g Tf %.2f %.2f Td (Page %d of %d) Tj ET\n" % (
+            OVERLAY_FONT.encode(), FOOTER_SIZE, x, y, page, total
+        )
+    return overlay
+
+
+def render_sections(sections: List[Chapter], template: PDFTemplate, output, workers: int = SECTION_WORKERS,
+                    fast: bool = False, navigation: bool = False) -> int:
+    """
+    Renders `sections` (from split_markdown / split_document) in parallel
+    and joins them into one PDF at `output`. Returns the page count.
+    """
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(sections)))) as executor:
+        results = list(executor.map(_render_section, sections, repeat(template), repeat(fast), repeat(navigation)))
+
+    documents = [pdf for pdf, _entries, _pages in results]
+    if not navigation:
+        return concatenate(documents, output)
+
+    entries, offset = [], 0
+    for _pdf, section_entries, pages in results:
+        entries += [replace(entry, page=entry.page + offset) for entry in section_entries]
+        offset += pages
+
+    contents, contents_pages = _contents_pdf(entries, sections[0], template)
+    if contents_pages:
+        documents.insert(0, contents)
+
+    margin = _page_setup(sections[0], template)[0]
+    return concatenate(documents, output, overlay=_footer(margin), overlay_font=FOOTER_FONT)
@@ -0,0 +1,16 @@
+from .conversion import (
+    STAGES,
+    ConversionOptions,
+    LoadedSource,
+    UploadedFile,
+    load_source,
+    render_source,
+    render_source_html,
+    write_output,
+    convert_upload,
+    convert_stream,
+    convert_bytes,
+)
+from .batch import BatchResult, zip_as_completed
+from .book import load_chapters, write_book, convert_book
+from .registry import register_input, register_output, warm_up
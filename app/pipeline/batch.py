@@ -0,0 +1,121 @@
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from app.enums.error_codes import AppErrorCode
+from app.exceptions.custom_exceptions import (
+    ConversionAbortedError,
+    FileValidationError,
+    ParsingError,
+    ServiceBusyError,
+)
+
+# Errors reported per file with their own message; anything else is
+# reported as a generic parsing error
+REPORTED_ERRORS = (FileValidationError, ParsingError, ConversionAbortedError, ServiceBusyError)
+
+ERRORS_FILENAME = "ERRORS.txt"
+
+# Seconds between attempts to submit files while the service is busy
+BUSY_RETRY_SECONDS = 0.5
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of one file in a batch: the name it has in the ZIP, or an error.
+    """
+    source: str
+    archive_name: Optional[str] = None
+    error: Optional[str] = None
+
+
+def unique_name(name: str, used: set) -> str:
+    """
+    Returns `name`, or 'stem (2).ext', 'stem (3).ext', ... if it is taken.
+    """
+    stem, extension = os.path.splitext(name)
+    candidate, counter = name, 2
+    while candidate in used:
+        candidate = f"{stem} ({counter}){extension}"
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+def error_message(error: BaseException) -> str:
+    if isinstance(error, REPORTED_ERRORS):
+        return str(error)
+    return AppErrorCode.PARSING_ERROR.value
+
+
+def zip_as_completed(jobs: Dict[Future, str], zip_path: str,
+                     failed: Iterable[Tuple[str, str]] = (),
+                     waiting: Iterable[Tuple[str, Callable[[], Future]]] = ()) -> Iterator[BatchResult]:
+    """
+    Writes each job's output file into a ZIP at `zip_path` as soon as the
+    job finishes, yielding a BatchResult per file. `jobs` maps futures
+    (whose result is an output path) to source file names; `failed` holds
+    (source, error) for files that never became a job.
+
+    `waiting` holds (source, submit) for files not submitted yet. submit()
+    returns the job's future or raises ServiceBusyError while the service
+    is at capacity; such files are retried whenever a job finishes, and
+    every BUSY_RETRY_SECONDS otherwise, so a batch larger than a bounded
+    lane waits for room instead of failing.
+
+    A failed file does not stop the batch; all errors are listed in
+    ERRORS.txt inside the archive. The ZIP is written under a temporary
+    name and renamed into place when complete.
+    """
+    partial_path = f"{zip_path}.part"
+    used, errors = {ERRORS_FILENAME}, []
+    jobs, waiting = dict(jobs), list(waiting)
+
+    def submit_waiting():
+        still_waiting = []
+        for source, submit in waiting:
+            try:
+                jobs[submit()] = source
+            except ServiceBusyError:
+                still_waiting.append((source, submit))
+            except Exception as e:
+                errors.append(f"{source}: {error_message(e)}")
+                yield BatchResult(source, error=error_message(e))
+        waiting[:] = still_waiting
+
+    # Outputs are PDF/DOCX, which are compressed already
+    with zipfile.ZipFile(partial_path, "w", zipfile.ZIP_STORED) as archive:
+        for source, message in failed:
+            errors.append(f"{source}: {message}")
+            yield BatchResult(source, error=message)
+
+        while jobs or waiting:
+            yield from submit_waiting()
+            if not jobs:
+                if waiting:
+                    # Capacity is held by other requests
+                    time.sleep(BUSY_RETRY_SECONDS)
+                continue
+
+            done, _ = wait(jobs, timeout=BUSY_RETRY_SECONDS if waiting else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                source = jobs.pop(future)
+                try:
+                    output_path = future.result()
+                except Exception as e:
+                    errors.append(f"{source}: {error_message(e)}")
+                    yield BatchResult(source, error=error_message(e))
+                    continue
+
+                archive_name = unique_name(os.path.basename(output_path), used)
+                archive.write(output_path, archive_name)
+                yield BatchResult(source, archive_name=archive_name)
+
+        if errors:
+            archive.writestr(ERRORS_FILENAME, "\n".join(errors) + "\n")
+
+    os.replace(partial_path, zip_path)
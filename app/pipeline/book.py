@@ -0,0 +1,84 @@
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from app.pipeline.conversion import ConversionOptions, LoadedSource, UploadedFile, load_source
+from app.utils.constants import RENDER_WORKERS
+from app.utils.metrics import conversion, count, span
+
+
+def _load_chapter(file: UploadedFile, options: ConversionOptions) -> LoadedSource:
+    return load_source(file, options)
+
+
+def load_chapters(files, options: ConversionOptions, workers: int = RENDER_WORKERS) -> List[LoadedSource]:
+    """
+    Validates and parses every input, in parallel worker processes when
+    `workers` > 0. Returns the sources in input order; the first failing
+    input raises its error.
+    """
+    uploads = [UploadedFile(getattr(f, "name", f), getattr(f, "data", None)) for f in files]
+
+    if workers <= 0 or len(uploads) < 2:
+        return [_load_chapter(upload, options) for upload in uploads]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(uploads))) as executor:
+        return list(executor.map(_load_chapter, uploads, [options] * len(uploads)))
+
+
+def write_book(sources: List[LoadedSource], options: ConversionOptions, output) -> int:
+    """
+    Renders loaded sources as the chapters of one PDF and returns its
+    page count. The whole book is checked against the render budget.
+    """
+    # Imported on first use, like the registered renderers
+    from app.pdf.book import generate_book
+    from app.pdf.render_budget import admit, combine_estimates, estimate_document, estimate_markdown, record_estimate
+
+    estimate = combine_estimates([
+        estimate_markdown(source.markdown, options.template) if source.markdown is not None
+        else estimate_document(source.document, options.template)
+        for source in sources
+    ])
+    fast = admit(estimate)
+
+    chapters = [source.markdown if source.markdown is not None else source.document for source in sources]
+    started = time.perf_counter()
+    with span("layout"):
+        pages = generate_book(chapters, options.template, output, fast=fast, navigation=options.navigation)
+    record_estimate(estimate, pages, time.perf_counter() - started, fast)
+    count("pages", pages)
+    return pages
+
+
+def convert_book(files, options: ConversionOptions, output_dir: str, name: str = "book",
+                 workers: int = RENDER_WORKERS, on_stage=None) -> str:
+    """
+    Binds several uploads, in the given order, into `output_dir/<name>.pdf`
+    and returns its path. Output is always PDF. `on_stage` is called with
+    "parse", "render" and "save" as the book gets there.
+    """
+    on_stage = on_stage or (lambda _stage: None)
+    with conversion(input="book", output="PDF"):
+        on_stage("parse")
+        sources = load_chapters(files, options, workers)
+
+        on_stage("render")
+        output_path = os.path.join(output_dir, f"{name}.pdf")
+        partial_path = f"{output_path}.part"
+        if options.linearize:
+            from app.pdf.linearize import linearize
+
+            rendered = io.BytesIO()
+            write_book(sources, options, rendered)
+            with span("save"), open(partial_path, "wb") as f:
+                f.write(linearize(rendered.getvalue()))
+        else:
+            write_book(sources, options, partial_path)
+        on_stage("save")
+        with span("save"):
+            os.replace(partial_path, output_path)
+        count("output_bytes", os.path.getsize(output_path))
+    return output_path
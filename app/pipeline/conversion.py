@@ -0,0 +1,208 @@
+import io
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional, Union
+
+from app.validators.file_validator import validate_file
+from app.analyzers.document_model import StructuredDocument
+from app.enums.templates import PDFTemplate
+from app.enums.file_types import SupportedFileType
+from app.pipeline.registry import LazyEntry, input_format, output_format
+from app.utils.input_stream import source_name, source_size
+from app.utils.constants import PROFILE_DIR
+from app.utils.metrics import conversion, count, label, span
+from app.utils.profiling import profile_name, profiling
+
+
+# Structure options for types that honour them (see InputFormat)
+_BULLETIZE = LazyEntry("app.analyzers.structure_scanner:bulletize_text")
+_SCAN_STRUCTURE = LazyEntry("app.analyzers.structure_scanner:scan_structure")
+
+# Pipeline stages, in order, as reported to `on_stage` callbacks
+STAGES = ("validate", "parse", "analyze", "render", "save")
+
+
+def _notify(on_stage: Optional[Callable[[str], None]], stage: str):
+    if on_stage is not None:
+        on_stage(stage)
+
+
+def profile_stem(file) -> str:
+    """
+    Name of an upload's profile (see app.utils.profiling): its file stem.
+    """
+    name = getattr(file, "name", None)
+    return os.path.splitext(source_name(name))[0] if name else "conversion"
+
+
+@dataclass
+class UploadedFile:
+    """
+    Minimal stand-in for Gradio's upload object: a path exposed as `.name`.
+    With `data` set the content is read from memory and `name` only
+    supplies the file name (and so the type).
+    """
+    name: str
+    data: Optional[bytes] = None
+
+
+@dataclass
+class ConversionOptions:
+    template: PDFTemplate = PDFTemplate.CLASSIC
+    output_format: str = "PDF"
+    use_filename_as_heading: bool = True
+    auto_structure: bool = False
+    bulletize: bool = False
+    navigation: bool = False
+    linearize: bool = False
+    # cProfile the conversion (see app.utils.profiling)
+    profile: bool = False
+
+
+@dataclass
+class LoadedSource:
+    """
+    Parsed upload, ready to render. Markdown and notebooks keep their
+    markdown text; every other format is analyzed into a StructuredDocument.
+    """
+    file_type: SupportedFileType
+    name: str
+    markdown: Optional[str] = None
+    document: Optional[StructuredDocument] = None
+
+    @property
+    def stem(self) -> str:
+        return os.path.splitext(self.name)[0]
+
+
+def load_source(file, options: ConversionOptions, on_stage=None) -> LoadedSource:
+    """
+    Validates, parses and analyzes an upload.
+    """
+    _notify(on_stage, "validate")
+    with span("validate"):
+        file_type = validate_file(file)
+        name = source_name(file.name)
+    label(input=file_type.value)
+    count("input_bytes", source_size(file))
+
+    _notify(on_stage, "parse")
+    entry = input_format(file_type)
+    with span("parse"):
+        content = entry.parser(file)
+    _notify(on_stage, "analyze")
+
+    # --- MARKDOWN / IPYNB: analyzed by the renderers themselves ---
+    if entry.analyzer is None:
+        # Apply heading ONLY if requested
+        if options.use_filename_as_heading and not content.lstrip().startswith("#"):
+            title = os.path.splitext(name)[0].replace("_", " ").title()
+            content = f"# {title}\n\n{content}"
+
+        return LoadedSource(file_type, name, markdown=content)
+
+    # --- OTHER FORMATS ---
+    with span("analyze"):
+        if entry.structure_options and options.bulletize:
+            document = _BULLETIZE(content, name)
+        elif entry.structure_options and options.auto_structure:
+            document = _SCAN_STRUCTURE(content, name)
+        else:
+            document = entry.analyzer(content, name)
+    count("blocks", len(document.blocks))
+
+    # Remove title from StructuredDocument if toggle is OFF
+    if not options.use_filename_as_heading:
+        document.title = ""
+
+    return LoadedSource(file_type, name, document=document)
+
+
+def write_output(source: LoadedSource, options: ConversionOptions, output: Union[str, BinaryIO],
+                 max_pages: int = None):
+    """
+    Renders a loaded source to `output`, a path or any writable binary
+    stream, with the renderer registered for `options.output_format`.
+    `max_pages` limits PDF output to its first pages (preview).
+
+    Full PDF renders are checked against the render budget first (see
+    app.pipeline.renderers.render_pdf).
+    """
+    output_format(options.output_format).renderer(source, options, output, max_pages=max_pages)
+
+
+def render_source(source: LoadedSource, options: ConversionOptions, output_dir: str,
+                  max_pages: int = None, on_stage=None) -> str:
+    """
+    Renders a loaded source into `output_dir` and returns the output path.
+    `max_pages` limits PDF output to its first pages (preview).
+
+    The renderer writes to a temporary name that is renamed into place,
+    so a partially written file is never visible under the final name.
+    """
+    extension = output_format(options.output_format).extension
+    output_path = os.path.join(output_dir, f"{source.stem}.{extension}")
+    partial_path = f"{output_path}.part"
+
+    _notify(on_stage, "render")
+    write_output(source, options, partial_path, max_pages=max_pages)
+
+    _notify(on_stage, "save")
+    with span("save"):
+        os.replace(partial_path, output_path)
+    if not max_pages:
+        count("output_bytes", os.path.getsize(output_path))
+    return output_path
+
+
+def render_source_html(source: LoadedSource, options: ConversionOptions) -> str:
+    """
+    Renders a loaded source as a styled HTML preview, without layout.
+    """
+    from app.html.html_preview import render_document_html, render_markdown_html
+
+    if source.markdown is not None:
+        return render_markdown_html(source.markdown, options.template)
+    return render_document_html(source.document, options.template)
+
+
+def convert_upload(file, options: ConversionOptions, output_dir: str, on_stage=None) -> str:
+    """
+    Runs the full conversion of one upload and returns the output path.
+    `on_stage` is called with each name in STAGES as the stage starts.
+    The conversion is traced in app.utils.metrics; when profiled, the
+    profile is written next to the output.
+    """
+    with conversion(output=options.output_format):
+        with profiling(output_dir, profile_stem(file), options.profile):
+            source = load_source(file, options, on_stage=on_stage)
+            return render_source(source, options, output_dir, on_stage=on_stage)
+
+
+def convert_stream(data: bytes, filename: str, options: ConversionOptions, output: BinaryIO,
+                   on_stage=None):
+    """
+    Converts an upload held in memory and writes the result to `output`,
+    any writable binary stream. Nothing touches the disk; `filename`
+    only decides the input type and the default title. When profiled,
+    the profile is written to PROFILE_DIR.
+    """
+    stem = profile_name(profile_stem(UploadedFile(filename)))
+    with conversion(output=options.output_format):
+        with profiling(PROFILE_DIR, stem, options.profile):
+            source = load_source(UploadedFile(filename, data), options, on_stage=on_stage)
+            _notify(on_stage, "render")
+            write_output(source, options, output)
+            _notify(on_stage, "save")
+
+
+def convert_bytes(data: bytes, filename: str, options: ConversionOptions = None) -> bytes:
+    """
+    Converts an upload held in memory and returns the PDF/DOCX bytes.
+    """
+    options = options or ConversionOptions()
+    output = io.BytesIO()
+    with conversion(output=options.output_format):
+        convert_stream(data, filename, options, output)
+        count("output_bytes", output.tell())
+    return output.getvalue()
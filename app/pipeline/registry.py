@@ -0,0 +1,130 @@
+"""
+Registry of the backends behind each input type and output format.
+
+Entries name their entry points as "module:attribute" strings that are
+imported on first use. A process only loads the libraries (python-docx,
+ReportLab, BeautifulSoup, markdown-it, Pygments) for the formats it
+actually converts. A new format is added by registering it here, without
+touching the conversion pipeline:
+
+    register_input(SupportedFileType.RST, "app.parsers.rst_parser:parse_rst",
+                   analyzer=PLAINTEXT_ANALYZER)
+"""
+import importlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from app.enums.file_types import SupportedFileType
+from app.utils.constants import WARM_UP_BACKENDS
+
+
+class LazyEntry:
+    """
+    A callable "module:attribute" reference, imported on first call.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._target = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    module, _, attribute = self.path.partition(":")
+                    self._target = getattr(importlib.import_module(module), attribute)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyEntry({self.path!r})"
+
+
+@dataclass(frozen=True)
+class InputFormat:
+    """
+    How one input type is read. `parser(file)` returns text; without an
+    `analyzer` the text is markdown, handed to the renderers as is.
+    Otherwise `analyzer(text, name)` turns it into a StructuredDocument.
+    `structure_options` marks types that honour auto_structure/bulletize.
+    """
+    parser: LazyEntry
+    analyzer: Optional[LazyEntry] = None
+    structure_options: bool = False
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    """
+    How one output format is written. `renderer(source, options, output,
+    max_pages=None)` writes a LoadedSource to a path or binary stream;
+    `max_pages` asks for a preview of the first pages.
+    """
+    renderer: LazyEntry
+    extension: str
+
+
+PLAINTEXT_ANALYZER = "app.analyzers.plaintext_analyzer:analyze_plaintext"
+
+INPUT_FORMATS: Dict[SupportedFileType, InputFormat] = {}
+OUTPUT_FORMATS: Dict[str, OutputFormat] = {}
+
+
+def register_input(file_type: SupportedFileType, parser: str, analyzer: Optional[str] = None,
+                   structure_options: bool = False):
+    INPUT_FORMATS[file_type] = InputFormat(
+        LazyEntry(parser), LazyEntry(analyzer) if analyzer else None, structure_options
+    )
+
+
+def register_output(name: str, renderer: str, extension: str):
+    OUTPUT_FORMATS[name] = OutputFormat(LazyEntry(renderer), extension)
+
+
+def input_format(file_type: SupportedFileType) -> InputFormat:
+    # BIN is the catch-all the validator falls back to
+    return INPUT_FORMATS.get(file_type, INPUT_FORMATS[SupportedFileType.BIN])
+
+
+def output_format(name: str) -> OutputFormat:
+    return OUTPUT_FORMATS[name]
+
+
+register_input(SupportedFileType.MD, "app.parsers.md_parser:parse_md")
+register_input(SupportedFileType.IPYNB, "app.parsers.ipynb_parser:parse_ipynb")
+register_input(SupportedFileType.TXT, "app.parsers.txt_parser:parse_txt", PLAINTEXT_ANALYZER, structure_options=True)
+register_input(SupportedFileType.DOCX, "app.parsers.docx_parser:parse_docx", PLAINTEXT_ANALYZER)
+register_input(SupportedFileType.CSV, "app.parsers.csv_parser:parse_csv", PLAINTEXT_ANALYZER)
+register_input(SupportedFileType.HTML, "app.parsers.html_parser:parse_html", PLAINTEXT_ANALYZER)
+register_input(SupportedFileType.BIN, "app.parsers.bin_parser:parse_bin", PLAINTEXT_ANALYZER)
+
+register_output("PDF", "app.pipeline.renderers:render_pdf", "pdf")
+register_output("DOCX", "app.pipeline.renderers:render_docx", "docx")
+
+def warm_up(backends: Iterable[str] = None):
+    """
+    Imports the backends of the named input types and output formats
+    (e.g. ["md", "pdf"]; "all" for every registered one), so the first
+    conversion in a process does not pay for them. Defaults to
+    CONVERTER_WARM_UP. Unknown names are ignored.
+    """
+    if backends is None:
+        backends = [name for name in WARM_UP_BACKENDS.split(",") if name.strip()]
+    names = {name.strip().lower() for name in backends}
+    everything = "all" in names
+
+    for file_type, entry in INPUT_FORMATS.items():
+        if everything or file_type.value in names:
+            entry.parser.resolve()
+            if entry.analyzer is not None:
+                entry.analyzer.resolve()
+
+    for name, entry in OUTPUT_FORMATS.items():
+        if everything or name.lower() in names:
+            entry.renderer.resolve()
+            # Pygments loads its lexers on first lookup
+            importlib.import_module("pygments.lexers").get_lexer_by_name("python")
@@ -0,0 +1,91 @@
+"""
+Output renderers registered in app.pipeline.registry. This module, and
+with it ReportLab, python-docx and Pygments, is imported on the first
+conversion that needs it.
+"""
+import io
+import time
+
+from app.docx.docx_generator import generate_docx
+from app.docx.md_docx_converter import convert_md_to_docx
+from app.pdf.linearize import linearize
+from app.pdf.md_complete_conversion import MDCompleteConverter
+from app.pdf.pdf_generator import generate_pdf
+from app.pdf.render_budget import admit, estimate_document, estimate_markdown, record_estimate
+from app.pdf.sectioned import render_sections, sections_available, split_document, split_markdown
+from app.utils.constants import SECTIONED_RENDER_MIN_PAGES
+from app.utils.metrics import count, span
+
+
+def _render_pdf(source, options, output, max_pages: int = None, fast: bool = False, sectioned: bool = False) -> int:
+    if sectioned:
+        if source.markdown is not None:
+            sections = split_markdown(source.markdown)
+        else:
+            sections = split_document(source.document)
+        if len(sections) > 1:
+            return render_sections(sections, options.template, output, fast=fast, navigation=options.navigation)
+
+    if source.markdown is not None:
+        return MDCompleteConverter(options.template).convert(
+            source.markdown, output, max_pages=max_pages, fast=fast, navigation=options.navigation
+        )
+    return generate_pdf(
+        document=source.document,
+        template=options.template,
+        output_path=output,
+        max_pages=max_pages,
+        navigation=options.navigation
+    )
+
+
+def render_pdf(source, options, output, max_pages: int = None):
+    """
+    Full PDF renders are checked against the render budget first: jobs
+    estimated over it render in fast mode or are rejected with
+    FileValidationError. Jobs of SECTIONED_RENDER_MIN_PAGES or more are
+    rendered section by section in parallel. With `options.linearize`
+    the finished PDF is rewritten for fast web view.
+    """
+    if max_pages:
+        # Previews are bounded by max_pages and skip the budget
+        with span("layout"):
+            return _render_pdf(source, options, output, max_pages=max_pages)
+
+    if source.markdown is not None:
+        estimate = estimate_markdown(source.markdown, options.template)
+    else:
+        estimate = estimate_document(source.document, options.template)
+    fast = admit(estimate)
+    sectioned = estimate.pages >= SECTIONED_RENDER_MIN_PAGES and sections_available()
+
+    started = time.perf_counter()
+    rendered = io.BytesIO() if options.linearize else output
+    with span("layout"):
+        pages = _render_pdf(source, options, rendered, fast=fast, sectioned=sectioned)
+    record_estimate(estimate, pages, time.perf_counter() - started, fast)
+    count("pages", pages)
+
+    if options.linearize:
+        with span("save"):
+            _write_bytes(linearize(rendered.getvalue()), output)
+    return pages
+
+
+def render_docx(source, options, output, max_pages: int = None):
+    """
+    DOCX has no pages; `max_pages` is ignored.
+    """
+    with span("layout"):
+        if source.markdown is not None:
+            convert_md_to_docx(source.markdown, output, options.template)
+        else:
+            generate_docx(source.document, options.template, output)
+
+
+def _write_bytes(data: bytes, output):
+    if isinstance(output, str):
+        with open(output, "wb") as f:
+            f.write(data)
+    else:
+        output.write(data)
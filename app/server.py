@@ -0,0 +1,337 @@
+"""
+Minimal HTTP service for conversions, without the Gradio UI.
+
+    POST /convert?filename=notes.md[&template=Modern&format=DOCX&...]
+        Request body: the raw file. Response: the converted document,
+        streamed with chunked transfer encoding.
+    GET /health
+        JSON with the number of conversions in flight.
+    GET /metrics, GET /metrics.json
+        Conversion counts and per-stage timings by format, in the
+        Prometheus text format or as JSON (see app.utils.metrics).
+
+Built on asyncio streams only. Conversions run in a RenderPool; the
+number in flight and the request body size are bounded (429 / 413).
+
+    python -m app.server --host 0.0.0.0 --port 8080
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from http import HTTPStatus
+from urllib.parse import parse_qs, quote, urlsplit
+
+from app.enums.error_codes import AppErrorCode
+from app.enums.templates import PDFTemplate
+from app.exceptions.custom_exceptions import (
+    ConversionAbortedError,
+    FileValidationError,
+    ParsingError,
+    ServiceBusyError,
+)
+from app.pipeline.conversion import ConversionOptions
+from app.utils.constants import MAX_FILE_SIZE, RENDER_WORKERS, SANDBOX_ENABLED, SERVER_MAX_IN_FLIGHT
+from app.utils.metrics import METRICS
+from app.workers.render_pool import RenderPool
+from app.workers.sandbox import SandboxLimits
+
+# Response bodies are written in chunks of this size, waiting for the
+# client to drain each one
+CHUNK_SIZE = 64 * 1024
+
+# Limits on the request line and headers
+MAX_HEADER_SIZE = 16 * 1024
+HEADER_TIMEOUT_SECONDS = 30
+BODY_TIMEOUT_SECONDS = 120
+
+CONTENT_TYPES = {
+    "PDF": "application/pdf",
+    "DOCX": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+# Status for each error raised by the pipeline
+ERROR_STATUS = {
+    FileValidationError: HTTPStatus.BAD_REQUEST,
+    ParsingError: HTTPStatus.UNPROCESSABLE_ENTITY,
+    ServiceBusyError: HTTPStatus.TOO_MANY_REQUESTS,
+    ConversionAbortedError: HTTPStatus.SERVICE_UNAVAILABLE,
+}
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str = None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+def error_status(error: BaseException) -> HTTPStatus:
+    """
+    Status for an error raised by a conversion: that of its nearest class
+    in ERROR_STATUS, or 500 for anything unexpected.
+    """
+    for cls in type(error).__mro__:
+        if cls in ERROR_STATUS:
+            return ERROR_STATUS[cls]
+    return HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def content_disposition(filename: str) -> str:
+    """
+    Attachment header for `filename`, which comes from the request: control
+    characters (CR/LF would split the response) are dropped, and names
+    beyond ASCII get an RFC 5987 filename* next to an ASCII fallback.
+    """
+    name = "".join(c for c in filename if c.isprintable()).strip() or "document"
+    fallback = "".join(c if c.isascii() and c not in '"\\' else "_" for c in name)
+    if fallback == name:
+        return f'attachment; filename="{name}"'
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+
+def _flag(query: dict, name: str, default: bool) -> bool:
+    if name not in query:
+        return default
+    return query[name][-1].lower() in TRUE_VALUES
+
+
+def options_from_query(query: dict) -> ConversionOptions:
+    """
+    Builds ConversionOptions from query parameters: template, format,
+    use_filename_as_heading, auto_structure, bulletize, navigation and
+    linearize.
+    """
+    defaults = ConversionOptions()
+    output_format = query.get("format", [defaults.output_format])[-1].upper()
+    if output_format not in CONTENT_TYPES:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "format must be PDF or DOCX")
+
+    try:
+        template = PDFTemplate(query.get("template", [defaults.template.value])[-1])
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Unknown template")
+
+    return ConversionOptions(
+        template=template,
+        output_format=output_format,
+        use_filename_as_heading=_flag(query, "use_filename_as_heading", defaults.use_filename_as_heading),
+        auto_structure=_flag(query, "auto_structure", defaults.auto_structure),
+        bulletize=_flag(query, "bulletize", defaults.bulletize),
+        navigation=_flag(query, "navigation", defaults.navigation),
+        linearize=_flag(query, "linearize", defaults.linearize),
+    )
+
+
+async def _read_head(reader: asyncio.StreamReader):
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), HEADER_TIMEOUT_SECONDS)
+    except asyncio.LimitOverrunError:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST)
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST)
+
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return method.upper(), target, headers
+
+
+async def _write_head(writer: asyncio.StreamWriter, status: HTTPStatus, headers: dict):
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append("Connection: close")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+
+
+async def _write_json(writer: asyncio.StreamWriter, status: HTTPStatus, payload: dict, headers: dict = None):
+    body = json.dumps(payload).encode()
+    await _write_head(writer, status, {
+        "Content-Type": "application/json",
+        "Content-Length": len(body),
+        **(headers or {}),
+    })
+    writer.write(body)
+    await writer.drain()
+
+
+async def _write_chunked(writer: asyncio.StreamWriter, data: bytes):
+    view = memoryview(data)
+    for start in range(0, len(view), CHUNK_SIZE):
+        chunk = view[start:start + CHUNK_SIZE]
+        writer.write(b"%x\r\n" % len(chunk))
+        writer.write(chunk)
+        writer.write(b"\r\n")
+        await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+class ConversionServer:
+    """
+    asyncio HTTP server dispatching conversions to a RenderPool.
+    """
+
+    def __init__(self, pool: RenderPool = None, max_in_flight: int = SERVER_MAX_IN_FLIGHT,
+                 max_body: int = MAX_FILE_SIZE):
+        self.pool = pool or RenderPool(RENDER_WORKERS, sandbox=SandboxLimits() if SANDBOX_ENABLED else None)
+        self.max_in_flight = max_in_flight
+        self.max_body = max_body
+        self.in_flight = 0
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080):
+        self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_HEADER_SIZE)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, target, headers = await _read_head(reader)
+            url = urlsplit(target)
+
+            if url.path == "/health":
+                if method != "GET":
+                    raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+                await self._health(writer)
+            elif url.path in ("/metrics", "/metrics.json"):
+                if method != "GET":
+                    raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+                await self._metrics(writer, as_json=url.path.endswith(".json"))
+            elif url.path == "/convert":
+                if method != "POST":
+                    raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+                await self._convert(reader, writer, parse_qs(url.query), headers)
+            else:
+                raise HTTPError(HTTPStatus.NOT_FOUND)
+
+        except HTTPError as e:
+            extra = {"Retry-After": 1} if e.status == HTTPStatus.TOO_MANY_REQUESTS else None
+            try:
+                await _write_json(writer, e.status, {"error": str(e)}, extra)
+            except ConnectionError:
+                pass
+        except ConnectionError:
+            # Client went away; nothing left to answer
+            pass
+        except Exception:
+            logger.exception("Request failed")
+            status = HTTPStatus.INTERNAL_SERVER_ERROR
+            try:
+                await _write_json(writer, status, {"error": status.phrase})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _health(self, writer):
+        await _write_json(writer, HTTPStatus.OK, {
+            "status": "ok",
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "workers": self.pool.workers,
+        })
+
+    async def _metrics(self, writer, as_json: bool):
+        if as_json:
+            await _write_json(writer, HTTPStatus.OK, METRICS.snapshot())
+            return
+        body = METRICS.prometheus_text().encode()
+        await _write_head(writer, HTTPStatus.OK, {
+            "Content-Type": "text/plain; version=0.0.4; charset=utf-8",
+            "Content-Length": len(body),
+        })
+        writer.write(body)
+        await writer.drain()
+
+    async def _read_body(self, reader, headers) -> bytes:
+        if "content-length" not in headers:
+            raise HTTPError(HTTPStatus.LENGTH_REQUIRED)
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+
+        # Checked before reading, so oversized bodies are never buffered
+        if length > self.max_body:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+        try:
+            return await asyncio.wait_for(reader.readexactly(length), BODY_TIMEOUT_SECONDS)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Incomplete request body")
+
+    async def _convert(self, reader, writer, query, headers):
+        filename = query.get("filename", [""])[-1]
+        if not filename:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "filename query parameter is required")
+        options = options_from_query(query)
+
+        if self.in_flight >= self.max_in_flight:
+            raise HTTPError(HTTPStatus.TOO_MANY_REQUESTS, AppErrorCode.SERVICE_BUSY.value)
+
+        self.in_flight += 1
+        try:
+            data = await self._read_body(reader, headers)
+            try:
+                result = await asyncio.wrap_future(self.pool.submit_bytes(data, filename, options))
+            except tuple(ERROR_STATUS) as e:
+                raise HTTPError(error_status(e), str(e))
+            except Exception:
+                # Anything else a parser or renderer raises is reported the
+                # way batches report it (see app.pipeline.batch.error_message)
+                logger.exception("Conversion of %s failed", filename)
+                raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, AppErrorCode.PARSING_ERROR.value)
+        finally:
+            self.in_flight -= 1
+
+        stem = os.path.splitext(os.path.basename(filename))[0] or "document"
+        extension = options.output_format.lower()
+        await _write_head(writer, HTTPStatus.OK, {
+            "Content-Type": CONTENT_TYPES[options.output_format],
+            "Content-Disposition": content_disposition(f"{stem}.{extension}"),
+            "Transfer-Encoding": "chunked",
+        })
+        await _write_chunked(writer, result)
+
+
+async def serve(host: str, port: int):
+    server = ConversionServer()
+    server.pool.warm_up()
+    host, port = await server.start(host, port)
+    print(f"Serving conversions on http://{host}:{port}")
+    await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP conversion service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from .output_store import OutputStore, atomic_write
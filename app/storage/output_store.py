@@ -0,0 +1,166 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import List, Tuple
+
+from app.utils.constants import OUTPUT_ROOT, OUTPUT_TTL_SECONDS, OUTPUT_QUOTA_BYTES, OUTPUT_SWEEP_SECONDS
+
+# Job directories younger than this are never evicted for quota, so a
+# conversion still writing its output keeps its directory
+MIN_AGE_SECONDS = 300
+
+# Job directories are named by new_job_dir; anything else under the root
+# (such as the default PROFILE_DIR) is not the sweeper's to evict
+JOB_DIR_NAME = re.compile(r"[0-9a-f]{32}")
+
+
+def _directory_usage(path: str) -> Tuple[int, int, float]:
+    """
+    (files, bytes, newest mtime) of everything under `path`.
+    """
+    files, size, newest = 0, 0, os.path.getmtime(path)
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                stat = os.stat(os.path.join(dirpath, filename))
+            except OSError:
+                continue
+            files += 1
+            size += stat.st_size
+            newest = max(newest, stat.st_mtime)
+    return files, size, newest
+
+
+def atomic_write(path: str, data: bytes):
+    """
+    Writes `data` to a temporary file next to `path` and renames it into
+    place, so readers never see a partial file.
+    """
+    fd, partial_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+
+class OutputStore:
+    """
+    Single root for conversion outputs. Each job writes into its own
+    directory; a background thread evicts job directories older than
+    `ttl` and, while the store is over `quota_bytes`, the oldest ones.
+    Other directories under the root are left alone.
+    """
+
+    def __init__(self, root: str = OUTPUT_ROOT, ttl: float = OUTPUT_TTL_SECONDS,
+                 quota_bytes: int = OUTPUT_QUOTA_BYTES, sweep_interval: float = OUTPUT_SWEEP_SECONDS,
+                 min_age: float = MIN_AGE_SECONDS):
+        self.root = root
+        self.ttl = ttl
+        self.quota_bytes = quota_bytes
+        self.sweep_interval = sweep_interval
+        self.min_age = min_age
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"files": 0, "bytes": 0, "directories": 0, "evicted_files": 0, "evicted_bytes": 0}
+
+        os.makedirs(root, exist_ok=True)
+
+    def new_job_dir(self) -> str:
+        """
+        Creates an empty directory for one conversion's outputs.
+        """
+        path = os.path.join(self.root, uuid.uuid4().hex)
+        os.makedirs(path)
+        return path
+
+    def save(self, data: bytes, filename: str) -> str:
+        """
+        Stores `data` atomically under a new job directory and returns its path.
+        """
+        path = os.path.join(self.new_job_dir(), os.path.basename(filename))
+        atomic_write(path, data)
+        return path
+
+    def _job_dirs(self) -> List[Tuple[float, str, int, int]]:
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not JOB_DIR_NAME.fullmatch(name) or not os.path.isdir(path):
+                continue
+            try:
+                files, size, newest = _directory_usage(path)
+            except OSError:
+                # Removed while being scanned
+                continue
+            entries.append((newest, path, files, size))
+        return sorted(entries)
+
+    def sweep(self, now: float = None) -> int:
+        """
+        Evicts expired directories, then the oldest ones until the store
+        fits its quota. Returns the number of directories removed.
+        """
+        now = time.time() if now is None else now
+        entries = self._job_dirs()
+        total = sum(size for _, _, _, size in entries)
+        kept, evicted_files, evicted_bytes = [], 0, 0
+
+        for newest, path, files, size in entries:
+            age = now - newest
+            over_quota = total > self.quota_bytes and age >= self.min_age
+            if age >= self.ttl or over_quota:
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                evicted_files += files
+                evicted_bytes += size
+            else:
+                kept.append((files, size))
+
+        with self._lock:
+            self._stats["files"] = sum(files for files, _ in kept)
+            self._stats["bytes"] = sum(size for _, size in kept)
+            self._stats["directories"] = len(kept)
+            self._stats["evicted_files"] += evicted_files
+            self._stats["evicted_bytes"] += evicted_bytes
+
+        return len(entries) - len(kept)
+
+    def stats(self) -> dict:
+        """
+        Files and bytes held as of the last sweep, and totals evicted.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _run(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except OSError:
+                # Root briefly unavailable; try again next interval
+                pass
+
+    def start(self):
+        """
+        Sweeps once now and then every `sweep_interval` seconds.
+        """
+        self.sweep()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="output-store-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,5 +1,81 @@
 """
 Application-wide constants.
 """
+import os
+import tempfile
 
 MAX_FILE_SIZE = 4 * 1024 * 1024  # 4 MB in bytes
+
+# Compressed uploads are checked against MAX_FILE_SIZE as stored, and
+# against this limit while they are being decompressed.
+MAX_DECOMPRESSED_SIZE = 64 * 1024 * 1024  # 64 MB in bytes
+MAX_ARCHIVE_MEMBERS = 500
+
+# Uncompressed/compressed size ratio above which a ZIP member
+# (DOCX part or archive entry) is treated as a decompression bomb
+MAX_COMPRESSION_RATIO = 200
+
+# Number of pages laid out for the quick preview
+PREVIEW_PAGES = 1
+
+# Blocks rendered in the instant HTML preview
+PREVIEW_BLOCKS = 200
+
+# Render worker processes; 0 renders inside the server process
+RENDER_WORKERS = int(os.environ.get("CONVERTER_RENDER_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+
+# Backends each worker imports at start-up: input types and output
+# formats, e.g. "md,txt,pdf"; "all" for every one, "" for none
+WARM_UP_BACKENDS = os.environ.get("CONVERTER_WARM_UP", "all")
+
+# Conversions the Gradio queue runs at once (the rest wait in the queue)
+RENDER_CONCURRENCY = int(os.environ.get("CONVERTER_RENDER_CONCURRENCY", 2 * max(RENDER_WORKERS, 1)))
+QUEUE_MAX_SIZE = int(os.environ.get("CONVERTER_QUEUE_MAX_SIZE", 64))
+
+# Size-aware scheduling: jobs with an estimated cost up to SMALL_JOB_COST
+# (roughly bytes of plain text) run on the fast lane, larger ones on the
+# bulk lane, which accepts at most BULK_LANE_MAX_PENDING jobs at a time
+SMALL_JOB_COST = 256 * 1024
+FAST_LANE_WORKERS = int(os.environ.get("CONVERTER_FAST_LANE_WORKERS", RENDER_WORKERS))
+BULK_LANE_WORKERS = int(os.environ.get("CONVERTER_BULK_LANE_WORKERS", 1 if RENDER_WORKERS else 0))
+BULK_LANE_MAX_PENDING = int(os.environ.get("CONVERTER_BULK_LANE_MAX_PENDING", 8))
+
+# Each conversion runs in a short-lived child process with these limits.
+# The memory limit is address space on top of the child's size at fork
+SANDBOX_ENABLED = os.environ.get("CONVERTER_SANDBOX", "1") == "1"
+SANDBOX_MEMORY_LIMIT = int(os.environ.get("CONVERTER_SANDBOX_MEMORY_MB", 1024)) * 1024 * 1024
+SANDBOX_CPU_SECONDS = int(os.environ.get("CONVERTER_SANDBOX_CPU_SECONDS", 60))
+SANDBOX_WALL_SECONDS = float(os.environ.get("CONVERTER_SANDBOX_WALL_SECONDS", 120))
+
+# Render budget: PDF jobs estimated above the time budget render in fast
+# mode (no syntax highlighting); jobs still above it, or above the page
+# budget, are rejected before layout starts
+RENDER_TIME_BUDGET = float(os.environ.get("CONVERTER_RENDER_TIME_BUDGET", 60))
+RENDER_PAGE_BUDGET = int(os.environ.get("CONVERTER_RENDER_PAGE_BUDGET", 2000))
+
+# Sectioned rendering: full PDFs estimated at SECTIONED_RENDER_MIN_PAGES
+# pages or more are cut at top-level headings and the sections laid out
+# in up to SECTION_WORKERS processes at once (1 disables it)
+SECTION_WORKERS = int(os.environ.get("CONVERTER_SECTION_WORKERS", min(4, os.cpu_count() or 1)))
+SECTIONED_RENDER_MIN_PAGES = int(os.environ.get("CONVERTER_SECTIONED_RENDER_MIN_PAGES", 200))
+
+# Converted files live under one root; job directories are evicted after
+# OUTPUT_TTL_SECONDS, or oldest first while the store is over its quota
+OUTPUT_ROOT = os.environ.get(
+    "CONVERTER_OUTPUT_DIR", os.path.join(tempfile.gettempdir(), "smart_file_converter")
+)
+OUTPUT_TTL_SECONDS = int(os.environ.get("CONVERTER_OUTPUT_TTL_SECONDS", 3600))
+OUTPUT_QUOTA_BYTES = int(os.environ.get("CONVERTER_OUTPUT_QUOTA_MB", 1024)) * 1024 * 1024
+OUTPUT_SWEEP_SECONDS = int(os.environ.get("CONVERTER_OUTPUT_SWEEP_SECONDS", 60))
+
+# Profiling: CONVERTER_PROFILE=1 profiles every conversion, otherwise one
+# in PROFILE_SAMPLE_RATE conversions is picked at random (0: none). Profiles
+# of conversions without an output directory are written to PROFILE_DIR,
+# which the output store's sweeper never evicts
+PROFILE_ALL = os.environ.get("CONVERTER_PROFILE", "0") == "1"
+PROFILE_SAMPLE_RATE = int(os.environ.get("CONVERTER_PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("CONVERTER_PROFILE_DIR", os.path.join(OUTPUT_ROOT, "profiles"))
+
+# HTTP service (python -m app.server): conversions running or waiting
+# for a worker at once; more get 429 Too Many Requests
+SERVER_MAX_IN_FLIGHT = int(os.environ.get("CONVERTER_SERVER_MAX_IN_FLIGHT", RENDER_CONCURRENCY))
@@ -0,0 +1,253 @@
+"""
+Stream access to uploaded files.
+
+Plain files are opened directly. ``.gz``, ``.bz2`` and ``.xz`` files are
+decompressed on the fly, and ``.zip`` archives are read member by member as
+one concatenated stream, so parsers never need the expanded content on disk.
+The number of decompressed bytes is checked as they are read.
+
+Uploads that carry their content in a ``.data`` attribute (bytes) are read
+from memory; ``.name`` then only supplies the file name.
+"""
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+import os
+import zipfile
+import zlib
+
+from app.enums.error_codes import AppErrorCode
+from app.exceptions.custom_exceptions import FileValidationError
+from app.utils.constants import MAX_DECOMPRESSED_SIZE, MAX_ARCHIVE_MEMBERS
+
+COMPRESSION_OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+ARCHIVE_SUFFIX = ".zip"
+
+# Extensions that are handled by an existing parser under another name
+EXTENSION_ALIASES = {
+    "log": "txt",
+    "markdown": "md",
+    "htm": "html",
+}
+
+# Separator written between archive members so that their content
+# does not run together (e.g. a heading glued to the previous line)
+MEMBER_SEPARATOR = b"\n\n"
+
+# Checked longest first: the UTF-32 LE mark starts with the UTF-16 LE one
+BYTE_ORDER_MARKS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# Errors raised by the decompressors on truncated or corrupt input
+DECOMPRESSION_ERRORS = (OSError, EOFError, lzma.LZMAError, zlib.error, zipfile.BadZipFile)
+
+
+def _path_of(file) -> str:
+    return getattr(file, "name", file)
+
+
+def _data_of(file):
+    return getattr(file, "data", None)
+
+
+def seekable_source(file):
+    """
+    The upload as something zipfile and friends accept: an in-memory
+    stream for uploads with `.data`, else the path.
+    """
+    data = _data_of(file)
+    return io.BytesIO(data) if data is not None else _path_of(file)
+
+
+def source_size(file) -> int:
+    """
+    Stored (possibly compressed) size of the upload in bytes.
+    """
+    data = _data_of(file)
+    return len(data) if data is not None else os.path.getsize(_path_of(file))
+
+
+def compression_suffix(path: str) -> str:
+    """
+    Returns the compression/archive suffix of `path` ('' for plain files).
+    """
+    lowered = path.lower()
+    for suffix in list(COMPRESSION_OPENERS) + [ARCHIVE_SUFFIX]:
+        if lowered.endswith(suffix):
+            return suffix
+    return ""
+
+
+def source_name(path: str) -> str:
+    """
+    Base name of the upload with any compression suffix removed,
+    e.g. 'server.log.gz' -> 'server.log'.
+    """
+    filename = os.path.basename(path)
+    suffix = compression_suffix(filename)
+    return filename[: len(filename) - len(suffix)] if suffix else filename
+
+
+def source_extension(name: str) -> str:
+    """
+    Lower-cased extension of `name`, with aliases such as 'log' resolved.
+    """
+    extension = name.split(".")[-1].lower()
+    return EXTENSION_ALIASES.get(extension, extension)
+
+
+def detect_bom_encoding(head: bytes):
+    """
+    Returns the codec named by a byte order mark at the start of `head`,
+    or None when there is no BOM.
+    """
+    for bom, encoding in BYTE_ORDER_MARKS:
+        if head.startswith(bom):
+            return encoding
+    return None
+
+
+def archive_members(source):
+    """
+    Returns the file entries of a ZIP archive (path or seekable stream)
+    in name order. Directories and resource-fork folders are skipped.
+    """
+    try:
+        with zipfile.ZipFile(source) as archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+            ]
+    except (zipfile.BadZipFile, OSError):
+        raise FileValidationError(AppErrorCode.ARCHIVE_ERROR.value)
+
+    if len(members) > MAX_ARCHIVE_MEMBERS:
+        raise FileValidationError(AppErrorCode.ARCHIVE_ERROR.value)
+
+    return sorted(members, key=lambda info: info.filename)
+
+
+class LimitedReader(io.RawIOBase):
+    """
+    Raw binary stream that stops with FileValidationError once more than
+    `limit` bytes have been read from the wrapped stream.
+    """
+
+    def __init__(self, stream, limit: int = MAX_DECOMPRESSED_SIZE):
+        self._stream = stream
+        self._limit = limit
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            data = self._stream.read(len(buffer))
+        except DECOMPRESSION_ERRORS:
+            raise FileValidationError(AppErrorCode.ARCHIVE_ERROR.value)
+        self.bytes_read += len(data)
+        if self.bytes_read > self._limit:
+            raise FileValidationError(AppErrorCode.DECOMPRESSED_TOO_LARGE.value)
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._stream.close()
+        super().close()
+
+
+class ArchiveStream(io.RawIOBase):
+    """
+    Raw binary stream over the members of a ZIP archive, read one after
+    another without extracting them.
+    """
+
+    def __init__(self, source):
+        self._archive = zipfile.ZipFile(source)
+        self._pending = [info.filename for info in archive_members(source)]
+        self._current = None
+        self._separator = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self._separator:
+                data, self._separator = self._separator[: len(buffer)], self._separator[len(buffer):]
+                buffer[: len(data)] = data
+                return len(data)
+
+            if self._current is None:
+                if not self._pending:
+                    return 0
+                self._current = self._archive.open(self._pending.pop(0))
+
+            data = self._current.read(len(buffer))
+            if data:
+                buffer[: len(data)] = data
+                return len(data)
+
+            self._current.close()
+            self._current = None
+            if self._pending:
+                self._separator = MEMBER_SEPARATOR
+
+    def close(self):
+        if not self.closed:
+            if self._current is not None:
+                self._current.close()
+            self._archive.close()
+        super().close()
+
+
+def open_input(file, mode: str = "r", encoding: str = None, errors: str = "strict",
+               newline=None, limit: int = MAX_DECOMPRESSED_SIZE):
+    """
+    Opens an uploaded file (object with `.name`, or a path) for reading.
+
+    `mode` is 'r' for text or 'rb' for bytes. In text mode the encoding is
+    taken from a byte order mark when `encoding` is None, else UTF-8.
+    Compressed files and archives are decompressed while being read;
+    reading past `limit` decompressed bytes raises FileValidationError.
+    """
+    suffix = compression_suffix(_path_of(file))
+    source = seekable_source(file)
+
+    if not suffix:
+        stream = io.BufferedReader(source) if isinstance(source, io.BytesIO) else open(source, "rb")
+    else:
+        stream = _open_decompressed(source, suffix, limit)
+
+    if mode == "rb":
+        return stream
+
+    if encoding is None:
+        encoding = detect_bom_encoding(stream.peek(4)[:4]) or "utf-8"
+    return io.TextIOWrapper(stream, encoding=encoding, errors=errors, newline=newline)
+
+
+def _open_decompressed(source, suffix: str, limit: int):
+    try:
+        if suffix == ARCHIVE_SUFFIX:
+            raw = ArchiveStream(source)
+        else:
+            raw = COMPRESSION_OPENERS[suffix](source, "rb")
+    except DECOMPRESSION_ERRORS:
+        raise FileValidationError(AppErrorCode.ARCHIVE_ERROR.value)
+
+    return io.BufferedReader(LimitedReader(raw, limit))
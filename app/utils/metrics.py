@@ -0,0 +1,300 @@
+"""
+Conversion metrics: per-stage timings and counters.
+
+Each conversion runs inside `conversion()`, which collects a
+ConversionTrace: the time spent in each `span()` (validate, parse,
+analyze, highlight, layout, save) and the counts added with `count()`
+(blocks, pages, input_bytes, output_bytes). A finished trace is logged
+as one JSON line and added to METRICS, the process-wide totals per
+input type and output format, which export as Prometheus text or JSON.
+
+Spans may nest (highlighting happens during layout), so stage times
+of one conversion can add up to more than its total. Outside a
+conversion, spans and counts do nothing.
+
+Conversions in worker processes hand their trace to the parent with
+`conversion(sink=queue.put)` instead of recording it themselves.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the stage and conversion duration histograms
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "converter"
+
+# Label value for conversions that failed before their input type was known
+UNKNOWN = "unknown"
+
+# (ratio, actual counter, estimated counter) reported for render estimates
+# (see app.pdf.render_budget.record_estimate)
+ESTIMATE_RATIOS = (
+    ("pages", "estimate_actual_pages", "estimate_pages"),
+    ("seconds", "estimate_actual_ms", "estimate_ms"),
+)
+
+_current: ContextVar[Optional["ConversionTrace"]] = ContextVar("conversion_trace", default=None)
+
+
+class ConversionTrace:
+    """
+    Timings and counts of one conversion.
+    """
+
+    def __init__(self, **labels):
+        self.labels = labels
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.status = "ok"
+        self.error = None
+        self.seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "event": "conversion",
+            "input": self.labels.get("input", UNKNOWN),
+            "output": self.labels.get("output", UNKNOWN),
+            "status": self.status,
+            "error": self.error,
+            "seconds": round(self.seconds, 6),
+            "stages": {stage: round(seconds, 6) for stage, seconds in self.stages.items()},
+            "counts": dict(self.counts),
+        }
+
+
+@contextmanager
+def conversion(sink: Optional[Callable[[dict], None]] = None, **labels):
+    """
+    Traces the conversion run inside the block. On exit the trace is
+    logged and passed, as a dict, to `sink` (default: METRICS.record).
+    A conversion started inside another one joins the outer trace.
+    """
+    trace = _current.get()
+    if trace is not None:
+        for name, value in labels.items():
+            trace.labels.setdefault(name, value)
+        yield trace
+        return
+
+    trace = ConversionTrace(**labels)
+    token = _current.set(trace)
+    started = time.perf_counter()
+    try:
+        yield trace
+    except BaseException as e:
+        trace.status, trace.error = "error", type(e).__name__
+        raise
+    finally:
+        trace.seconds = time.perf_counter() - started
+        _current.reset(token)
+        _finish(trace, sink)
+
+
+def record_error(error: BaseException, seconds: float = 0.0,
+                 sink: Optional[Callable[[dict], None]] = None, **labels):
+    """
+    Records a failed conversion that could not trace itself, such as one
+    whose sandbox process was killed.
+    """
+    trace = ConversionTrace(**labels)
+    trace.status, trace.error = "error", type(error).__name__
+    trace.seconds = seconds
+    _finish(trace, sink)
+
+
+def _finish(trace: ConversionTrace, sink: Optional[Callable[[dict], None]]):
+    record = trace.as_dict()
+    logger.info(json.dumps(record))
+    (sink or METRICS.record)(record)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Adds the time spent inside the block to `stage` of the current conversion.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.stages[stage] += time.perf_counter() - started
+
+
+def count(name: str, value: int = 1):
+    """
+    Adds `value` to counter `name` of the current conversion.
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.counts[name] += value
+
+
+def label(**labels):
+    """
+    Sets labels of the current conversion that are not set yet.
+    """
+    trace = _current.get()
+    if trace is not None:
+        for name, value in labels.items():
+            trace.labels.setdefault(name, value)
+
+
+class Histogram:
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "seconds": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "max": round(self.max, 6),
+        }
+
+
+class MetricsRegistry:
+    """
+    Totals of finished conversions, per (input type, output format).
+    Where renders recorded estimates, the ratios of actual to estimated
+    pages and seconds are reported as well.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.conversions: Dict[tuple, int] = defaultdict(int)
+            self.durations: Dict[tuple, Histogram] = {}
+            self.stages: Dict[tuple, Histogram] = {}
+            self.counters: Dict[tuple, int] = defaultdict(int)
+
+    def _histogram(self, table: dict, key: tuple) -> Histogram:
+        if key not in table:
+            table[key] = Histogram(self.buckets)
+        return table[key]
+
+    def _estimate_ratios(self, key: tuple) -> Dict[str, float]:
+        ratios = {}
+        for name, actual, estimated in ESTIMATE_RATIOS:
+            if self.counters.get(key + (estimated,)):
+                ratios[name] = round(self.counters.get(key + (actual,), 0) / self.counters[key + (estimated,)], 4)
+        return ratios
+
+    def record(self, record: dict):
+        """
+        Adds a finished conversion, as produced by ConversionTrace.as_dict.
+        """
+        key = (record["input"], record["output"])
+        with self._lock:
+            self.conversions[key + (record["status"],)] += 1
+            self._histogram(self.durations, key).observe(record["seconds"])
+            for stage, seconds in record["stages"].items():
+                self._histogram(self.stages, key + (stage,)).observe(seconds)
+            for name, value in record["counts"].items():
+                self.counters[key + (name,)] += value
+
+    def snapshot(self) -> dict:
+        """
+        Totals as JSON-ready dicts, keyed by "input/output" format pair.
+        """
+        formats = defaultdict(lambda: {"conversions": {}, "stages": {}, "counts": {}})
+        with self._lock:
+            for (source, output, status), total in self.conversions.items():
+                formats[f"{source}/{output}"]["conversions"][status] = total
+            for (source, output), histogram in self.durations.items():
+                formats[f"{source}/{output}"]["total"] = histogram.snapshot()
+            for (source, output, stage), histogram in self.stages.items():
+                formats[f"{source}/{output}"]["stages"][stage] = histogram.snapshot()
+            for (source, output, name), total in self.counters.items():
+                formats[f"{source}/{output}"]["counts"][name] = total
+            for key in self.durations:
+                ratios = self._estimate_ratios(key)
+                if ratios:
+                    formats["/".join(key)]["estimate_ratio"] = ratios
+        return {"formats": dict(formats)}
+
+    def prometheus_text(self) -> str:
+        """
+        Totals in the Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        with self._lock:
+            _metric(lines, "conversions_total", "counter", "Finished conversions.", [
+                ({"input": source, "output": output, "status": status}, total)
+                for (source, output, status), total in sorted(self.conversions.items())
+            ])
+            _histograms(lines, "conversion_seconds", "Wall time of whole conversions.", [
+                ({"input": source, "output": output}, histogram)
+                for (source, output), histogram in sorted(self.durations.items())
+            ])
+            _histograms(lines, "stage_seconds", "Time spent in each conversion stage.", [
+                ({"input": source, "output": output, "stage": stage}, histogram)
+                for (source, output, stage), histogram in sorted(self.stages.items())
+            ])
+            for name in sorted({key[2] for key in self.counters}):
+                _metric(lines, f"{name}_total", "counter", f"Sum of {name} over conversions.", [
+                    ({"input": source, "output": output}, total)
+                    for (source, output, counter), total in sorted(self.counters.items()) if counter == name
+                ])
+            _metric(lines, "render_estimate_ratio", "gauge", "Actual over estimated render pages and seconds.", [
+                ({"input": source, "output": output, "quantity": name}, ratio)
+                for (source, output) in sorted(self.durations)
+                for name, ratio in self._estimate_ratios((source, output)).items()
+            ])
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: dict) -> str:
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _metric(lines: list, name: str, kind: str, help_text: str, samples: list):
+    name = f"{METRIC_PREFIX}_{name}"
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(labels)} {value}" for labels, value in samples]
+
+
+def _histograms(lines: list, name: str, help_text: str, samples: list):
+    name = f"{METRIC_PREFIX}_{name}"
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in samples:
+        for bound, total in zip(histogram.buckets, histogram.counts):
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {total}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+
+METRICS = MetricsRegistry()
@@ -0,0 +1,139 @@
+"""
+Opt-in cProfile of single conversions.
+
+A conversion is profiled when its options ask for it, when
+CONVERTER_PROFILE=1, or when it is picked by 1-in-N sampling
+(CONVERTER_PROFILE_SAMPLE_RATE). Two files are written:
+
+    <name>.prof     pstats data, for `python -m pstats` or snakeviz
+    <name>.folded   collapsed stacks ("a;b;c <microseconds>"), for
+                    flamegraph.pl, speedscope or inferno
+
+cProfile records callers, not whole stacks, so the collapsed stacks are
+rebuilt from the call graph: a function's time is split between its
+callers in proportion to the time each of them spent calling it.
+"""
+import cProfile
+import logging
+import os
+import pstats
+import random
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+
+from app.utils.constants import PROFILE_ALL, PROFILE_SAMPLE_RATE
+from app.utils.metrics import count
+
+logger = logging.getLogger(__name__)
+
+# Stack depth and smallest share (microseconds) kept in collapsed stacks
+MAX_STACK_DEPTH = 128
+MIN_FOLDED_MICROSECONDS = 1
+
+_active: ContextVar[bool] = ContextVar("profiling_active", default=False)
+
+
+def should_profile(requested: bool = False) -> bool:
+    """
+    Whether to profile the next conversion: on request, always with
+    CONVERTER_PROFILE=1, else for a random one in PROFILE_SAMPLE_RATE.
+    """
+    if requested or PROFILE_ALL:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.randrange(PROFILE_SAMPLE_RATE) == 0
+
+
+def _frame(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        # Built-in functions have no source location
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    """
+    Collapsed stacks ("root;caller;callee") with the microseconds spent
+    in the innermost function, rebuilt from a profile's call graph.
+    Recursive calls are folded into the outermost frame of the function.
+    """
+    callees = defaultdict(list)
+    for func, (_cc, _nc, _tt, _ct, callers) in stats.stats.items():
+        for caller, (_edge_cc, _edge_nc, _edge_tt, edge_ct) in callers.items():
+            callees[caller].append((func, edge_ct))
+
+    folded = defaultdict(float)
+
+    def walk(func, stack, path, share):
+        _cc, _nc, tt, ct, _callers = stats.stats[func]
+        stack = stack + (_frame(func),)
+        path = path | {func}
+        folded[";".join(stack)] += tt * share * 1e6
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees[func]:
+            callee_ct = stats.stats[callee][3]
+            callee_share = share * edge_ct / callee_ct if callee_ct else 0
+            if callee not in path and callee_ct * callee_share * 1e6 >= MIN_FOLDED_MICROSECONDS:
+                walk(callee, stack, path, callee_share)
+
+    for func, entry in stats.stats.items():
+        if not entry[4]:
+            walk(func, (), frozenset(), 1.0)
+
+    return {stack: round(us) for stack, us in folded.items() if round(us) >= MIN_FOLDED_MICROSECONDS}
+
+
+def write_profile(profile: cProfile.Profile, path: str):
+    """
+    Writes `path`.prof (pstats) and `path`.folded (collapsed stacks).
+    """
+    stats = pstats.Stats(profile)
+    stats.dump_stats(f"{path}.prof")
+    with open(f"{path}.folded", "w", encoding="utf-8") as f:
+        for stack, microseconds in sorted(collapsed_stacks(stats).items()):
+            f.write(f"{stack} {microseconds}\n")
+
+
+@contextmanager
+def profiling(directory: str, name: str, requested: bool = False):
+    """
+    Profiles the block if should_profile(requested) and writes the profile
+    to `directory`/`name`.prof and .folded. Yields the profile path
+    without extension, or None when the block is not profiled. Inside an
+    already profiled block this does nothing.
+
+    A profile that cannot be written is logged; the conversion goes on.
+    """
+    if _active.get() or not should_profile(requested):
+        yield None
+        return
+
+    path = os.path.join(directory, name)
+    profile = cProfile.Profile()
+    token = _active.set(True)
+    # Traced conversions note that their timings include profiler overhead
+    count("profiled")
+    profile.enable()
+    try:
+        yield path
+    finally:
+        profile.disable()
+        _active.reset(token)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            write_profile(profile, path)
+            logger.info("Profile written to %s.prof", path)
+        except OSError as e:
+            logger.warning("Could not write profile %s: %s", path, e)
+
+
+def profile_name(stem: str) -> str:
+    """
+    A unique name for a profile in a shared directory, starting with `stem`.
+    """
+    return f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
@@ -1,8 +1,40 @@
+from typing import List, Optional, Tuple
+
 from pygments import highlight
 from pygments.lexers import get_lexer_by_name, guess_lexer
 from pygments.formatter import Formatter
 from pygments.token import Token
 
+from app.utils.metrics import span
+
+# Simple style mapping (default); a token type without an entry uses its parent's
+TOKEN_COLORS = {
+    Token.Keyword: "#000080",      # Navy Blue
+    Token.Name.Builtin: "#000080",
+    Token.Literal.String: "#008000", # Green
+    Token.Comment: "#808080",     # Gray
+    Token.Operator: "#000000",
+    Token.Name.Function: "#0000FF", # Blue
+    Token.Name.Class: "#0000FF",
+    Token.Number: "#000000",
+    Token.Text: "#000000"
+}
+
+
+def token_style(ttype, colors: dict = TOKEN_COLORS) -> Tuple[Optional[str], bool]:
+    """
+    (color, bold) of a Pygments token type; color is None for unstyled text.
+    """
+    # Find best matching color
+    color = colors.get(ttype)
+    if not color:
+        # Fallback to parent type
+        color = colors.get(ttype.parent)
+
+    # Keywords are bold (Pygments tokens allow the check)
+    return color, bool(color) and ttype in Token.Keyword
+
+
 class ReportLabFormatter(Formatter):
     """
     Format tokens as ReportLab XML tags for use in XPreformatted or Paragraph.
@@ -10,19 +42,7 @@ class ReportLabFormatter(Formatter):
     """
     def __init__(self, **options):
         Formatter.__init__(self, **options)
-        
-        # Simple style mapping (default)
-        self.colors = {
-            Token.Keyword: "#000080",      # Navy Blue
-            Token.Name.Builtin: "#000080",
-            Token.Literal.String: "#008000", # Green
-            Token.Comment: "#808080",     # Gray
-            Token.Operator: "#000000",
-            Token.Name.Function: "#0000FF", # Blue
-            Token.Name.Class: "#0000FF",
-            Token.Number: "#000000",
-            Token.Text: "#000000"
-        }
+        self.colors = TOKEN_COLORS
 
     def format(self, tokensource, outfile):
         for ttype, value in tokensource:
@@ -35,16 +55,8 @@ class ReportLabFormatter(Formatter):
             # Replace double spaces with nbsp+space to preserve width but allow break
             value = value.replace("  ", "&nbsp; ")
             
-            # Find best matching color
-            color = self.colors.get(ttype)
-            if not color:
-                # Fallback to parent type
-                color = self.colors.get(ttype.parent)
-            
+            color, is_bold = token_style(ttype, self.colors)
             if color:
-                # Special handling for bold/italic if needed (Pygments tokens allow check)
-                is_bold = ttype in Token.Keyword
-                
                 # Wrap
                 if is_bold:
                     value = f"<b>{value}</b>"
@@ -53,14 +65,40 @@ class ReportLabFormatter(Formatter):
             else:
                 outfile.write(value)
 
-def highlight_code(code: str, language: str = None) -> str:
+def code_lexer(code: str, language: str = None):
     try:
         if language:
-            lexer = get_lexer_by_name(language, stripall=True)
-        else:
-            lexer = guess_lexer(code)
+            return get_lexer_by_name(language, stripall=True)
+        return guess_lexer(code)
     except:
-        lexer = get_lexer_by_name("text", stripall=True)
+        return get_lexer_by_name("text", stripall=True)
 
+def highlight_code(code: str, language: str = None) -> str:
     formatter = ReportLabFormatter()
-    return highlight(code, lexer, formatter)
+    with span("highlight"):
+        return highlight(code, code_lexer(code, language), formatter)
+
+def highlight_spans(code: str, language: str = None) -> List[Tuple[str, Optional[str], bool]]:
+    """
+    The same highlighting as (text, color, bold) spans, for non-ReportLab
+    output. Adjacent tokens of the same style are merged into one span,
+    and whitespace joins the span before it, so a line of code becomes a
+    handful of spans rather than one per token.
+    """
+    spans = []
+    parts, style = [], None
+    styles = {}
+    with span("highlight"):
+        for ttype, value in code_lexer(code, language).get_tokens(code):
+            token = styles.get(ttype)
+            if token is None:
+                token = styles[ttype] = token_style(ttype)
+            if token != style and parts and not value.isspace():
+                spans.append(("".join(parts), *style))
+                parts = []
+            if not parts:
+                style = token
+            parts.append(value)
+        if parts:
+            spans.append(("".join(parts), *style))
+    return spans
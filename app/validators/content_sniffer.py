@@ -0,0 +1,133 @@
+import zipfile
+
+from app.enums.file_types import SupportedFileType
+from app.enums.error_codes import AppErrorCode
+from app.exceptions.custom_exceptions import FileValidationError
+from app.utils.constants import MAX_DECOMPRESSED_SIZE, MAX_COMPRESSION_RATIO
+from app.utils.input_stream import detect_bom_encoding, open_input
+
+# Only the start of the upload is inspected
+SNIFF_SIZE = 8 * 1024
+
+ZIP_SIGNATURE = b"PK\x03\x04"
+
+# Parts every WordprocessingML package contains
+DOCX_REQUIRED_PARTS = ("[Content_Types].xml", "word/document.xml")
+
+# Share of control bytes above which content is treated as binary
+BINARY_RATIO = 0.30
+
+# Control characters that legitimately appear in text files
+TEXT_CONTROL_BYTES = {0x08, 0x09, 0x0A, 0x0C, 0x0D, 0x1B}
+
+# Members smaller than this are not subject to the ratio check,
+# highly repetitive small files compress well without being a threat
+RATIO_CHECK_MIN_SIZE = 1024 * 1024
+
+TEXT_FILE_TYPES = {
+    SupportedFileType.TXT,
+    SupportedFileType.MD,
+    SupportedFileType.CSV,
+    SupportedFileType.HTML,
+}
+
+
+def read_head(file, size: int = SNIFF_SIZE) -> bytes:
+    """
+    Reads the first `size` (decompressed) bytes of an upload.
+    """
+    try:
+        with open_input(file, "rb") as f:
+            return f.read(size)
+    except FileValidationError:
+        raise
+    except OSError:
+        raise FileValidationError(AppErrorCode.FILE_READ_ERROR.value)
+
+
+def is_binary(head: bytes) -> bool:
+    """
+    Heuristic binary check: NUL bytes, or a high share of control bytes,
+    in content without a byte order mark.
+    """
+    if not head or detect_bom_encoding(head):
+        return False
+
+    if b"\x00" in head:
+        return True
+
+    control = sum(1 for byte in head if (byte < 0x20 and byte not in TEXT_CONTROL_BYTES) or byte == 0x7F)
+    return control / len(head) > BINARY_RATIO
+
+
+def looks_like_json_object(head: bytes) -> bool:
+    encoding = detect_bom_encoding(head) or "utf-8"
+    text = head.decode(encoding, errors="ignore").lstrip("\ufeff \t\r\n")
+    return text.startswith("{")
+
+
+def _central_directory(source):
+    try:
+        with zipfile.ZipFile(source) as archive:
+            return archive.infolist()
+    except (zipfile.BadZipFile, OSError):
+        raise FileValidationError(AppErrorCode.ARCHIVE_ERROR.value)
+
+
+def _check_expansion(infos) -> None:
+    total = 0
+    for info in infos:
+        total += info.file_size
+        if total > MAX_DECOMPRESSED_SIZE:
+            raise FileValidationError(AppErrorCode.DECOMPRESSED_TOO_LARGE.value)
+
+        if info.file_size >= RATIO_CHECK_MIN_SIZE:
+            ratio = info.file_size / max(info.compress_size, 1)
+            if ratio > MAX_COMPRESSION_RATIO:
+                raise FileValidationError(AppErrorCode.DECOMPRESSED_TOO_LARGE.value)
+
+
+def check_zip_expansion(source) -> None:
+    """
+    Inspects the central directory of a ZIP file (path or seekable stream)
+    without decompressing it, and rejects archives that would expand
+    beyond MAX_DECOMPRESSED_SIZE or contain members with an extreme
+    compression ratio.
+    """
+    _check_expansion(_central_directory(source))
+
+
+def check_docx_package(source) -> None:
+    """
+    Confirms that a ZIP file is a WordprocessingML package and that it
+    is safe to hand to python-docx.
+    """
+    infos = _central_directory(source)
+    _check_expansion(infos)
+
+    names = {info.filename for info in infos}
+    if not all(part in names for part in DOCX_REQUIRED_PARTS):
+        raise FileValidationError(AppErrorCode.CONTENT_MISMATCH.value)
+
+
+def check_content(file, file_type: SupportedFileType) -> None:
+    """
+    Verifies that the start of the upload matches the type derived from
+    its extension. Raises FileValidationError on a mismatch.
+    """
+    head = read_head(file)
+
+    if not head:
+        raise FileValidationError(AppErrorCode.EMPTY_FILE.value)
+
+    if file_type == SupportedFileType.DOCX:
+        if not head.startswith(ZIP_SIGNATURE):
+            raise FileValidationError(AppErrorCode.CONTENT_MISMATCH.value)
+
+    elif file_type == SupportedFileType.IPYNB:
+        if is_binary(head) or not looks_like_json_object(head):
+            raise FileValidationError(AppErrorCode.CONTENT_MISMATCH.value)
+
+    elif file_type in TEXT_FILE_TYPES:
+        if head.startswith(ZIP_SIGNATURE) or is_binary(head):
+            raise FileValidationError(AppErrorCode.CONTENT_MISMATCH.value)
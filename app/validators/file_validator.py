@@ -4,6 +4,49 @@ from app.enums.file_types import SupportedFileType
 from app.enums.error_codes import AppErrorCode
 from app.exceptions.custom_exceptions import FileValidationError
 from app.utils.constants import MAX_FILE_SIZE
+from app.validators.content_sniffer import check_content, check_docx_package, check_zip_expansion
+from app.utils.input_stream import (
+    ARCHIVE_SUFFIX,
+    archive_members,
+    compression_suffix,
+    seekable_source,
+    source_extension,
+    source_name,
+    source_size,
+)
+
+# Types that can be read as one concatenated stream of archive members
+ARCHIVE_FILE_TYPES = {
+    SupportedFileType.TXT,
+    SupportedFileType.MD,
+    SupportedFileType.CSV,
+    SupportedFileType.HTML,
+    SupportedFileType.BIN,
+}
+
+
+def _archive_file_type(source) -> SupportedFileType:
+    """
+    Resolves the type of a ZIP upload from its members, which must all
+    share one supported extension.
+    """
+    extensions = {source_extension(info.filename) for info in archive_members(source)}
+
+    if not extensions:
+        raise FileValidationError(AppErrorCode.EMPTY_FILE.value)
+
+    if len(extensions) > 1:
+        raise FileValidationError(AppErrorCode.MIXED_ARCHIVE.value)
+
+    extension = extensions.pop()
+    if extension not in SupportedFileType.list_values():
+        raise FileValidationError(AppErrorCode.INVALID_FILE_TYPE.value)
+
+    file_type = SupportedFileType(extension)
+    if file_type not in ARCHIVE_FILE_TYPES:
+        raise FileValidationError(AppErrorCode.MIXED_ARCHIVE.value)
+
+    return file_type
 
 
 def validate_file(file):
@@ -14,16 +57,17 @@ def validate_file(file):
     if file is None:
         raise FileValidationError("No file uploaded")
 
-    # Gradio provides a temp file object with `.name` as file path
+    # Gradio provides a temp file object with `.name` as file path;
+    # in-memory uploads carry their content as `.data`
     if not hasattr(file, "name"):
         raise FileValidationError("Invalid file object")
 
     file_path = file.name
 
-    if not os.path.exists(file_path):
+    if getattr(file, "data", None) is None and not os.path.exists(file_path):
         raise FileValidationError("Uploaded file not found on disk")
 
-    file_size = os.path.getsize(file_path)
+    file_size = source_size(file)
 
     if file_size == 0:
         raise FileValidationError(AppErrorCode.EMPTY_FILE.value)
@@ -31,9 +75,25 @@ def validate_file(file):
     if file_size > MAX_FILE_SIZE:
         raise FileValidationError(AppErrorCode.FILE_TOO_LARGE.value)
 
-    extension = file_path.split(".")[-1].lower()
+    suffix = compression_suffix(file_path)
 
-    if extension not in SupportedFileType.list_values():
-        raise FileValidationError(AppErrorCode.INVALID_FILE_TYPE.value)
+    # Compressed uploads are typed by the file they contain
+    if suffix == ARCHIVE_SUFFIX:
+        check_zip_expansion(seekable_source(file))
+        file_type = _archive_file_type(seekable_source(file))
+    else:
+        extension = source_extension(source_name(file_path))
+
+        if extension not in SupportedFileType.list_values():
+            raise FileValidationError(AppErrorCode.INVALID_FILE_TYPE.value)
+
+        file_type = SupportedFileType(extension)
+
+    # Only the first few KB are read to confirm the real type
+    check_content(file, file_type)
+
+    # Compressed DOCX packages are checked by the parser once decompressed
+    if file_type == SupportedFileType.DOCX and not suffix:
+        check_docx_package(seekable_source(file))
 
-    return SupportedFileType(extension)
+    return file_type
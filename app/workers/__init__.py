@@ -0,0 +1,3 @@
+from .render_pool import RenderJob, RenderPool
+from .scheduler import SizeAwareScheduler, estimate_cost
+from .sandbox import SandboxLimits, run_sandboxed
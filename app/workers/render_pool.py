@@ -0,0 +1,294 @@
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from app.enums.error_codes import AppErrorCode
+from app.enums.file_types import SupportedFileType
+from app.exceptions.custom_exceptions import ServiceBusyError
+from app.pipeline.conversion import (
+    ConversionOptions,
+    UploadedFile,
+    convert_bytes,
+    load_source,
+    profile_stem,
+    render_source,
+)
+from app.pipeline.book import convert_book
+from app.pipeline.registry import warm_up
+from app.utils.constants import RENDER_WORKERS
+from app.utils.input_stream import source_extension, source_name
+from app.utils.metrics import METRICS, UNKNOWN, conversion, record_error
+from app.utils.profiling import profiling
+from app.workers.sandbox import SandboxLimits, run_sandboxed
+
+
+def _warm_up():
+    """
+    Worker initializer: imports the parser and renderer backends named by
+    CONVERTER_WARM_UP so the first job in each process does not pay for them.
+    """
+    warm_up()
+
+
+def _ping():
+    return os.getpid()
+
+
+def _input_label(filename: str) -> str:
+    extension = source_extension(source_name(filename))
+    return extension if extension in SupportedFileType.list_values() else UNKNOWN
+
+
+def _record_abort(metrics, **labels):
+    """
+    on_abort callback for run_sandboxed: a conversion the sandbox stopped
+    (timeout, limit, cancel) never finished its own trace, so an error
+    trace is put on `metrics` for it here.
+    """
+    started = time.perf_counter()
+    sink = metrics.put if metrics is not None else None
+    return lambda error: record_error(error, time.perf_counter() - started, sink=sink, **labels)
+
+
+def _render_job(path: str, options: ConversionOptions, output_dir: str, events, preview_pages: int,
+                sandbox: Optional[SandboxLimits] = None, metrics=None):
+    """
+    Runs one conversion inside a worker. Progress is reported on `events`
+    as ('stage', name) and ('preview', path) tuples, and the conversion's
+    trace (see app.utils.metrics) is put on `metrics`.
+
+    With `sandbox` set the conversion runs in a child process under those
+    limits, whose pid is reported as a ('sandbox', pid) event.
+    """
+    if sandbox is not None:
+        return run_sandboxed(
+            _render_job, path, options, output_dir, events, preview_pages, None, metrics,
+            limits=sandbox, on_start=lambda pid: events.put(("sandbox", pid)),
+            on_abort=_record_abort(metrics, input=_input_label(path), output=options.output_format)
+        )
+
+    def on_stage(stage):
+        events.put(("stage", stage))
+
+    upload = UploadedFile(path)
+    with conversion(sink=metrics.put if metrics is not None else None, output=options.output_format):
+        with profiling(output_dir, profile_stem(upload), options.profile):
+            source = load_source(upload, options, on_stage=on_stage)
+
+            if preview_pages and options.output_format == "PDF":
+                preview_dir = os.path.join(output_dir, "preview")
+                os.makedirs(preview_dir, exist_ok=True)
+                events.put(("preview", render_source(source, options, preview_dir, max_pages=preview_pages)))
+
+            return render_source(source, options, output_dir, on_stage=on_stage)
+
+
+def _convert_bytes_job(data: bytes, filename: str, options: ConversionOptions,
+                       sandbox: Optional[SandboxLimits] = None, metrics=None) -> bytes:
+    """
+    Runs one in-memory conversion inside a worker and returns the output
+    bytes. The conversion's trace is put on `metrics`.
+    """
+    if sandbox is not None:
+        return run_sandboxed(
+            _convert_bytes_job, data, filename, options, None, metrics, limits=sandbox,
+            on_abort=_record_abort(metrics, input=_input_label(filename), output=options.output_format)
+        )
+    with conversion(sink=metrics.put if metrics is not None else None, output=options.output_format):
+        return convert_bytes(data, filename, options)
+
+
+def _book_job(paths, options: ConversionOptions, output_dir: str, events,
+              sandbox: Optional[SandboxLimits] = None, metrics=None) -> str:
+    """
+    Binds the files at `paths` into one PDF inside a worker, like
+    _render_job: stages are reported on `events`, the trace is put on
+    `metrics` and with `sandbox` set the book is made in a child process.
+    """
+    if sandbox is not None:
+        return run_sandboxed(
+            _book_job, paths, options, output_dir, events, None, metrics,
+            limits=sandbox, on_start=lambda pid: events.put(("sandbox", pid)),
+            on_abort=_record_abort(metrics, input="book", output="PDF")
+        )
+
+    # Chapters are parsed in parallel only from a worker or sandbox
+    # process, never by forking the (threaded) server process
+    workers = RENDER_WORKERS if multiprocessing.parent_process() is not None else 0
+    with conversion(sink=metrics.put if metrics is not None else None, output="PDF"):
+        return convert_book(paths, options, output_dir, workers=workers,
+                            on_stage=lambda stage: events.put(("stage", stage)))
+
+
+@dataclass
+class RenderJob:
+    future: Future
+    events: object
+    sandbox_pid: Optional[int] = None
+
+    def _next_event(self, timeout: Optional[float]):
+        while True:
+            event = self.events.get(timeout=timeout) if timeout else self.events.get_nowait()
+            if event[0] != "sandbox":
+                return event
+            self.sandbox_pid = event[1]
+
+    def iter_events(self, poll_interval: float = 0.1):
+        """
+        Yields progress events until the job has finished. The job's
+        result (or exception) is then available from `future`.
+        """
+        while True:
+            try:
+                yield self._next_event(poll_interval)
+            except queue.Empty:
+                if self.future.done():
+                    break
+
+        # Events put just before the job finished
+        while True:
+            try:
+                yield self._next_event(None)
+            except queue.Empty:
+                return
+
+    def cancel(self):
+        """
+        Cancels the job: drops it if it has not started, otherwise stops
+        its sandbox process. The future then raises ConversionAbortedError.
+        """
+        if self.future.cancel() or self.future.done():
+            return
+        try:
+            # Pick up the sandbox pid if events have not been read yet
+            self._next_event(None)
+        except queue.Empty:
+            pass
+        if self.sandbox_pid is not None:
+            try:
+                os.kill(self.sandbox_pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+class RenderPool:
+    """
+    Pool of pre-warmed worker processes that run conversions away from
+    the UI server process. With `workers=0` jobs run on a thread of the
+    current process instead.
+
+    Unless `sandbox` is None each job additionally runs in its own
+    short-lived child process under SandboxLimits, so a runaway
+    conversion can be killed without losing the worker.
+
+    Jobs send their conversion traces back on a queue; each is added to
+    app.utils.metrics.METRICS in this process when the job finishes.
+    """
+
+    def __init__(self, workers: int = RENDER_WORKERS, sandbox: Optional[SandboxLimits] = None):
+        self.workers = workers
+        self.sandbox = sandbox
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        # Events from another process need a managed queue
+        self._manager = multiprocessing.Manager() if workers > 0 or sandbox else None
+        if workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm_up)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._metrics = self._new_events()
+
+    def warm_up(self):
+        """
+        Starts every worker process now rather than on first use.
+        """
+        if self.workers > 0:
+            for future in [self._executor.submit(_ping) for _ in range(self.workers)]:
+                future.result()
+
+    def _new_events(self):
+        return self._manager.Queue() if self._manager else queue.Queue()
+
+    def _job_done(self, _future):
+        with self._lock:
+            self._pending -= 1
+        # Traces are put before the job returns
+        while True:
+            try:
+                METRICS.record(self._metrics.get_nowait())
+            except queue.Empty:
+                break
+
+    def _reserve(self, max_pending: Optional[int]):
+        # Checked and counted under one lock, so concurrent submitters
+        # cannot together go over `max_pending`
+        with self._lock:
+            if max_pending is not None and self._pending >= max_pending:
+                raise ServiceBusyError(AppErrorCode.SERVICE_BUSY.value)
+            self._pending += 1
+
+    def submit(self, path: str, options: ConversionOptions, output_dir: str,
+               preview_pages: int = None, max_pending: Optional[int] = None) -> RenderJob:
+        """
+        Queues a conversion of the file at `path`. With `max_pending` set,
+        raises ServiceBusyError instead if that many jobs are pending.
+        """
+        self._reserve(max_pending)
+        events = self._new_events()
+
+        future = self._executor.submit(
+            _render_job, path, options, output_dir, events, preview_pages, self.sandbox, self._metrics
+        )
+        future.add_done_callback(self._job_done)
+        return RenderJob(future, events)
+
+    def submit_book(self, paths, options: ConversionOptions, output_dir: str,
+                    max_pending: Optional[int] = None) -> RenderJob:
+        """
+        Binds the files at `paths`, in order, into one PDF (see
+        app.pipeline.book); the job's result is the PDF's path.
+        """
+        self._reserve(max_pending)
+        events = self._new_events()
+
+        future = self._executor.submit(_book_job, list(paths), options, output_dir, events, self.sandbox, self._metrics)
+        future.add_done_callback(self._job_done)
+        return RenderJob(future, events)
+
+    def submit_bytes(self, data: bytes, filename: str, options: ConversionOptions) -> Future:
+        """
+        Converts an upload held in memory; the future's result is the
+        output document as bytes.
+        """
+        self._reserve(None)
+
+        future = self._executor.submit(_convert_bytes_job, data, filename, options, self.sandbox, self._metrics)
+        future.add_done_callback(self._job_done)
+        return future
+
+    @property
+    def pending(self) -> int:
+        """
+        Jobs submitted and not yet finished (running or waiting).
+        """
+        return self._pending
+
+    @property
+    def running(self) -> int:
+        return min(self._pending, max(self.workers, 1))
+
+    @property
+    def waiting(self) -> int:
+        return self._pending - self.running
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        if self._manager is not None:
+            self._manager.shutdown()
@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import signal
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows: wall-clock limit only
+    resource = None
+
+from app.enums.error_codes import AppErrorCode
+from app.exceptions.custom_exceptions import ConversionAbortedError, ParsingError
+from app.utils.constants import SANDBOX_MEMORY_LIMIT, SANDBOX_CPU_SECONDS, SANDBOX_WALL_SECONDS
+
+# Seconds between the soft CPU limit (SIGXCPU) and the hard one (SIGKILL)
+CPU_GRACE_SECONDS = 5
+
+# Seconds a terminated child gets to exit before it is killed
+TERMINATE_GRACE_SECONDS = 2
+
+
+@dataclass
+class SandboxLimits:
+    memory_bytes: Optional[int] = SANDBOX_MEMORY_LIMIT
+    cpu_seconds: Optional[int] = SANDBOX_CPU_SECONDS
+    wall_seconds: Optional[float] = SANDBOX_WALL_SECONDS
+
+
+def _context():
+    # Forking keeps the parent's imported backends, so the child starts warm
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def _address_space() -> int:
+    """
+    Current virtual memory size of this process, or 0 where unknown.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _apply_limits(limits: SandboxLimits):
+    if resource is None:
+        return
+    if limits.memory_bytes:
+        # The budget is on top of what the forked child already maps
+        cap = _address_space() + limits.memory_bytes
+        resource.setrlimit(resource.RLIMIT_AS, (cap, cap))
+    if limits.cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + CPU_GRACE_SECONDS))
+
+
+def _sandbox_main(conn, limits, fn, args, kwargs, started):
+    try:
+        # Own process group, so workers the job starts are stopped with it
+        if hasattr(os, "setpgid"):
+            os.setpgid(0, 0)
+        _apply_limits(limits)
+        # Anything the job reports comes after the parent's on_start
+        started.wait()
+        conn.send((True, fn(*args, **kwargs)))
+    except MemoryError:
+        conn.send((False, ConversionAbortedError(AppErrorCode.RESOURCE_LIMIT.value)))
+    except Exception as e:
+        try:
+            conn.send((False, e))
+        except Exception:
+            # Exception that cannot be pickled
+            conn.send((False, ParsingError(AppErrorCode.PARSING_ERROR.value)))
+    finally:
+        conn.close()
+
+
+def _stop(process):
+    if process.is_alive():
+        process.terminate()
+        process.join(TERMINATE_GRACE_SECONDS)
+    if process.is_alive():
+        process.kill()
+    process.join()
+
+    # Anything the job started and left behind
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _abort_reason(exitcode) -> str:
+    if exitcode == -signal.SIGTERM:
+        return AppErrorCode.CONVERSION_CANCELLED.value
+    return AppErrorCode.RESOURCE_LIMIT.value
+
+
+def run_sandboxed(fn, *args, limits: SandboxLimits = None, on_start=None, on_abort=None, **kwargs):
+    """
+    Runs fn(*args, **kwargs) in a child process with address-space and CPU
+    time limits, and waits at most `limits.wall_seconds` for it.
+
+    `on_start` receives the child's pid, which can be sent SIGTERM to
+    cancel the call. Exceptions raised by `fn` are re-raised here; a
+    timeout, a limit being hit or cancellation raise ConversionAbortedError.
+    When the child is stopped that way it could not report anything
+    itself, so that error is also passed to `on_abort`.
+    """
+    limits = limits or SandboxLimits()
+    ctx = _context()
+    receiver, sender = ctx.Pipe(duplex=False)
+    started = ctx.Event()
+
+    # Not a daemon, so the job may start worker processes (sectioned
+    # rendering); the child is always stopped and reaped below
+    process = ctx.Process(target=_sandbox_main, args=(sender, limits, fn, args, kwargs, started), daemon=False)
+    process.start()
+    sender.close()
+
+    try:
+        if on_start is not None:
+            on_start(process.pid)
+        started.set()
+
+        if not receiver.poll(limits.wall_seconds):
+            raise ConversionAbortedError(AppErrorCode.CONVERSION_TIMEOUT.value)
+
+        try:
+            ok, value = receiver.recv()
+        except EOFError:
+            # Child died without reporting (signal or hard limit)
+            process.join()
+            raise ConversionAbortedError(_abort_reason(process.exitcode))
+    except ConversionAbortedError as e:
+        if on_abort is not None:
+            on_abort(e)
+        raise
+    finally:
+        receiver.close()
+        _stop(process)
+
+    if ok:
+        return value
+    raise value
@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from app.enums.file_types import SupportedFileType
+from app.exceptions.custom_exceptions import FileValidationError
+from app.pipeline.conversion import ConversionOptions
+from app.utils.constants import (
+    SMALL_JOB_COST,
+    FAST_LANE_WORKERS,
+    BULK_LANE_WORKERS,
+    BULK_LANE_MAX_PENDING,
+    SANDBOX_ENABLED,
+)
+from app.utils.input_stream import compression_suffix, open_input, source_extension, source_name
+from app.workers.render_pool import RenderJob, RenderPool
+from app.workers.sandbox import SandboxLimits
+
+# Bytes read by the prescan; counts are extrapolated for larger files
+PRESCAN_BYTES = 1024 * 1024
+
+# Assumed expansion of compressed uploads (only the stored size is free)
+COMPRESSED_SIZE_FACTOR = 5
+
+# Relative layout cost per byte of input, by type. DOCX is zipped XML;
+# HTML loses most of its bytes to markup before layout
+TYPE_WEIGHTS = {
+    SupportedFileType.TXT: 1.0,
+    SupportedFileType.MD: 1.0,
+    SupportedFileType.IPYNB: 0.8,
+    SupportedFileType.CSV: 1.2,
+    SupportedFileType.HTML: 0.4,
+    SupportedFileType.DOCX: 2.0,
+    SupportedFileType.BIN: 0.5,
+}
+
+# Extra cost of a highlighted code block and of a table row
+FENCE_COST = 4096
+TABLE_ROW_COST = 512
+
+# Latencies kept per lane for percentile metrics
+LATENCY_WINDOW = 500
+
+
+@dataclass
+class JobCost:
+    file_type: Optional[SupportedFileType]
+    size: int
+    fences: int = 0
+    table_rows: int = 0
+
+    @property
+    def units(self) -> float:
+        weight = TYPE_WEIGHTS.get(self.file_type, 1.0)
+        return self.size * weight + self.fences * FENCE_COST + self.table_rows * TABLE_ROW_COST
+
+
+def estimate_cost(path: str) -> JobCost:
+    """
+    Cheap up-front cost estimate from the file size, type and a prescan
+    of the first PRESCAN_BYTES for fenced blocks / code cells and table rows.
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        # Missing files are reported by validation inside the job
+        return JobCost(None, 0)
+
+    if compression_suffix(path):
+        size *= COMPRESSED_SIZE_FACTOR
+
+    extension = source_extension(source_name(path))
+    file_type = SupportedFileType(extension) if extension in SupportedFileType.list_values() else None
+
+    if file_type not in (SupportedFileType.MD, SupportedFileType.IPYNB):
+        return JobCost(file_type, size)
+
+    try:
+        with open_input(path, "rb") as f:
+            head = f.read(PRESCAN_BYTES)
+    except (FileValidationError, OSError):
+        return JobCost(file_type, size)
+
+    if file_type == SupportedFileType.IPYNB:
+        # Every code cell becomes a highlighted fence
+        fences = head.count(b'"cell_type": "code"') + head.count(b'"cell_type":"code"')
+    else:
+        fences = head.count(b"```") // 2
+    table_rows = head.count(b"\n|")
+
+    scale = size / len(head) if head and len(head) < size else 1
+    return JobCost(file_type, size, int(fences * scale), int(table_rows * scale))
+
+
+class LaneStats:
+    """
+    Rolling job latency (submit to finish, in seconds) for one lane.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.completed = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+            self.completed += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            values = sorted(self._latencies)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def snapshot(self) -> dict:
+        return {
+            "completed": self.completed,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class SchedulerLane:
+    def __init__(self, name: str, workers: int, max_pending: Optional[int] = None,
+                 sandbox: Optional[SandboxLimits] = None):
+        self.name = name
+        self.pool = RenderPool(workers, sandbox=sandbox)
+        self.max_pending = max_pending
+        self.stats = LaneStats()
+
+    def submit(self, path, options, output_dir, preview_pages) -> RenderJob:
+        started = time.perf_counter()
+        job = self.pool.submit(path, options, output_dir, preview_pages=preview_pages, max_pending=self.max_pending)
+        job.future.add_done_callback(lambda _f: self.stats.record(time.perf_counter() - started))
+        return job
+
+    def submit_book(self, paths, options, output_dir) -> RenderJob:
+        started = time.perf_counter()
+        job = self.pool.submit_book(paths, options, output_dir, max_pending=self.max_pending)
+        job.future.add_done_callback(lambda _f: self.stats.record(time.perf_counter() - started))
+        return job
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.pool.workers,
+            "running": self.pool.running,
+            "waiting": self.pool.waiting,
+            **self.stats.snapshot(),
+        }
+
+
+class SizeAwareScheduler:
+    """
+    Routes conversions by estimated cost: small jobs to a fast lane and
+    large ones to a separate, bounded bulk lane, so one heavy upload
+    cannot hold up a queue of small ones.
+    """
+
+    def __init__(self, fast_workers: int = FAST_LANE_WORKERS, bulk_workers: int = BULK_LANE_WORKERS,
+                 small_job_cost: float = SMALL_JOB_COST, bulk_max_pending: int = BULK_LANE_MAX_PENDING,
+                 sandbox: Optional[SandboxLimits] = SandboxLimits() if SANDBOX_ENABLED else None):
+        self.small_job_cost = small_job_cost
+        self.fast = SchedulerLane("fast", fast_workers, sandbox=sandbox)
+        self.bulk = SchedulerLane("bulk", bulk_workers, max_pending=bulk_max_pending, sandbox=sandbox)
+
+    @property
+    def lanes(self):
+        return (self.fast, self.bulk)
+
+    def lane_for(self, cost: JobCost) -> SchedulerLane:
+        return self.fast if cost.units <= self.small_job_cost else self.bulk
+
+    def submit(self, path: str, options: ConversionOptions, output_dir: str,
+               preview_pages: int = None) -> RenderJob:
+        lane = self.lane_for(estimate_cost(path))
+        return lane.submit(path, options, output_dir, preview_pages)
+
+    def submit_book(self, paths, options: ConversionOptions, output_dir: str) -> RenderJob:
+        """
+        Binds several files into one PDF. Books are the largest renders,
+        so they always go to the bulk lane.
+        """
+        return self.bulk.submit_book(paths, options, output_dir)
+
+    def warm_up(self):
+        for lane in self.lanes:
+            lane.pool.warm_up()
+
+    def snapshot(self) -> dict:
+        return {lane.name: lane.snapshot() for lane in self.lanes}
+
+    def shutdown(self):
+        for lane in self.lanes:
+            lane.pool.shutdown()
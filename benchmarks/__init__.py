@@ -0,0 +1,14 @@
+"""
+Pipeline benchmarks over a deterministic synthetic corpus.
+
+    python -m benchmarks --output baseline.json
+    python -m benchmarks --baseline baseline.json
+    python -m benchmarks.memory
+
+See corpus (inputs per SupportedFileType), runner (per-stage timings),
+compare (regressions against a stored baseline) and memory (peak
+memory per stage and size, against per-type budgets).
+"""
+from .corpus import GENERATORS, generate
+from .runner import CaseResult, run_benchmarks, run_case
+from .compare import Regression, compare
@@ -0,0 +1,77 @@
+"""
+    python -m benchmarks [--types md,txt] [--sizes 16k,64k] [--formats PDF,DOCX]
+                         [--repeat 3] [--output results.json]
+                         [--baseline baseline.json] [--threshold 0.25]
+
+Runs the benchmarks, prints one line per case and optionally writes the
+results as JSON. With --baseline the results are compared with earlier
+ones and the exit status is 1 if anything regressed.
+"""
+import argparse
+import json
+import sys
+
+from app.enums.file_types import SupportedFileType
+from benchmarks.compare import DEFAULT_MIN_DELTA, DEFAULT_THRESHOLD, compare
+from benchmarks.runner import DEFAULT_REPEAT, DEFAULT_SIZES, run_benchmarks
+
+UNITS = {"k": 1024, "m": 1024 * 1024}
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    if text and text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def _print_result(result):
+    stages = " ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in result.stages.items())
+    print(f"{result.key:<24} {result.seconds * 1000:9.1f} ms  {stages}", flush=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Conversion pipeline benchmarks")
+    parser.add_argument("--types", default=",".join(SupportedFileType.list_values()),
+                        help="input types, comma-separated")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="input sizes in bytes (k/m suffixes allowed), comma-separated")
+    parser.add_argument("--formats", default="PDF", help="output formats, comma-separated")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per case (median is reported)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="compare with results JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown counted as a regression")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA,
+                        help="absolute slowdown (seconds) below which nothing is a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        file_types=[SupportedFileType(name.strip().lower()) for name in args.types.split(",") if name.strip()],
+        sizes=[parse_size(size) for size in args.sizes.split(",") if size.strip()],
+        output_formats=[name.strip().upper() for name in args.formats.split(",") if name.strip()],
+        repeat=args.repeat,
+        on_result=_print_result,
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions, incomparable = compare(results, baseline, args.threshold, args.min_delta)
+    for key in incomparable:
+        print(f"not compared (input changed): {key}")
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print("no regressions against baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Compares benchmark results with a stored baseline.
+
+A case's total time or one of its stages is a regression when it is
+more than `threshold` (relative) slower than the baseline and also
+more than `min_delta` seconds slower, so stages that take a few
+milliseconds do not fail on noise. Cases whose input changed (different
+digest, e.g. after a corpus change) are reported as not comparable
+rather than compared.
+"""
+from dataclasses import dataclass
+from typing import List, Tuple
+
+# Relative slowdown, and absolute slowdown in seconds, that count as a regression
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA = 0.005
+
+
+@dataclass
+class Regression:
+    case: str
+    stage: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def __str__(self):
+        return (f"{self.case} {self.stage}: {self.baseline * 1000:.1f} ms -> "
+                f"{self.current * 1000:.1f} ms ({self.ratio:.2f}x)")
+
+
+def _cases(results: dict) -> dict:
+    return {
+        f"{case['file_type']}/{case['output_format']}/{case['size']}": case
+        for case in results["results"]
+    }
+
+
+def _slower(baseline: float, current: float, threshold: float, min_delta: float) -> bool:
+    return current > baseline * (1 + threshold) and current - baseline > min_delta
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD,
+            min_delta: float = DEFAULT_MIN_DELTA) -> Tuple[List[Regression], List[str]]:
+    """
+    Returns (regressions, cases that could not be compared). Cases
+    missing from either side are ignored.
+    """
+    regressions, incomparable = [], []
+    baseline_cases = _cases(baseline)
+
+    for key, case in _cases(current).items():
+        old = baseline_cases.get(key)
+        if old is None:
+            continue
+        if old["digest"] != case["digest"]:
+            incomparable.append(key)
+            continue
+
+        if _slower(old["seconds"], case["seconds"], threshold, min_delta):
+            regressions.append(Regression(key, "total", old["seconds"], case["seconds"]))
+        for stage, seconds in case["stages"].items():
+            before = old["stages"].get(stage)
+            if before is not None and _slower(before, seconds, threshold, min_delta):
+                regressions.append(Regression(key, stage, before, seconds))
+
+    return regressions, incomparable
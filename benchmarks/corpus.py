@@ -0,0 +1,248 @@
+"""
+Deterministic synthetic inputs, one generator per SupportedFileType.
+
+`generate(file_type, size)` returns about `size` bytes of a document
+shaped like the uploads that stress each path: long plain text, deep
+markdown with tables and code fences, notebooks with many cells, wide
+CSV, nested HTML and large DOCX. The same type, size and seed always
+give the same bytes, so timings from different runs compare like for
+like. For DOCX, `size` is the amount of document text; the package
+itself is smaller once compressed.
+"""
+import hashlib
+import io
+import json
+import random
+from typing import Callable, Dict
+
+from app.enums.file_types import SupportedFileType
+
+DEFAULT_SEED = 2024
+
+WORDS = (
+    "render layout page table column block stream buffer parser token style font heading "
+    "paragraph section chapter index value record field report summary detail system process "
+    "request response worker queue cache memory budget estimate sample metric latency output "
+    "input archive package document content format template margin border cell header footer"
+).split()
+
+CODE_LINES = (
+    "def transform(rows, factor=2):",
+    "    total = 0",
+    "    for index, row in enumerate(rows):",
+    "        if row.get('value') is None:",
+    "            continue",
+    "        total += row['value'] * factor  # scale",
+    "    return {'total': total, 'count': len(rows)}",
+    "class Report:",
+    "    title = \"Quarterly summary\"",
+    "    values = [1, 2.5, 0x1F, -3]",
+)
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _sentence(rng: random.Random) -> str:
+    text = _words(rng, rng.randint(6, 16))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, sentences: int = 4) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(2, sentences)))
+
+
+def _code(rng: random.Random, lines: int = 10) -> str:
+    return "\n".join(rng.choice(CODE_LINES) for _ in range(lines))
+
+
+def _fill(size: int, unit: Callable[[int], str], separator: str = "\n\n") -> str:
+    """
+    Joins unit(0), unit(1), ... until the text reaches `size` characters.
+    """
+    parts, length, index = [], 0, 0
+    while length < size:
+        part = unit(index)
+        parts.append(part)
+        length += len(part) + len(separator)
+        index += 1
+    return separator.join(parts)
+
+
+def generate_txt(size: int, rng: random.Random) -> bytes:
+    def unit(index):
+        kind = index % 4
+        if kind == 0:
+            return f"{index // 4 + 1}. {_words(rng, 4).upper()}"
+        if kind == 1:
+            return _paragraph(rng, 6)
+        if kind == 2:
+            return "\n".join(f"- {_sentence(rng)}" for _ in range(rng.randint(3, 6)))
+        return "\n".join(
+            f"2024-03-{day:02d} 12:{minute:02d}:00 INFO {_words(rng, 8)}"
+            for day, minute in zip(range(1, 8), range(0, 60, 7))
+        )
+    return _fill(size, unit).encode()
+
+
+def generate_md(size: int, rng: random.Random) -> bytes:
+    def table():
+        header = "| id | name | value | note |\n|---:|:---|---:|:---:|"
+        rows = [
+            f"| {n} | **{rng.choice(WORDS)}** | {rng.randint(0, 10 ** 6)} | `{rng.choice(WORDS)}` |"
+            for n in range(rng.randint(4, 10))
+        ]
+        return "\n".join([header] + rows)
+
+    def nested_list():
+        lines = []
+        for _ in range(rng.randint(2, 4)):
+            lines.append(f"- {_sentence(rng)}")
+            for _ in range(rng.randint(1, 3)):
+                lines.append(f"  - *{_words(rng, 5)}*")
+                lines.append(f"    1. {_words(rng, 6)}")
+        return "\n".join(lines)
+
+    def unit(index):
+        depth = index % 6 + 1
+        return "\n\n".join([
+            f"{'#' * depth} {_words(rng, 3).title()} {index}",
+            _paragraph(rng) + f" See **{rng.choice(WORDS)}**, *{rng.choice(WORDS)}* and `{rng.choice(WORDS)}`.",
+            nested_list(),
+            table(),
+            f"```python\n{_code(rng, rng.randint(5, 15))}\n```",
+            f"> {_sentence(rng)}",
+        ])
+    return _fill(size, unit).encode()
+
+
+def generate_ipynb(size: int, rng: random.Random) -> bytes:
+    cells = []
+    length = 0
+    index = 0
+    while length < size:
+        if index % 2:
+            source = _code(rng, rng.randint(3, 12))
+            cell = {
+                "cell_type": "code", "execution_count": index, "metadata": {},
+                "outputs": [{"name": "stdout", "output_type": "stream", "text": [_sentence(rng) + "\n"]}],
+                "source": source.splitlines(keepends=True),
+            }
+        else:
+            source = f"## Step {index // 2 + 1}\n\n{_paragraph(rng)}"
+            cell = {"cell_type": "markdown", "metadata": {}, "source": source.splitlines(keepends=True)}
+        cells.append(cell)
+        length += len(json.dumps(cell))
+        index += 1
+
+    notebook = {
+        "cells": cells,
+        "metadata": {"kernelspec": {"display_name": "Python 3", "language": "python", "name": "python3"}},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    return json.dumps(notebook, indent=1).encode()
+
+
+def generate_csv(size: int, rng: random.Random, columns: int = 40) -> bytes:
+    header = ",".join(f"col_{n}" for n in range(columns))
+
+    def unit(_index):
+        fields = []
+        for n in range(columns):
+            kind = n % 4
+            if kind == 0:
+                fields.append(str(rng.randint(0, 10 ** 9)))
+            elif kind == 1:
+                fields.append(f"{rng.uniform(-1000, 1000):.4f}")
+            elif kind == 2:
+                fields.append(rng.choice(WORDS))
+            else:
+                fields.append(f'"{_words(rng, 3)}, {rng.choice(WORDS)}"')
+        return ",".join(fields)
+    return (header + "\n" + _fill(size, unit, "\n") + "\n").encode()
+
+
+def generate_html(size: int, rng: random.Random, depth: int = 6) -> bytes:
+    def nested(level):
+        if level == depth:
+            return f"<p>{_paragraph(rng)}</p>"
+        tag = ("section", "div", "article")[level % 3]
+        heading = f"<h{min(level + 2, 6)}>{_words(rng, 3).title()}</h{min(level + 2, 6)}>"
+        items = "".join(f"<li>{_words(rng, 6)}<ul><li>{_words(rng, 4)}</li></ul></li>" for _ in range(2))
+        return f"<{tag} class=\"level-{level}\">{heading}<p>{_sentence(rng)}</p><ul>{items}</ul>{nested(level + 1)}</{tag}>"
+
+    def unit(_index):
+        rows = "".join(
+            f"<tr><td>{rng.randint(0, 999)}</td><td>{rng.choice(WORDS)}</td><td><b>{rng.choice(WORDS)}</b></td></tr>"
+            for _ in range(rng.randint(3, 8))
+        )
+        return nested(0) + f"<table><tr><th>n</th><th>name</th><th>kind</th></tr>{rows}</table>"
+
+    body = _fill(size, unit, "\n")
+    return f"<!DOCTYPE html>\n<html><head><title>Benchmark</title></head><body>\n{body}\n</body></html>\n".encode()
+
+
+def generate_docx(size: int, rng: random.Random) -> bytes:
+    from app.docx.docx_writer import DocxWriter, run_xml
+    from app.enums.templates import PDFTemplate
+
+    output = io.BytesIO()
+    length, index = 0, 0
+    with DocxWriter(output, PDFTemplate.CLASSIC) as writer:
+        while length < size:
+            if index % 5 == 0:
+                text = _words(rng, 4).title()
+                writer.paragraph([run_xml(text)], style=f"Heading{index % 3 + 1}")
+            else:
+                text = _paragraph(rng, 6)
+                writer.paragraph([run_xml(text[:40], bold=True), run_xml(text[40:])])
+            length += len(text)
+            index += 1
+    return output.getvalue()
+
+
+def generate_bin(size: int, rng: random.Random) -> bytes:
+    def unit(_index):
+        noise = bytes(rng.randint(0x80, 0xFF) for _ in range(rng.randint(1, 4)))
+        return _sentence(rng).encode() + noise
+
+    parts, length = [], 0
+    while length < size:
+        part = unit(len(parts))
+        parts.append(part)
+        length += len(part) + 1
+    return b"\n".join(parts)
+
+
+GENERATORS: Dict[SupportedFileType, Callable[[int, random.Random], bytes]] = {
+    SupportedFileType.TXT: generate_txt,
+    SupportedFileType.MD: generate_md,
+    SupportedFileType.IPYNB: generate_ipynb,
+    SupportedFileType.CSV: generate_csv,
+    SupportedFileType.HTML: generate_html,
+    SupportedFileType.DOCX: generate_docx,
+    SupportedFileType.BIN: generate_bin,
+}
+
+
+def generate(file_type: SupportedFileType, size: int, seed: int = DEFAULT_SEED) -> bytes:
+    """
+    About `size` bytes of synthetic `file_type` input; deterministic for
+    a given (file_type, size, seed).
+    """
+    rng = random.Random(f"{seed}:{file_type.value}:{size}")
+    return GENERATORS[file_type](size, rng)
+
+
+def corpus_filename(file_type: SupportedFileType, size: int) -> str:
+    return f"bench_{size}.{file_type.value}"
+
+
+def digest(data: bytes) -> str:
+    """
+    Short content hash recorded with results, so runs over different
+    inputs are not compared.
+    """
+    return hashlib.sha256(data).hexdigest()[:16]
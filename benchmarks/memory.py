@@ -0,0 +1,289 @@
+"""
+Peak-memory harness for the conversion pipeline.
+
+Each (input type, size, output format) case is converted once in a
+fresh forked child, the way a render worker runs a job. Inside the
+child tracemalloc records the peak of Python allocations in every
+pipeline stage (STAGES), and the parent samples the child's resident
+set size (RSS) until it exits. Native allocations, such as zlib buffers,
+only show up in RSS. Imports and caches are warmed up in the parent
+first, so they are not charged to the case.
+
+check_memory() turns the measurements into failures:
+  * budget: the traced peak of a case exceeds its input type's
+    MemoryBudget (fixed overhead + a multiple of the input size);
+  * growth: between two sizes of one type the traced peak grows faster
+    than size ** MAX_GROWTH_EXPONENT, i.e. memory is super-linear in
+    the input.
+
+    python -m benchmarks.memory [--types md,txt] [--sizes 64k,256k,1m] [--formats PDF]
+
+tracemalloc slows conversions down several times; 1 MB markdown to PDF
+takes minutes.
+"""
+import argparse
+import io
+import math
+import multiprocessing
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List
+
+from app.enums.file_types import SupportedFileType
+from app.pipeline import ConversionOptions, convert_stream, warm_up
+from app.utils.metrics import conversion
+from benchmarks.corpus import DEFAULT_SEED, corpus_filename, generate
+
+# Sizes measured by default
+DEFAULT_SIZES = (64 * 1024, 256 * 1024)
+
+# Interval of the parent's RSS samples, in seconds
+RSS_SAMPLE_SECONDS = 0.005
+
+# Allowed exponent of peak memory in the input size between two sizes;
+# linear is 1, fixed overhead makes small inputs lower
+MAX_GROWTH_EXPONENT = 1.25
+
+
+@dataclass(frozen=True)
+class MemoryBudget:
+    """
+    Largest traced peak allowed for an input of `size` bytes:
+    `base` bytes plus `per_input_byte` times the input size.
+    """
+    base: int
+    per_input_byte: float
+
+    def limit(self, size: int) -> int:
+        return int(self.base + self.per_input_byte * size)
+
+
+MB = 1024 * 1024
+
+# Budgets per input type (either output format), about 1.5 times the
+# peaks measured on the synthetic corpus up to 1 MB. Markdown and
+# notebooks keep every token and flowable (with highlighted code markup)
+# until layout ends; BeautifulSoup trees cost ~40 bytes per HTML byte
+MEMORY_BUDGETS: Dict[SupportedFileType, MemoryBudget] = {
+    SupportedFileType.TXT: MemoryBudget(8 * MB, 20),
+    SupportedFileType.MD: MemoryBudget(8 * MB, 200),
+    SupportedFileType.IPYNB: MemoryBudget(8 * MB, 90),
+    SupportedFileType.CSV: MemoryBudget(8 * MB, 16),
+    SupportedFileType.HTML: MemoryBudget(8 * MB, 80),
+    SupportedFileType.DOCX: MemoryBudget(8 * MB, 40),
+    SupportedFileType.BIN: MemoryBudget(8 * MB, 24),
+}
+
+
+@dataclass
+class MemoryResult:
+    """
+    Peak memory of one case, in bytes. `stages` holds the traced peak of
+    each pipeline stage; `rss_peak` is 0 where RSS cannot be read.
+    """
+    file_type: str
+    size: int
+    output_format: str
+    input_bytes: int
+    peak: int
+    stages: Dict[str, int] = field(default_factory=dict)
+    rss_start: int = 0
+    rss_peak: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.file_type}/{self.output_format}/{self.size}"
+
+    @property
+    def rss_growth(self) -> int:
+        return max(self.rss_peak - self.rss_start, 0)
+
+
+def _rss(pid: str = "self", field_name: str = "VmRSS") -> int:
+    """
+    A memory field of /proc/<pid>/status in bytes, or 0 where unknown.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field_name + ":"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _measure_child(conn, data: bytes, filename: str, options: ConversionOptions):
+    try:
+        rss_start = _rss()
+        stages, current = {}, []
+
+        def on_stage(stage):
+            if current:
+                stages[current[-1]] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            current.append(stage)
+
+        tracemalloc.start()
+        with conversion(sink=lambda _record: None):
+            convert_stream(data, filename, options, io.BytesIO(), on_stage=on_stage)
+        stages[current[-1]] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        conn.send((True, (stages, rss_start, _rss(field_name="VmHWM"))))
+    except Exception as e:
+        conn.send((False, e))
+    finally:
+        conn.close()
+
+
+def _warm(file_type: SupportedFileType, output_format: str, seed: int):
+    # Lexers, templates and fonts are cached on first use
+    data = generate(file_type, 4096, seed)
+    with conversion(sink=lambda _record: None):
+        convert_stream(data, corpus_filename(file_type, 4096), ConversionOptions(output_format=output_format),
+                       io.BytesIO())
+
+
+def measure_case(file_type: SupportedFileType, size: int, output_format: str = "PDF",
+                 seed: int = DEFAULT_SEED) -> MemoryResult:
+    """
+    Converts one synthetic input in a forked child and returns its peaks.
+    """
+    data = generate(file_type, size, seed)
+    options = ConversionOptions(output_format=output_format)
+
+    ctx = multiprocessing.get_context("fork")
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_measure_child, args=(sender, data, corpus_filename(file_type, size), options))
+    process.start()
+    sender.close()
+
+    sampled = []
+
+    def sample():
+        peak = 0
+        while process.is_alive():
+            peak = max(peak, _rss(str(process.pid)))
+            time.sleep(RSS_SAMPLE_SECONDS)
+        sampled.append(peak)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        ok, value = receiver.recv()
+    finally:
+        receiver.close()
+        process.join()
+        sampler.join()
+    if not ok:
+        raise value
+
+    stages, rss_start, rss_high_water = value
+    return MemoryResult(
+        file_type=file_type.value,
+        size=size,
+        output_format=output_format,
+        input_bytes=len(data),
+        peak=max(stages.values()),
+        stages=stages,
+        rss_start=rss_start,
+        rss_peak=max(rss_high_water, sampled[0] if sampled else 0),
+    )
+
+
+def measure_memory(file_types: Iterable[SupportedFileType] = tuple(SupportedFileType),
+                   sizes: Iterable[int] = DEFAULT_SIZES, output_formats: Iterable[str] = ("PDF",),
+                   seed: int = DEFAULT_SEED, on_result=None) -> List[MemoryResult]:
+    """
+    Measures every (type, output format, size) case, smallest size first.
+    """
+    warm_up(["all"])
+    results = []
+    for file_type in file_types:
+        for output_format in output_formats:
+            _warm(file_type, output_format, seed)
+            for size in sorted(sizes):
+                result = measure_case(file_type, size, output_format, seed)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+    return results
+
+
+def growth_exponent(smaller: MemoryResult, larger: MemoryResult) -> float:
+    """
+    Exponent k with peak ~ input_bytes ** k between two sizes of one case.
+    """
+    return math.log(larger.peak / smaller.peak) / math.log(larger.input_bytes / smaller.input_bytes)
+
+
+def check_memory(results: List[MemoryResult], budgets: Dict[SupportedFileType, MemoryBudget] = None,
+                 max_exponent: float = MAX_GROWTH_EXPONENT) -> List[str]:
+    """
+    Budget and super-linear growth failures among `results`, as messages.
+    """
+    budgets = MEMORY_BUDGETS if budgets is None else budgets
+    failures = []
+
+    series: Dict[tuple, List[MemoryResult]] = {}
+    for result in results:
+        budget = budgets.get(SupportedFileType(result.file_type))
+        if budget is not None and result.peak > budget.limit(result.input_bytes):
+            failures.append(
+                f"{result.key}: peak {result.peak / MB:.1f} MB over budget "
+                f"{budget.limit(result.input_bytes) / MB:.1f} MB"
+            )
+        series.setdefault((result.file_type, result.output_format), []).append(result)
+
+    for cases in series.values():
+        cases.sort(key=lambda case: case.input_bytes)
+        for smaller, larger in zip(cases, cases[1:]):
+            exponent = growth_exponent(smaller, larger)
+            if exponent > max_exponent:
+                failures.append(
+                    f"{larger.key}: peak grows super-linearly from {smaller.key} "
+                    f"(size^{exponent:.2f}, {smaller.peak / MB:.1f} -> {larger.peak / MB:.1f} MB)"
+                )
+    return failures
+
+
+def _print_result(result: MemoryResult):
+    stages = " ".join(f"{stage}={peak / MB:.1f}MB" for stage, peak in result.stages.items())
+    rss = f"rss +{result.rss_growth / MB:.1f}MB" if result.rss_peak else "rss n/a"
+    print(f"{result.key:<24} peak {result.peak / MB:7.1f} MB  {rss}  {stages}", flush=True)
+
+
+def main(argv=None) -> int:
+    from benchmarks.__main__ import parse_size
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.memory", description="Peak memory per stage and size")
+    parser.add_argument("--types", default=",".join(SupportedFileType.list_values()))
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--formats", default="PDF")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = measure_memory(
+        file_types=[SupportedFileType(name.strip().lower()) for name in args.types.split(",") if name.strip()],
+        sizes=[parse_size(size) for size in args.sizes.split(",") if size.strip()],
+        output_formats=[name.strip().upper() for name in args.formats.split(",") if name.strip()],
+        on_result=_print_result,
+    )
+    if args.output:
+        import json
+
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+
+    failures = check_memory(results)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Times the conversion pipeline over the synthetic corpus.
+
+Each (input type, size) case is converted `repeat` times in this
+process with convert_bytes, after one untimed run that fills caches
+(templates, lexers, fonts). Per-stage timings come from the conversion
+trace (app.utils.metrics), so they are the same stages production logs
+and exports. A case reports the median of its runs.
+"""
+import platform
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List
+
+from app.enums.file_types import SupportedFileType
+from app.pipeline import ConversionOptions, convert_bytes, warm_up
+from app.utils.metrics import conversion
+from benchmarks.corpus import DEFAULT_SEED, corpus_filename, digest, generate
+
+# Input sizes (bytes) benchmarked by default
+DEFAULT_SIZES = (16 * 1024, 64 * 1024, 256 * 1024)
+
+DEFAULT_REPEAT = 3
+
+
+@dataclass
+class CaseResult:
+    """
+    Median timings (seconds) of one input type and size.
+    """
+    file_type: str
+    size: int
+    output_format: str
+    input_bytes: int
+    digest: str
+    seconds: float
+    stages: Dict[str, float] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)
+    runs: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.file_type}/{self.output_format}/{self.size}"
+
+
+def run_case(file_type: SupportedFileType, size: int, output_format: str = "PDF",
+             repeat: int = DEFAULT_REPEAT, seed: int = DEFAULT_SEED) -> CaseResult:
+    data = generate(file_type, size, seed)
+    options = ConversionOptions(output_format=output_format)
+
+    filename = corpus_filename(file_type, size)
+    with conversion(sink=lambda _record: None):
+        convert_bytes(data, filename, options)
+
+    records = []
+    for _ in range(repeat):
+        with conversion(sink=records.append):
+            convert_bytes(data, filename, options)
+
+    # Stages in the order they ran
+    stages = list(dict.fromkeys(stage for record in records for stage in record["stages"]))
+    return CaseResult(
+        file_type=file_type.value,
+        size=size,
+        output_format=output_format,
+        input_bytes=len(data),
+        digest=digest(data),
+        seconds=statistics.median(record["seconds"] for record in records),
+        stages={
+            stage: round(statistics.median(record["stages"].get(stage, 0.0) for record in records), 6)
+            for stage in stages
+        },
+        counts=records[-1]["counts"],
+        runs=repeat,
+    )
+
+
+def run_benchmarks(file_types: Iterable[SupportedFileType] = tuple(SupportedFileType),
+                   sizes: Iterable[int] = DEFAULT_SIZES, output_formats: Iterable[str] = ("PDF",),
+                   repeat: int = DEFAULT_REPEAT, seed: int = DEFAULT_SEED, on_result=None) -> dict:
+    """
+    Runs every (type, size, output format) case and returns the results
+    as a JSON-ready dict. `on_result` is called with each CaseResult.
+    """
+    # Imports are not part of any case's timings
+    warm_up(["all"])
+
+    results: List[CaseResult] = []
+    for file_type in file_types:
+        for output_format in output_formats:
+            for size in sizes:
+                result = run_case(file_type, size, output_format, repeat, seed)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": [asdict(result) for result in results],
+    }
@@ -0,0 +1,84 @@
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from app.exceptions.custom_exceptions import ServiceBusyError
+from app.pipeline.batch import ERRORS_FILENAME, unique_name, zip_as_completed
+from app.pipeline.conversion import ConversionOptions, convert_upload
+
+
+class Upload:
+    def __init__(self, path):
+        self.name = str(path)
+
+
+def test_batch_zip_keeps_going_after_errors(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "notes.md").write_text("# Notes\n\nSome text.\n")
+    (tmp_path / "notes.txt").write_text("Plain text notes\n")
+    (tmp_path / "empty.txt").write_text("")
+
+    options = ConversionOptions()
+    zip_path = str(tmp_path / "out.zip")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        jobs = {
+            executor.submit(convert_upload, Upload(tmp_path / "notes.md"), options, str(tmp_path / "a")): "notes.md",
+            executor.submit(convert_upload, Upload(tmp_path / "notes.txt"), options, str(tmp_path / "b")): "notes.txt",
+            executor.submit(convert_upload, Upload(tmp_path / "empty.txt"), options, str(tmp_path)): "empty.txt",
+        }
+        results = list(zip_as_completed(jobs, zip_path, failed=[("busy.md", "Server busy")]))
+
+    errors = {r.source for r in results if r.error}
+    assert errors == {"empty.txt", "busy.md"}
+
+    with zipfile.ZipFile(zip_path) as archive:
+        names = set(archive.namelist())
+        assert names == {"notes.pdf", "notes (2).pdf", ERRORS_FILENAME}
+        assert archive.read("notes.pdf").startswith(b"%PDF")
+        report = archive.read(ERRORS_FILENAME).decode()
+    assert "empty.txt" in report and "busy.md: Server busy" in report
+
+
+def test_unique_name():
+    used = set()
+    assert [unique_name("a.pdf", used) for _ in range(3)] == ["a.pdf", "a (2).pdf", "a (3).pdf"]
+
+
+def test_busy_files_wait_for_capacity(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.pipeline.batch.BUSY_RETRY_SECONDS", 0.01)
+    (tmp_path / "notes.md").write_text("# Notes\n\nSome text.\n")
+    options = ConversionOptions()
+    attempts = []
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        running = []
+
+        def submitter(index):
+            def submit():
+                attempts.append(index)
+                # Room for one job at a time, like a full bulk lane
+                if any(not future.done() for future in running):
+                    raise ServiceBusyError("Server busy")
+                output_dir = tmp_path / str(index)
+                output_dir.mkdir()
+                running.append(executor.submit(convert_upload, Upload(tmp_path / "notes.md"), options, str(output_dir)))
+                return running[-1]
+            return submit
+
+        waiting = [("notes.md", submitter(index)) for index in range(4)]
+        results = list(zip_as_completed({}, str(tmp_path / "out.zip"), waiting=waiting))
+
+    assert [r.error for r in results] == [None] * 4
+    assert len(attempts) > 4
+    with zipfile.ZipFile(tmp_path / "out.zip") as archive:
+        assert len(archive.namelist()) == 4
+
+
+def test_failed_files_with_the_same_name_are_all_reported(tmp_path):
+    failed = [("notes.md", "Server busy"), ("notes.md", "Server busy")]
+    results = list(zip_as_completed({}, str(tmp_path / "out.zip"), failed=failed))
+
+    assert [r.source for r in results] == ["notes.md", "notes.md"]
+    with zipfile.ZipFile(tmp_path / "out.zip") as archive:
+        assert archive.read(ERRORS_FILENAME).decode().count("notes.md: Server busy") == 2
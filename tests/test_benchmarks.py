@@ -0,0 +1,44 @@
+import copy
+
+from app.enums.file_types import SupportedFileType
+from benchmarks import compare, generate, run_benchmarks
+from benchmarks.corpus import digest
+
+
+def test_corpus_is_deterministic_and_sized():
+    for file_type in SupportedFileType:
+        data = generate(file_type, 4096)
+        assert data == generate(file_type, 4096)
+        assert data != generate(file_type, 4096, seed=1)
+        assert len(data) >= 4096 or file_type == SupportedFileType.DOCX
+
+
+def test_every_input_type_runs_with_stage_timings():
+    results = run_benchmarks(sizes=[2048], output_formats=["PDF"], repeat=1)
+
+    cases = {case["file_type"]: case for case in results["results"]}
+    assert set(cases) == set(SupportedFileType.list_values())
+    for case in cases.values():
+        assert case["seconds"] > 0
+        assert list(case["stages"])[:2] == ["validate", "parse"]
+        assert "layout" in case["stages"]
+        assert case["counts"]["pages"] >= 1
+    assert "highlight" in cases["md"]["stages"]
+
+
+def test_compare_flags_slowdowns_beyond_noise():
+    baseline = {"results": [{
+        "file_type": "md", "output_format": "PDF", "size": 1024, "digest": digest(b"x"),
+        "seconds": 1.0, "stages": {"parse": 0.001, "layout": 0.9},
+    }]}
+    current = copy.deepcopy(baseline)
+    case = current["results"][0]
+    case["seconds"], case["stages"] = 1.5, {"parse": 0.003, "layout": 1.4}
+
+    regressions, incomparable = compare(current, baseline)
+    # parse tripled but by only 2 ms
+    assert [(r.stage, round(r.ratio, 2)) for r in regressions] == [("total", 1.5), ("layout", 1.56)]
+    assert incomparable == []
+
+    case["digest"] = digest(b"y")
+    assert compare(current, baseline) == ([], ["md/PDF/1024"])
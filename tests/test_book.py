@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+from app.enums.templates import PDFTemplate
+from app.exceptions.custom_exceptions import ServiceBusyError
+from app.pipeline.book import convert_book
+from app.pipeline.conversion import ConversionOptions
+from app.workers.render_pool import RenderPool
+from app.workers.sandbox import SandboxLimits
+from app.workers.scheduler import SizeAwareScheduler
+from tests.test_navigation import _page_streams
+
+
+def _write(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(content)
+    return path
+
+
+def _chapters(directory):
+    notebook = {
+        "cells": [{"cell_type": "markdown", "source": ["# Notebook Chapter\n", "Cells become text."]}],
+        "metadata": {}, "nbformat": 4, "nbformat_minor": 5,
+    }
+    return [
+        _write(directory, "01_intro.md", "# Introduction\n\nWelcome to the book.\n\n## Scope\n\nDetails.\n"),
+        _write(directory, "02_notes.txt", "Plain text chapter.\n\nSecond paragraph.\n"),
+        _write(directory, "03_analysis.ipynb", json.dumps(notebook)),
+    ]
+
+
+def test_book_binds_chapters_into_one_pdf():
+    directory = tempfile.mkdtemp()
+    options = ConversionOptions(template=PDFTemplate.MODERN, navigation=True)
+
+    output_path = convert_book(_chapters(directory), options, directory, workers=2)
+    data, content = _page_streams(output_path)
+
+    # Contents page plus one page per chapter
+    assert content.count(b"/FormXob.NavTotalPages Do") == 4
+    for heading in (b"Introduction", b"Scope", b"Notebook Chapter"):
+        assert b"/Title (%s)" % heading in data
+    assert b"Plain text chapter" in content
+
+
+def test_book_parses_in_process_when_workers_is_zero():
+    directory = tempfile.mkdtemp()
+
+    output_path = convert_book(_chapters(directory)[:2], ConversionOptions(), directory, name="short", workers=0)
+
+    assert os.path.basename(output_path) == "short.pdf"
+    _, content = _page_streams(output_path)
+    assert b"Welcome to the book" in content and b"Second paragraph" in content
+
+
+@pytest.mark.parametrize("workers, sandbox", [(0, SandboxLimits(wall_seconds=60)), (1, None)])
+def test_book_runs_as_a_pool_job(workers, sandbox):
+    directory = tempfile.mkdtemp()
+    pool = RenderPool(workers, sandbox=sandbox)
+    try:
+        job = pool.submit_book(_chapters(directory), ConversionOptions(), directory)
+        stages = [value for kind, value in job.iter_events() if kind == "stage"]
+        output_path = job.future.result()
+    finally:
+        pool.shutdown()
+
+    assert stages == ["parse", "render", "save"]
+    _, content = _page_streams(output_path)
+    assert b"Welcome to the book" in content and b"Plain text chapter" in content
+
+
+def test_books_go_to_the_bounded_bulk_lane():
+    scheduler = SizeAwareScheduler(fast_workers=0, bulk_workers=0, bulk_max_pending=0, sandbox=None)
+    try:
+        with pytest.raises(ServiceBusyError):
+            scheduler.submit_book(_chapters(tempfile.mkdtemp()), ConversionOptions(), tempfile.mkdtemp())
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,58 @@
+import codecs
+import os
+import tempfile
+import zipfile
+
+import pytest
+
+from app.enums.file_types import SupportedFileType
+from app.exceptions.custom_exceptions import FileValidationError
+from app.parsers.txt_parser import parse_txt
+from app.validators.file_validator import validate_file
+
+
+class DummyFile:
+    def __init__(self, name):
+        self.name = name
+
+
+def _write(suffix, data):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return DummyFile(path)
+
+
+def test_renamed_binary_is_rejected():
+    file = _write(".txt", bytes(range(256)) * 8)
+    with pytest.raises(FileValidationError):
+        validate_file(file)
+
+
+def test_utf16_text_with_bom_is_accepted_and_decoded():
+    file = _write(".txt", codecs.BOM_UTF16_LE + "Héllo wörld".encode("utf-16-le"))
+    assert validate_file(file) == SupportedFileType.TXT
+    assert parse_txt(file) == "Héllo wörld"
+
+
+def test_notebook_must_be_a_json_object():
+    with pytest.raises(FileValidationError):
+        validate_file(_write(".ipynb", b"# not a notebook"))
+
+    assert validate_file(_write(".ipynb", b'  {"cells": []}')) == SupportedFileType.IPYNB
+
+
+def test_docx_must_be_a_zip_package():
+    with pytest.raises(FileValidationError):
+        validate_file(_write(".docx", b"plain text pretending to be docx"))
+
+
+def test_docx_with_extreme_compression_ratio_is_rejected():
+    fd, path = tempfile.mkstemp(suffix=".docx")
+    os.close(fd)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/document.xml", b"\0" * (2 * 1024 * 1024))
+
+    with pytest.raises(FileValidationError):
+        validate_file(DummyFile(path))
@@ -0,0 +1,42 @@
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from app.exceptions.custom_exceptions import FileValidationError
+from app.pipeline.conversion import ConversionOptions, convert_bytes, convert_stream
+
+
+def test_markdown_bytes_to_pdf_bytes():
+    pdf = convert_bytes(b"# Title\n\nBody with **bold** text.\n", "notes.md")
+
+    assert pdf.startswith(b"%PDF") and pdf.rstrip().endswith(b"%%EOF")
+
+
+def test_compressed_text_to_docx_stream():
+    output = io.BytesIO()
+    data = gzip.compress(b"First line\nSecond line\n")
+
+    convert_stream(data, "server.log.gz", ConversionOptions(output_format="DOCX"), output)
+
+    with zipfile.ZipFile(output) as package:
+        assert b"Second line" in package.read("word/document.xml")
+
+
+def test_in_memory_archive_and_docx_input():
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("a.md", "# Chapter A\n")
+        z.writestr("b.md", "# Chapter B\n")
+    assert convert_bytes(archive.getvalue(), "book.zip").startswith(b"%PDF")
+
+    docx = convert_bytes(b"Hello from memory\n", "hello.txt", ConversionOptions(output_format="DOCX"))
+    assert convert_bytes(docx, "hello.docx").startswith(b"%PDF")
+
+
+def test_validation_applies_to_bytes():
+    with pytest.raises(FileValidationError):
+        convert_bytes(b"", "empty.txt")
+    with pytest.raises(FileValidationError):
+        convert_bytes(b"MZ\x00\x00", "tool.exe")
@@ -0,0 +1,104 @@
+import io
+import time
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml.ns import qn
+
+from app.analyzers.document_model import DocBlock, StructuredDocument
+from app.docx.docx_generator import generate_docx
+from app.docx.md_docx_converter import MDToDocxConverter
+from app.enums.templates import PDFTemplate
+
+
+class _WriteOnly(io.RawIOBase):
+    """
+    A binary stream that cannot seek, like an HTTP response body.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+def test_markdown_streams_paragraphs_runs_and_tables():
+    markdown = (
+        "# Title\n\nSome **bold** and *italic* <&> text\n\n- one\n- two\n\n"
+        "| a | b |\n|---|---|\n| 1 | 2 |\n\n```\nx = 1\n\ty\n```\n"
+    )
+    output = io.BytesIO()
+    MDToDocxConverter(PDFTemplate.CLASSIC).convert(markdown, output)
+
+    doc = Document(output)
+    paragraphs = [(p.style.name, p.text) for p in doc.paragraphs]
+    assert paragraphs == [
+        ("Heading 1", "Title"),
+        ("Normal", "Some bold and italic <&> text"),
+        ("List Bullet", "one"),
+        ("List Bullet", "two"),
+        ("No Spacing", "x = 1\n\ty\n"),
+    ]
+    assert [run.bold for run in doc.paragraphs[1].runs][:2] == [None, True]
+    assert doc.paragraphs[4].runs[0].font.name == "Courier New"
+    assert [[cell.text for cell in row.cells] for row in doc.tables[0].rows] == [["a", "b"], ["1", "2"]]
+    # Styles come from the template package
+    assert doc.styles["Normal"].font.name == "Times New Roman"
+
+
+def test_structured_document_to_unseekable_stream():
+    blocks = [DocBlock("h2", "Part"), DocBlock("paragraph", "Text \x01ok")]
+    blocks += [DocBlock("bullet", f"Item {i}") for i in range(20000)]
+    output = _WriteOnly()
+
+    generate_docx(StructuredDocument("Report", blocks), PDFTemplate.MODERN, output)
+
+    doc = Document(io.BytesIO(bytes(output.data)))
+    assert doc.paragraphs[0].style.name == "Title"
+    assert doc.paragraphs[1].style.name == "Heading 2"
+    # Characters XML cannot hold are dropped
+    assert doc.paragraphs[2].text == "Text ok"
+    assert len(doc.paragraphs) == 3 + 20000
+    assert doc.paragraphs[-1].text == "Item 19999"
+
+
+def test_large_markdown_table_keeps_header_and_inline_formatting():
+    rows = "\n".join(f"| {i} | **bold {i}** | `code` |" for i in range(5000))
+    markdown = f"| n | name | value |\n|---|:---:|---:|\n{rows}\n"
+    output = io.BytesIO()
+
+    started = time.perf_counter()
+    MDToDocxConverter(PDFTemplate.MODERN).convert(markdown, output)
+    assert time.perf_counter() - started < 10
+
+    table = Document(output).tables[0]
+    assert len(table.rows) == 5001
+    assert table.rows[0]._tr.trPr.find(qn("w:tblHeader")) is not None
+    assert table.rows[1]._tr.trPr is None
+
+    name, value = table.rows[5000].cells[1].paragraphs[0], table.rows[5000].cells[2].paragraphs[0]
+    assert name.text == "bold 4999" and name.runs[0].bold
+    assert name.alignment == WD_ALIGN_PARAGRAPH.CENTER
+    assert value.runs[0].font.name == "Courier New"
+
+
+def test_fenced_code_is_highlighted_with_coalesced_runs():
+    markdown = "```python\ndef f(x):\n    return x + 'a'\n```\n\n```\nplain <code>\n```\n"
+    output = io.BytesIO()
+    MDToDocxConverter(PDFTemplate.MODERN).convert(markdown, output)
+
+    highlighted, plain = Document(output).paragraphs
+    runs = [(run.text, run.bold, str(run.font.color.rgb)) for run in highlighted.runs]
+    assert runs[0] == ("def ", True, "000080")
+    assert ("'a'\n", None, "008000") in runs
+    # Whitespace joins the run before it instead of becoming its own
+    assert not any(text.isspace() for text, _bold, _color in runs)
+    assert highlighted.text == "def f(x):\n    return x + 'a'\n"
+    assert {run.font.name for run in highlighted.runs} == {"Courier New"}
+
+    assert [(run.text, str(run.font.color.rgb)) for run in plain.runs] == [("plain <code>\n", "323232")]
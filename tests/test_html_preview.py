@@ -0,0 +1,35 @@
+from app.analyzers.document_model import DocBlock, StructuredDocument
+from app.enums.templates import PDFTemplate
+from app.html.html_preview import render_document_html, render_markdown_html
+
+
+def test_document_blocks_map_to_html_and_escape_text():
+    document = StructuredDocument(
+        title="Report",
+        blocks=[
+            DocBlock("h2", "INTRO"),
+            DocBlock("paragraph", "a < b and <b>bold</b>"),
+            DocBlock("bullet", "one"),
+            DocBlock("bullet", "two"),
+            DocBlock("code", "x = '<tag>'"),
+        ]
+    )
+
+    result = render_document_html(document, PDFTemplate.CLASSIC)
+
+    assert "<h2>INTRO</h2>" in result
+    assert "<p>a &lt; b and <b>bold</b></p>" in result
+    assert "<ul><li>one</li><li>two</li></ul>" in result
+    assert "x = &#x27;&lt;tag&gt;&#x27;" in result
+    assert "Times New Roman" in result
+
+
+def test_markdown_preview_is_truncated_after_max_blocks():
+    text = "\n\n".join(f"Paragraph {i}" for i in range(50))
+
+    result = render_markdown_html(text, PDFTemplate.MODERN, max_blocks=10)
+
+    assert "Paragraph 9" in result
+    assert "Paragraph 10" not in result
+    assert "Preview truncated" in result
+    assert "Helvetica" in result
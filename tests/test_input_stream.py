@@ -0,0 +1,77 @@
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import zipfile
+
+import pytest
+
+from app.enums.file_types import SupportedFileType
+from app.exceptions.custom_exceptions import FileValidationError
+from app.parsers.md_parser import parse_md
+from app.parsers.txt_parser import parse_txt
+from app.utils.input_stream import open_input, source_name
+from app.validators.file_validator import validate_file
+
+
+class DummyFile:
+    def __init__(self, name):
+        self.name = name
+
+
+def _write(suffix, opener, data):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    with opener(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+@pytest.mark.parametrize("suffix,opener", [
+    (".log.gz", gzip.open),
+    (".txt.bz2", bz2.open),
+    (".txt.xz", lzma.open),
+])
+def test_compressed_text_is_decompressed_while_parsing(suffix, opener):
+    path = _write(suffix, opener, b"Hello compressed world\n" * 100)
+    file = DummyFile(path)
+
+    assert validate_file(file) == SupportedFileType.TXT
+    assert parse_txt(file).count("Hello compressed world") == 100
+
+
+def test_zip_of_markdown_members_is_concatenated():
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("docs/02_usage.md", "# Usage")
+        archive.writestr("docs/01_intro.md", "# Intro")
+    file = DummyFile(path)
+
+    assert validate_file(file) == SupportedFileType.MD
+    assert parse_md(file) == "# Intro\n\n# Usage"
+
+
+def test_zip_with_mixed_types_is_rejected():
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("a.md", "# A")
+        archive.writestr("b.csv", "x,y")
+
+    with pytest.raises(FileValidationError):
+        validate_file(DummyFile(path))
+
+
+def test_decompressed_size_limit_is_enforced_while_reading():
+    path = _write(".txt.gz", gzip.open, b"0" * 10_000)
+
+    with pytest.raises(FileValidationError):
+        with open_input(path, "rb", limit=1_000) as f:
+            f.read()
+
+
+def test_source_name_strips_compression_suffix():
+    assert source_name("/tmp/upload/server.log.gz") == "server.log"
+    assert source_name("/tmp/upload/notes.md") == "notes.md"
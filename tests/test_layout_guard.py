@@ -0,0 +1,80 @@
+import base64
+import os
+import tempfile
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from app.analyzers.document_model import DocBlock, StructuredDocument
+from app.analyzers.plaintext_analyzer import analyze_plaintext
+from app.enums.templates import PDFTemplate
+from app.pdf.layout_guard import break_long_tokens, cap_nesting, split_paragraph
+from app.pdf.pdf_generator import generate_pdf
+
+
+def test_long_tokens_are_broken_to_fit_the_width():
+    blob = base64.b64encode(os.urandom(3000)).decode()
+    broken = break_long_tokens(f"data: {blob} end", "Times-Roman", 12, 400)
+
+    assert broken.replace(" ", "") == f"data:{blob}end"
+    assert all(stringWidth(word, "Times-Roman", 12) <= 400 for word in broken.split())
+
+
+def test_breaking_never_cuts_entities_or_tags():
+    token = "&amp;" * 200 + "<b>x</b>" * 100
+    broken = break_long_tokens(token, "Helvetica", 10, 100)
+
+    for word in broken.split():
+        assert word.count("&") == word.count("&amp;")
+        assert word.count("<") == word.count(">")
+
+
+def test_nesting_is_capped_and_text_kept():
+    markup = "<b>" * 20 + "deep" + "</b>" * 20
+    capped = cap_nesting(markup, max_depth=3)
+
+    assert capped == "<b><b><b>deep</b></b></b>"
+
+
+def test_giant_paragraph_is_split_with_tags_reopened():
+    text = "<i>" + "word " * 1000 + "</i>"
+    chunks = split_paragraph(text, 500)
+
+    assert len(chunks) > 5
+    assert all(chunk.startswith("<i>") and chunk.endswith("</i>") for chunk in chunks)
+    assert sum(chunk.count("word") for chunk in chunks) == 1000
+
+
+def test_pathological_plaintext_renders():
+    content = base64.b64encode(os.urandom(60000)).decode() + "\n" + "word " * 20000
+    output_path = os.path.join(tempfile.mkdtemp(), "out.pdf")
+
+    generate_pdf(analyze_plaintext(content, "blob.txt"), PDFTemplate.CLASSIC, output_path)
+
+    assert os.path.getsize(output_path) > 0
+
+
+def test_tags_with_attributes_are_never_cut():
+    text = '<font color="red">' + "word " * 1000 + "</font>"
+    chunks = split_paragraph(text, 500)
+
+    assert len(chunks) > 5
+    assert all(chunk.startswith('<font color="red">') and chunk.endswith("</font>") for chunk in chunks)
+
+    broken = break_long_tokens('<font color="red">' + "x" * 400 + "</font>", "Times-Roman", 12, 100)
+    assert broken.startswith('<font color="red">') and broken.endswith("</font>")
+
+    output_path = os.path.join(tempfile.mkdtemp(), "out.pdf")
+    generate_pdf(StructuredDocument("", [DocBlock("paragraph", text * 5)]), PDFTemplate.CLASSIC, output_path)
+    assert os.path.getsize(output_path) > 0
+
+
+def test_long_headings_keep_their_bookmark():
+    # Longer than a paragraph chunk, shorter than a page
+    heading = "Heading " * 400
+    document = StructuredDocument("", [DocBlock("h1", heading), DocBlock("paragraph", "Body")])
+    output_path = os.path.join(tempfile.mkdtemp(), "out.pdf")
+
+    generate_pdf(document, PDFTemplate.CLASSIC, output_path, navigation=True)
+
+    with open(output_path, "rb") as f:
+        assert b"/Title (Heading Heading" in f.read()
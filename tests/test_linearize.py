@@ -0,0 +1,84 @@
+import io
+import re
+
+from app.enums.templates import PDFTemplate
+from app.pdf.linearize import linearize
+from app.pdf.md_complete_conversion import MDCompleteConverter
+from app.pdf.pdf_file import PDFReader, PDFRef, PDFStream, parse_value
+from app.pdf.pdf_merge import leaf_pages
+from app.pipeline import ConversionOptions, convert_bytes
+
+
+def _pages(reader):
+    pages, tree = [], []
+    leaf_pages(reader, reader.resolve(reader.trailer["Root"])["Pages"], {}, pages, tree)
+    return [number for number, _ in pages]
+
+
+def _content(reader, value):
+    """
+    `value` with references replaced by what they point to (page tree
+    links excluded), for comparing documents with different numbering.
+    """
+    if isinstance(value, PDFRef):
+        return ("ref", _content(reader, reader.get(value.number)))
+    if isinstance(value, PDFStream):
+        return (_content(reader, value.dictionary), value.data)
+    if isinstance(value, dict):
+        return {k: _content(reader, v) for k, v in value.items() if k not in ("Parent", "Length")}
+    if isinstance(value, list):
+        return [_content(reader, v) for v in value]
+    return value
+
+
+def test_linearized_layout_puts_first_page_first():
+    original = io.BytesIO()
+    MDCompleteConverter(PDFTemplate.MODERN).convert(
+        "\n\n".join(f"# Part {i}\n\n" + "Text. " * 300 + "\n\n`code`" for i in range(6)), original
+    )
+    data = linearize(original.getvalue())
+
+    header_end = data.index(b"\n", data.index(b"\n") + 1) + 1
+    number, _ = parse_value(data, header_end)
+    params, _ = parse_value(data, data.index(b"obj", header_end) + 3)
+    reader = PDFReader(data)
+    pages = _pages(reader)
+
+    assert params["Linearized"] == 1
+    assert params["L"] == len(data)
+    assert params["N"] == len(pages) > 1
+    assert params["O"] == pages[0]
+    assert reader.offsets[number] == header_end
+
+    # First-page cross-reference table and trailer follow the dictionary
+    assert data.startswith(b"xref\n%d " % number, data.index(b"endobj", header_end) + 7)
+    assert data.endswith(b"startxref\n%d\n%%%%EOF\n" % data.index(b"xref", header_end))
+
+    # /T is the white-space before the main table's first entry
+    assert data[params["T"]:params["T"] + 21] == b"\n0000000000 65535 f \n"
+
+    # /H points at the hint stream; the first page and all it uses come
+    # after it and end at /E, before any other page
+    hint_offset, hint_length = params["H"]
+    assert re.match(rb"%d 0 obj\n<< /Length \d+ /S \d+ >>\nstream\n" % (number + 1), data[hint_offset:])
+    assert data[hint_offset + hint_length - 7:hint_offset + hint_length] == b"endobj\n"
+    assert hint_offset < reader.offsets[pages[0]] < params["E"]
+    page = reader.get(pages[0])
+    for ref in [page["Contents"], page["Resources"]["Font"]]:
+        assert hint_offset < reader.offsets[ref.number] < params["E"]
+    assert all(reader.offsets[n] >= params["E"] for n in pages[1:])
+
+    # Same pages, same content
+    before = PDFReader(original.getvalue())
+    assert [_content(reader, reader.get(n)) for n in pages] == [_content(before, before.get(n)) for n in _pages(before)]
+
+
+def test_conversion_option_writes_linearized_pdf():
+    markdown = b"# Notes\n\nSome text.\n"
+
+    plain = convert_bytes(markdown, "notes.md")
+    data = convert_bytes(markdown, "notes.md", ConversionOptions(linearize=True))
+
+    assert b"/Linearized" not in plain
+    assert b"/Linearized 1" in data[:200]
+    assert len(_pages(PDFReader(data))) == len(_pages(PDFReader(plain))) == 1
@@ -0,0 +1,36 @@
+from app.enums.file_types import SupportedFileType
+from benchmarks.memory import MemoryBudget, MemoryResult, check_memory, measure_case, measure_memory
+
+
+def test_peak_memory_within_budget_and_linear_in_input_size():
+    results = measure_memory(sizes=[8 * 1024, 32 * 1024], output_formats=["PDF", "DOCX"])
+
+    assert len(results) == 2 * 2 * len(SupportedFileType)
+    assert check_memory(results) == []
+
+
+def test_case_reports_peak_per_stage_and_child_rss():
+    result = measure_case(SupportedFileType.MD, 32 * 1024)
+
+    assert list(result.stages) == ["validate", "parse", "analyze", "render", "save"]
+    assert result.peak == max(result.stages.values())
+    # Layout holds the whole story
+    assert result.stages["render"] == result.peak > result.input_bytes
+    assert result.rss_peak >= result.rss_start > 0
+
+
+def _result(size, peak):
+    return MemoryResult("txt", size, "PDF", size, peak)
+
+
+def test_check_memory_flags_budget_and_super_linear_growth():
+    budgets = {SupportedFileType.TXT: MemoryBudget(1000, 10)}
+
+    assert check_memory([_result(100, 1500), _result(400, 4000)], budgets) == []
+
+    over_budget = check_memory([_result(100, 2500)], budgets)
+    assert over_budget == ["txt/PDF/100: peak 0.0 MB over budget 0.0 MB"]
+
+    # 4x the input, 16x the memory: quadratic
+    growth = check_memory([_result(1000, 1000), _result(4000, 16000)], {})
+    assert len(growth) == 1 and "size^2.00" in growth[0]
@@ -0,0 +1,94 @@
+import json
+import logging
+import time
+
+import pytest
+
+from app.exceptions.custom_exceptions import ConversionAbortedError, FileValidationError
+from app.pipeline import ConversionOptions, convert_bytes
+from app.utils.metrics import METRICS, MetricsRegistry, conversion, count, span
+from app.workers.render_pool import RenderPool
+from app.workers.sandbox import SandboxLimits
+
+MARKDOWN = b"# Notes\n\nText\n\n```python\nx = 1\n```\n\n- a\n- b\n"
+
+
+def test_conversion_logs_one_structured_line_per_conversion(caplog):
+    with caplog.at_level(logging.INFO, logger="app.utils.metrics"):
+        convert_bytes(MARKDOWN, "notes.md")
+
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "app.utils.metrics"]
+    assert len(records) == 1
+    record = records[0]
+    assert (record["input"], record["output"], record["status"]) == ("md", "PDF", "ok")
+    assert {"validate", "parse", "highlight", "layout"} <= set(record["stages"])
+    # Highlighting happens during layout
+    assert record["stages"]["highlight"] <= record["stages"]["layout"] <= record["seconds"]
+    assert record["counts"]["blocks"] == 4
+    assert record["counts"]["pages"] == 1
+    assert record["counts"]["input_bytes"] == len(MARKDOWN)
+    assert record["counts"]["output_bytes"] > 0
+
+
+def test_failed_conversion_is_counted_with_its_error():
+    registry_before = METRICS.snapshot()["formats"].get("unknown/DOCX", {}).get("conversions", {})
+    with pytest.raises(FileValidationError):
+        convert_bytes(b"", "empty.txt", ConversionOptions(output_format="DOCX"))
+
+    after = METRICS.snapshot()["formats"]["unknown/DOCX"]["conversions"]
+    assert after["error"] == registry_before.get("error", 0) + 1
+
+
+def test_snapshot_and_prometheus_export():
+    registry = MetricsRegistry()
+    records = []
+    for pages in (2, 3):
+        with conversion(sink=records.append, input="txt", output="PDF"):
+            with span("layout"):
+                count("pages", pages)
+    for record in records:
+        registry.record(record)
+
+    formats = registry.snapshot()["formats"]
+    assert formats["txt/PDF"]["conversions"] == {"ok": 2}
+    assert formats["txt/PDF"]["counts"] == {"pages": 5}
+    assert formats["txt/PDF"]["stages"]["layout"]["count"] == 2
+
+    text = registry.prometheus_text()
+    assert "# TYPE converter_stage_seconds histogram" in text
+    assert 'converter_conversions_total{input="txt",output="PDF",status="ok"} 2' in text
+    assert 'converter_stage_seconds_bucket{input="txt",output="PDF",stage="layout",le="+Inf"} 2' in text
+    assert 'converter_pages_total{input="txt",output="PDF"} 5' in text
+
+
+def test_traces_from_sandboxed_workers_reach_the_parent(tmp_path):
+    METRICS.reset()
+    pool = RenderPool(1, sandbox=SandboxLimits())
+    try:
+        pool.submit_bytes(b"a,b\n1,2\n", "table.csv", ConversionOptions(output_format="DOCX")).result()
+    finally:
+        pool.shutdown()
+
+    csv = METRICS.snapshot()["formats"]["csv/DOCX"]
+    assert csv["conversions"] == {"ok": 1}
+    assert {"validate", "parse", "analyze", "layout"} <= set(csv["stages"])
+    assert csv["counts"]["blocks"] > 0
+
+
+def test_conversions_stopped_by_the_sandbox_are_counted_as_errors():
+    METRICS.reset()
+    pool = RenderPool(0, sandbox=SandboxLimits(wall_seconds=0.5))
+    try:
+        markdown = b"# Title\n\n" + (b"Paragraph text. " * 50 + b"\n\n") * 2000
+        future = pool.submit_bytes(markdown, "big.md", ConversionOptions())
+        with pytest.raises(ConversionAbortedError):
+            future.result()
+        # Done callbacks may run just after result() returns
+        deadline = time.time() + 5
+        while "md/PDF" not in METRICS.snapshot()["formats"] and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.shutdown()
+
+    md = METRICS.snapshot()["formats"]["md/PDF"]
+    assert md["conversions"] == {"error": 1}
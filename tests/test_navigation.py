@@ -0,0 +1,51 @@
+import base64
+import os
+import re
+import tempfile
+import zlib
+
+from app.analyzers.structure_scanner import scan_structure
+from app.enums.templates import PDFTemplate
+from app.pdf.md_complete_conversion import MDCompleteConverter
+from app.pdf.pdf_generator import generate_pdf
+
+
+def _page_streams(path):
+    data = open(path, "rb").read()
+    streams = []
+    for raw in re.findall(rb"stream\r?\n(.*?)endstream", data, re.S):
+        if raw.rstrip().endswith(b"~>"):
+            raw = base64.a85decode(raw.strip(), adobe=True)
+        try:
+            streams.append(zlib.decompress(raw))
+        except zlib.error:
+            streams.append(raw)
+    return data, b"".join(streams)
+
+
+def test_markdown_navigation_adds_toc_outline_and_footer():
+    markdown = "# Guide\n\n" + "".join(f"## Part {i}\n\n" + "Text. " * 300 + "\n\n" for i in range(5))
+    output_path = os.path.join(tempfile.mkdtemp(), "guide.pdf")
+
+    pages = MDCompleteConverter(PDFTemplate.MODERN).convert(markdown, output_path, navigation=True)
+    data, content = _page_streams(output_path)
+
+    assert b"/Outlines" in data
+    assert len(re.findall(rb"/Title \(Part \d\)", data)) == 5
+    assert b"(Contents)" in content and b"(Part 4)" in content
+    assert content.count(b"/FormXob.NavTotalPages Do") == pages
+    assert f"({pages}) Tj".encode() in content
+
+
+def test_document_navigation_reserves_toc_pages():
+    text = "\n".join(f"HEADING {i}\n" + "Some paragraph text. " * 30 for i in range(60))
+    plain_path = os.path.join(tempfile.mkdtemp(), "plain.pdf")
+    nav_path = os.path.join(tempfile.mkdtemp(), "nav.pdf")
+
+    plain = generate_pdf(scan_structure(text, "x.txt"), PDFTemplate.CLASSIC, plain_path)
+    with_nav = generate_pdf(scan_structure(text, "x.txt"), PDFTemplate.CLASSIC, nav_path, navigation=True)
+
+    # 60 headings fit on two contents pages
+    assert with_nav == plain + 2
+    _, content = _page_streams(nav_path)
+    assert b"(HEADING 59)" in content
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+
+from app.storage.output_store import OutputStore, atomic_write
+
+
+def _store(**kwargs):
+    return OutputStore(root=tempfile.mkdtemp(), **kwargs)
+
+
+def _age(path, seconds):
+    past = time.time() - seconds
+    for name in os.listdir(path):
+        os.utime(os.path.join(path, name), (past, past))
+    os.utime(path, (past, past))
+
+
+def test_save_is_atomic_and_counted():
+    store = _store()
+    path = store.save(b"%PDF-1.4", "out.pdf")
+    store.sweep()
+
+    assert open(path, "rb").read() == b"%PDF-1.4"
+    assert [name for name in os.listdir(os.path.dirname(path))] == ["out.pdf"]
+    assert store.stats()["files"] == 1 and store.stats()["bytes"] == 8
+
+
+def test_expired_directories_are_evicted():
+    store = _store(ttl=60)
+    old = os.path.dirname(store.save(b"old", "a.pdf"))
+    new = os.path.dirname(store.save(b"new", "b.pdf"))
+    _age(old, 120)
+
+    assert store.sweep() == 1
+    assert not os.path.exists(old) and os.path.exists(new)
+    assert store.stats()["evicted_files"] == 1
+
+
+def test_quota_evicts_oldest_but_spares_recent_jobs():
+    store = _store(ttl=3600, quota_bytes=150, min_age=30)
+    oldest = os.path.dirname(store.save(b"x" * 100, "a.pdf"))
+    older = os.path.dirname(store.save(b"x" * 100, "b.pdf"))
+    recent = os.path.dirname(store.save(b"x" * 100, "c.pdf"))
+    _age(oldest, 300)
+    _age(older, 200)
+
+    store.sweep()
+
+    assert not os.path.exists(oldest) and not os.path.exists(older)
+    assert os.path.exists(recent)
+
+
+def test_sweep_leaves_profile_directory_alone():
+    store = _store(ttl=60, quota_bytes=0, min_age=0)
+    profiles = os.path.join(store.root, "profiles")
+    os.makedirs(profiles)
+    with open(os.path.join(profiles, "job.prof"), "wb") as f:
+        f.write(b"x" * 100)
+    _age(profiles, 120)
+
+    assert store.sweep() == 0
+    assert os.listdir(profiles) == ["job.prof"]
+    assert store.stats()["directories"] == 0
+
+
+def test_atomic_write_replaces_existing_file():
+    path = os.path.join(tempfile.mkdtemp(), "out.bin")
+    atomic_write(path, b"first")
+    atomic_write(path, b"second")
+
+    assert open(path, "rb").read() == b"second"
+    assert os.listdir(os.path.dirname(path)) == ["out.bin"]
@@ -0,0 +1,54 @@
+import io
+
+from app.enums.templates import PDFTemplate
+from app.pdf.md_complete_conversion import MDCompleteConverter
+from app.pdf.pdf_file import PDFReader, PDFRef, PDFStream, PDFString, parse_value, write_pdf
+from app.pdf.pdf_merge import concatenate
+
+
+def _markdown_pdf(markdown, navigation=True):
+    output = io.BytesIO()
+    MDCompleteConverter(PDFTemplate.MODERN).convert(markdown, output, navigation=navigation)
+    return output.getvalue()
+
+
+def _page_count(data):
+    reader = PDFReader(data)
+    return reader.resolve(reader.resolve(reader.trailer["Root"])["Pages"])["Count"]
+
+
+def test_parse_values_and_round_trip():
+    value, _ = parse_value(b"<< /Kids [ 3 0 R 4 0 R ] /Title (a \\) b) /Size 2.5 /Open true >>", 0)
+    assert value == {"Kids": [PDFRef(3), PDFRef(4)], "Title": PDFString(b"(a \\) b)"), "Size": 2.5, "Open": True}
+
+    original = PDFReader(_markdown_pdf("# One\n\nText\n"))
+    output = io.BytesIO()
+    write_pdf({n: original.get(n) for n in original}, {"Root": original.trailer["Root"]}, output)
+
+    copy = PDFReader(output.getvalue())
+    assert all(copy.get(n) == original.get(n) for n in original)
+    assert any(isinstance(copy.get(n), PDFStream) for n in copy)
+
+
+def test_concatenate_joins_page_trees_and_outlines():
+    first = _markdown_pdf("# Alpha\n\n" + "Text. " * 2000)
+    second = _markdown_pdf("# Beta\n\n## Beta detail\n\nMore text.\n")
+    output = io.BytesIO()
+
+    pages = concatenate([first, second], output, overlay=lambda page, total: b"%d/%d" % (page, total))
+
+    reader = PDFReader(output.getvalue())
+    catalog = reader.resolve(reader.trailer["Root"])
+    kids = reader.resolve(catalog["Pages"])["Kids"]
+    assert pages == len(kids) == _page_count(first) + _page_count(second)
+
+    # Top-level outline entries are chained across documents
+    alpha = reader.resolve(reader.resolve(catalog["Outlines"])["First"])
+    beta = reader.resolve(alpha["Next"])
+    assert (alpha["Title"], beta["Title"]) == (b"(Alpha)", b"(Beta)")
+    assert beta["Dest"][0] in kids
+    assert reader.resolve(beta["Dest"][0])["Parent"] == catalog["Pages"]
+
+    # Overlays are appended to every page's content
+    last_page = reader.resolve(kids[-1])
+    assert reader.resolve(last_page["Contents"][-1]).data.endswith(b"%d/%d" % (pages, pages))
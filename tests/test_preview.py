@@ -0,0 +1,45 @@
+import os
+import re
+import tempfile
+
+from app.analyzers.document_model import DocBlock, StructuredDocument
+from app.enums.templates import PDFTemplate
+from app.pdf.md_complete_conversion import MDCompleteConverter
+from app.pdf.pdf_generator import generate_pdf
+
+
+def _page_count(path):
+    with open(path, "rb") as f:
+        return len(re.findall(rb"/Type /Page\b(?!s)", f.read()))
+
+
+def _output(name):
+    return os.path.join(tempfile.mkdtemp(), name)
+
+
+def test_generate_pdf_preview_stops_after_max_pages():
+    document = StructuredDocument(
+        title="Long",
+        blocks=[DocBlock("paragraph", f"Paragraph {i} " * 40) for i in range(400)]
+    )
+
+    full_path = _output("full.pdf")
+    generate_pdf(document, PDFTemplate.CLASSIC, full_path)
+
+    preview_path = _output("preview.pdf")
+    generate_pdf(document, PDFTemplate.CLASSIC, preview_path, max_pages=2)
+
+    assert _page_count(full_path) > 2
+    assert _page_count(preview_path) == 2
+
+
+def test_markdown_preview_only_builds_needed_flowables():
+    text = "\n\n".join(f"## Section {i}\n\nBody text {i}" for i in range(500))
+
+    converter = MDCompleteConverter(PDFTemplate.MODERN)
+    path = _output("preview.pdf")
+    converter.convert(text, path, max_pages=1)
+
+    assert _page_count(path) == 1
+    # Lazy story generation: far fewer flowables than the 1000 blocks
+    assert len(converter.story) < 100
@@ -0,0 +1,49 @@
+import pstats
+
+from app.pipeline import ConversionOptions, UploadedFile, convert_bytes, convert_upload
+from app.utils import profiling
+from app.utils.metrics import conversion
+
+MARKDOWN = b"# Notes\n\n```python\ndef f(x):\n    return x\n```\n"
+
+
+def test_requested_profile_is_written_next_to_the_output(tmp_path):
+    source = tmp_path / "notes.md"
+    source.write_bytes(MARKDOWN)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    records = []
+    with conversion(sink=records.append):
+        convert_upload(UploadedFile(str(source)), ConversionOptions(profile=True), str(output_dir))
+
+    assert sorted(p.name for p in output_dir.iterdir()) == ["notes.folded", "notes.pdf", "notes.prof"]
+    stats = pstats.Stats(str(output_dir / "notes.prof"))
+    assert any(name == "load_source" for _file, _line, name in stats.stats)
+    assert records[0]["counts"]["profiled"] == 1
+
+    folded = (output_dir / "notes.folded").read_text().splitlines()
+    stacks = [line.rsplit(" ", 1) for line in folded]
+    assert all(int(microseconds) > 0 for _stack, microseconds in stacks)
+    # Layout time shows up under the pipeline's own frames
+    assert any("load_source" in stack for stack, _ in stacks)
+    assert any("render_source" in stack and "build" in stack for stack, _ in stacks)
+
+
+def test_sampling_profiles_one_in_n(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 3)
+    monkeypatch.setattr("app.pipeline.conversion.PROFILE_DIR", str(tmp_path))
+    sequence = iter([1, 0, 2, 1])
+    monkeypatch.setattr(profiling.random, "randrange", lambda n: next(sequence))
+
+    for _ in range(4):
+        convert_bytes(b"text", "notes.txt")
+
+    # Only the second conversion drew 0
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".folded", ".prof"]
+
+
+def test_nothing_is_profiled_by_default(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.pipeline.conversion.PROFILE_DIR", str(tmp_path))
+    convert_bytes(b"text", "notes.txt")
+    assert list(tmp_path.iterdir()) == []
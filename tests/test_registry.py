@@ -0,0 +1,46 @@
+import io
+import subprocess
+import sys
+import zipfile
+
+from app.enums.file_types import SupportedFileType
+from app.pipeline import ConversionOptions, convert_bytes
+from app.pipeline.registry import INPUT_FORMATS, register_input
+
+BACKENDS = ("reportlab", "docx", "bs4", "markdown_it", "pygments")
+
+
+def _loaded_after(code: str):
+    script = f"import sys\n{code}\nprint(' '.join(m for m in {BACKENDS!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def test_backends_are_imported_on_first_use():
+    assert _loaded_after("import app.pipeline, app.server, app.workers") == set()
+
+    loaded = _loaded_after(
+        "from app.pipeline import convert_bytes\n"
+        "convert_bytes(b'# Notes\\n\\nText', 'notes.md')"
+    )
+    assert {"reportlab", "markdown_it"} <= loaded
+    assert "bs4" not in loaded
+
+    assert "docx" in _loaded_after("from app.pipeline import warm_up\nwarm_up(['docx'])")
+
+
+def _parse_shouting(file):
+    return file.data.decode().upper()
+
+
+def test_registered_input_type_is_used_by_the_pipeline():
+    original = INPUT_FORMATS[SupportedFileType.CSV]
+    register_input(SupportedFileType.CSV, f"{__name__}:_parse_shouting",
+                   analyzer="app.analyzers.plaintext_analyzer:analyze_plaintext")
+    try:
+        docx = convert_bytes(b"a,b\n", "table.csv", ConversionOptions(output_format="DOCX"))
+    finally:
+        INPUT_FORMATS[SupportedFileType.CSV] = original
+
+    with zipfile.ZipFile(io.BytesIO(docx)) as package:
+        assert b"A,B" in package.read("word/document.xml")
@@ -0,0 +1,95 @@
+import os
+import tempfile
+
+import pytest
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from app.analyzers.plaintext_analyzer import analyze_plaintext
+from app.enums.templates import PDFTemplate
+from app.exceptions.custom_exceptions import FileValidationError
+from app.pdf.md_complete_conversion import MDCompleteConverter
+from app.pdf.pdf_generator import generate_pdf
+from app.pdf.render_budget import admit, estimate_document, estimate_markdown, record_estimate
+from app.utils.metrics import MetricsRegistry, conversion
+
+CODE_MARKDOWN = "# Code\n\n```python\n" + "def f(x):\n    return x + 1\n" * 300 + "```\n"
+
+
+def test_page_estimate_is_close_to_actual():
+    document = analyze_plaintext("lorem ipsum dolor sit amet " * 20 + "\n" * 2, "doc.txt")
+    document.blocks *= 200
+    output_path = os.path.join(tempfile.mkdtemp(), "out.pdf")
+
+    estimate = estimate_document(document, PDFTemplate.CLASSIC)
+    pages = generate_pdf(document, PDFTemplate.CLASSIC, output_path)
+
+    assert 0.75 < estimate.pages / pages < 1.25
+
+
+@pytest.mark.parametrize("template", list(PDFTemplate))
+def test_markdown_page_estimate_is_close_to_actual(template):
+    unit = "\n\n".join([
+        "## Section",
+        "lorem ipsum dolor sit amet " * 12,
+        "- first item\n- second item\n- third item",
+        "| id | name |\n|---|---|\n| 1 | one |\n| 2 | two |",
+        "```python\n" + "def f(x):\n    return x + 1\n" * 8 + "```",
+    ])
+    text = "\n\n".join([unit] * 40)
+    output_path = os.path.join(tempfile.mkdtemp(), "out.pdf")
+
+    estimate = estimate_markdown(text, template)
+    pages = MDCompleteConverter(template).convert(text, output_path)
+
+    assert 0.8 < estimate.pages / pages < 1.2
+
+
+def test_highlighting_cost_is_only_charged_to_code():
+    prose = estimate_markdown("Plain text.\n\n" * 50, PDFTemplate.MODERN)
+    code = estimate_markdown(CODE_MARKDOWN, PDFTemplate.MODERN)
+
+    assert prose.seconds == prose.fast_seconds
+    assert code.code_blocks and code.seconds > code.fast_seconds
+
+
+def test_admission_degrades_then_rejects():
+    estimate = estimate_markdown(CODE_MARKDOWN, PDFTemplate.CLASSIC)
+
+    assert admit(estimate, time_budget=estimate.seconds * 2) is False
+    assert admit(estimate, time_budget=estimate.fast_seconds * 2) is True
+    with pytest.raises(FileValidationError):
+        admit(estimate, time_budget=estimate.fast_seconds / 2)
+    with pytest.raises(FileValidationError):
+        admit(estimate, page_budget=0)
+
+
+def test_fast_mode_renders_code_and_is_recorded():
+    output_path = os.path.join(tempfile.mkdtemp(), "out.pdf")
+    estimate = estimate_markdown(CODE_MARKDOWN, PDFTemplate.CLASSIC)
+
+    pages = MDCompleteConverter(PDFTemplate.CLASSIC).convert(CODE_MARKDOWN, output_path, fast=True)
+
+    records = []
+    with conversion(sink=records.append, input="md", output="PDF"):
+        record_estimate(estimate, pages, 0.5, fast=True)
+    registry = MetricsRegistry()
+    registry.record(records[0])
+    ratios = registry.snapshot()["formats"]["md/PDF"]["estimate_ratio"]
+
+    assert pages >= 1 and os.path.getsize(output_path) > 0
+    assert records[0]["counts"]["estimate_actual_pages"] == pages
+    assert ratios["pages"] > 0 and ratios["seconds"] > 0
+    assert 'converter_render_estimate_ratio{input="md",output="PDF",quantity="pages"}' in registry.prometheus_text()
+
+
+def test_fast_mode_wraps_long_code_lines():
+    converter = MDCompleteConverter(PDFTemplate.CLASSIC)
+    converter.fast = True
+    converter._process_token(converter.md.parse("```\n" + "QUJD" * 200 + "\n```\n"), 0)
+
+    code = converter.story[-1]
+    style = converter.styles["MD_Code"]
+    box_width = converter.width - 2 * converter.margin - style.leftIndent - style.rightIndent
+
+    assert len(code.lines) > 1
+    assert max(stringWidth(line, style.fontName, style.fontSize) for line in code.lines) <= box_width
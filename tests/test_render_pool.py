@@ -0,0 +1,52 @@
+import os
+import tempfile
+import time
+
+import pytest
+
+from app.exceptions.custom_exceptions import FileValidationError
+from app.pipeline.conversion import STAGES, ConversionOptions
+from app.workers.render_pool import RenderPool
+
+
+def _markdown_file():
+    fd, path = tempfile.mkstemp(suffix=".md")
+    with os.fdopen(fd, "w") as f:
+        f.write("# Title\n\nBody text\n")
+    return path
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_job_reports_stages_preview_and_result(workers):
+    pool = RenderPool(workers)
+    try:
+        job = pool.submit(_markdown_file(), ConversionOptions(), tempfile.mkdtemp(), preview_pages=1)
+        events = list(job.iter_events())
+        output_path = job.future.result()
+
+        # Done callbacks may run just after result() returns
+        deadline = time.time() + 5
+        while pool.pending and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.shutdown()
+
+    assert [value for kind, value in events if kind == "stage"] == list(STAGES)
+    assert any(kind == "preview" for kind, _ in events)
+    assert output_path.endswith(".pdf") and os.path.getsize(output_path) > 0
+    assert pool.pending == 0
+
+
+def test_validation_errors_are_raised_from_the_job():
+    fd, path = tempfile.mkstemp(suffix=".exe")
+    os.write(fd, b"MZ")
+    os.close(fd)
+
+    pool = RenderPool(0)
+    try:
+        job = pool.submit(path, ConversionOptions(), tempfile.mkdtemp())
+        list(job.iter_events())
+        with pytest.raises(FileValidationError):
+            job.future.result()
+    finally:
+        pool.shutdown()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+
+import pytest
+
+from app.enums.error_codes import AppErrorCode
+from app.exceptions.custom_exceptions import ConversionAbortedError, ParsingError
+from app.pipeline.conversion import ConversionOptions
+from app.workers.render_pool import RenderPool
+from app.workers.sandbox import SandboxLimits, run_sandboxed
+
+
+def _add(a, b):
+    return a + b
+
+
+def _fail():
+    raise ParsingError("bad input")
+
+
+def _sleep():
+    time.sleep(30)
+
+
+def _allocate():
+    return len(bytearray(512 * 1024 * 1024))
+
+
+def test_result_and_errors_cross_the_sandbox():
+    assert run_sandboxed(_add, 2, b=3) == 5
+    with pytest.raises(ParsingError, match="bad input"):
+        run_sandboxed(_fail)
+
+
+def test_wall_clock_timeout_stops_the_child():
+    pids = []
+    started = time.time()
+    with pytest.raises(ConversionAbortedError, match=AppErrorCode.CONVERSION_TIMEOUT.value):
+        run_sandboxed(_sleep, limits=SandboxLimits(wall_seconds=0.5), on_start=pids.append)
+
+    assert time.time() - started < 10
+    with pytest.raises(ProcessLookupError):
+        os.kill(pids[0], 0)
+
+
+def test_memory_limit_aborts_the_conversion():
+    limits = SandboxLimits(memory_bytes=64 * 1024 * 1024, wall_seconds=30)
+    with pytest.raises(ConversionAbortedError, match=AppErrorCode.RESOURCE_LIMIT.value):
+        run_sandboxed(_allocate, limits=limits)
+
+
+def test_cancelled_job_raises_cancelled():
+    fd, path = tempfile.mkstemp(suffix=".md")
+    with os.fdopen(fd, "w") as f:
+        f.write("# Title\n\n" + ("Paragraph text. " * 50 + "\n\n") * 5000)
+
+    pool = RenderPool(0, sandbox=SandboxLimits(wall_seconds=30))
+    try:
+        job = pool.submit(path, ConversionOptions(), tempfile.mkdtemp())
+        # The first stage event arrives after the sandbox pid
+        next(job.iter_events())
+        assert job.sandbox_pid is not None
+        job.cancel()
+
+        with pytest.raises(ConversionAbortedError, match=AppErrorCode.CONVERSION_CANCELLED.value):
+            job.future.result()
+    finally:
+        pool.shutdown()
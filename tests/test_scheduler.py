@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.enums.file_types import SupportedFileType
+from app.exceptions.custom_exceptions import ServiceBusyError
+from app.pipeline.conversion import ConversionOptions
+from app.workers.scheduler import SizeAwareScheduler, estimate_cost
+
+
+def _write(suffix, text):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    return path
+
+
+def test_prescan_counts_fences_and_table_rows():
+    path = _write(".md", "# T\n\n```python\nx = 1\n```\n\n| a | b |\n|---|---|\n| 1 | 2 |\n")
+    cost = estimate_cost(path)
+
+    assert cost.file_type == SupportedFileType.MD
+    assert cost.fences == 1
+    assert cost.table_rows == 3
+
+
+def test_notebook_code_cells_count_as_fences():
+    cells = [{"cell_type": "code", "source": ["x = 1"]} for _ in range(5)]
+    path = _write(".ipynb", json.dumps({"cells": cells}))
+
+    assert estimate_cost(path).fences == 5
+
+
+def test_small_and_large_jobs_go_to_different_lanes():
+    scheduler = SizeAwareScheduler(fast_workers=0, bulk_workers=0, small_job_cost=10_000)
+    try:
+        small = estimate_cost(_write(".md", "# Small\n"))
+        large = estimate_cost(_write(".md", "```\ncode\n```\n" * 100))
+
+        assert scheduler.lane_for(small) is scheduler.fast
+        assert scheduler.lane_for(large) is scheduler.bulk
+    finally:
+        scheduler.shutdown()
+
+
+def test_lane_latency_is_recorded_and_bulk_lane_is_bounded():
+    scheduler = SizeAwareScheduler(fast_workers=0, bulk_workers=0, small_job_cost=0, bulk_max_pending=0)
+    try:
+        with pytest.raises(ServiceBusyError):
+            scheduler.submit(_write(".md", "# Big\n"), ConversionOptions(), tempfile.mkdtemp())
+
+        scheduler.bulk.max_pending = None
+        job = scheduler.submit(_write(".md", "# Big\n"), ConversionOptions(), tempfile.mkdtemp())
+        job.future.result()
+
+        # Done callbacks may run just after result() returns
+        deadline = time.time() + 5
+        while scheduler.snapshot()["bulk"]["completed"] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+
+        stats = scheduler.snapshot()["bulk"]
+        assert stats["completed"] == 1
+        assert stats["p99"] is not None
+    finally:
+        scheduler.shutdown()
+
+
+
+def test_bulk_lane_bound_holds_for_concurrent_submitters():
+    scheduler = SizeAwareScheduler(fast_workers=0, bulk_workers=0, small_job_cost=0, bulk_max_pending=2)
+    path = _write(".md", "# Big\n")
+    # Nothing finishes while the submitters race
+    release = threading.Event()
+    scheduler.bulk.pool._executor.submit(release.wait)
+    try:
+        def submit(_):
+            try:
+                return scheduler.submit(path, ConversionOptions(), tempfile.mkdtemp())
+            except ServiceBusyError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=16) as submitters:
+            jobs = [job for job in submitters.map(submit, range(32)) if job is not None]
+
+        assert len(jobs) == 2
+        release.set()
+        for job in jobs:
+            job.future.result()
+    finally:
+        release.set()
+        scheduler.shutdown()
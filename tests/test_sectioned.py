@@ -0,0 +1,45 @@
+import io
+import re
+
+from app.analyzers.structure_scanner import scan_structure
+from app.enums.templates import PDFTemplate
+from app.pdf.pdf_file import PDFReader
+from app.pdf.sectioned import render_sections, split_document, split_markdown
+from tests.test_navigation import _page_streams
+
+
+def test_split_markdown_at_top_level_headings_only():
+    text = "# One\n\n" + "a" * 100 + "\n\n```\n# not a heading\n```\n\n# Two\n\nb\n\n# Three\n\n" + "c" * 100 + "\n"
+
+    sections = split_markdown(text, min_chars=50)
+
+    assert [section.split("\n", 1)[0] for section in sections] == ["# One", "# Two"]
+    assert "".join(s + "\n" for s in sections)[:-1] == text
+
+
+def test_split_document_keeps_title_with_first_section():
+    text = "\n".join(f"HEADING {i}\n" + "Some paragraph text. " * 30 for i in range(6))
+    document = scan_structure(text, "x.txt")
+
+    sections = split_document(document, min_chars=1000)
+
+    assert len(sections) > 1
+    assert sections[0].title == document.title and not sections[1].title
+    assert sum(len(s.blocks) for s in sections) == len(document.blocks)
+
+
+def test_sections_join_with_continuous_pages_and_bookmarks(tmp_path):
+    text = "".join(f"# Chapter {i}\n\n## Part {i}\n\n" + "Text. " * 1500 + "\n\n" for i in range(3))
+    output_path = str(tmp_path / "book.pdf")
+
+    pages = render_sections(split_markdown(text, min_chars=1), PDFTemplate.MODERN, output_path,
+                            workers=2, navigation=True)
+    data, content = _page_streams(output_path)
+
+    assert len(re.findall(rb"/Title \(Chapter \d\)", data)) == 3
+    assert b"(Contents)" in content
+    footers = [int(n) for n in re.findall(rb"\(Page (\d+) of %d\)" % pages, content)]
+    assert footers == list(range(1, pages + 1))
+
+    reader = PDFReader(data)
+    assert reader.resolve(reader.resolve(reader.trailer["Root"])["Pages"])["Count"] == pages
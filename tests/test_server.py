@@ -0,0 +1,153 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+from app.exceptions.custom_exceptions import ParsingError
+from app.server import ConversionServer, error_status
+from app.workers.render_pool import RenderPool
+
+
+async def _request(port, method, target, body=b"", headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    lines = [f"{method} {target} HTTP/1.1", "Host: localhost"]
+    if body or method == "POST":
+        lines.append(f"Content-Length: {len(body)}")
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    head, _, payload = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    response_headers = {
+        line.split(b":", 1)[0].decode().lower(): line.split(b":", 1)[1].strip().decode()
+        for line in head.split(b"\r\n")[1:]
+    }
+    if response_headers.get("transfer-encoding") == "chunked":
+        payload = _dechunk(payload)
+    return status, response_headers, payload
+
+
+def _dechunk(data):
+    body = b""
+    while True:
+        size_line, _, data = data.partition(b"\r\n")
+        size = int(size_line, 16)
+        if size == 0:
+            return body
+        body, data = body + data[:size], data[size + 2:]
+
+
+def _run(scenario, **server_kwargs):
+    pool = RenderPool(0)
+
+    async def main():
+        server = ConversionServer(pool=pool, **server_kwargs)
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            return await scenario(server, port)
+        finally:
+            await server.close()
+
+    try:
+        return asyncio.run(main())
+    finally:
+        pool.shutdown()
+
+
+def test_convert_streams_pdf_and_health_reports():
+    async def scenario(server, port):
+        status, headers, body = await _request(port, "POST", "/convert?filename=notes.md", b"# Hi\n\nText\n")
+        health = await _request(port, "GET", "/health")
+        return status, headers, body, health
+
+    status, headers, body, health = _run(scenario)
+
+    assert status == 200
+    assert headers["content-type"] == "application/pdf"
+    assert 'filename="notes.pdf"' in headers["content-disposition"]
+    assert body.startswith(b"%PDF")
+    assert health[0] == 200 and json.loads(health[2])["in_flight"] == 0
+
+
+def test_body_size_and_validation_errors():
+    async def scenario(server, port):
+        too_large = await _request(port, "POST", "/convert?filename=a.txt", b"x" * 200)
+        invalid = await _request(port, "POST", "/convert?filename=a.exe", b"MZ")
+        missing = await _request(port, "GET", "/nope")
+        return too_large[0], invalid[0], missing[0]
+
+    assert _run(scenario, max_body=100) == (413, 400, 404)
+
+
+def test_in_flight_limit_returns_429():
+    async def scenario(server, port):
+        # Occupy the only slot with a request whose body never completes
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /convert?filename=a.txt HTTP/1.1\r\nContent-Length: 10\r\n\r\nabc")
+        await writer.drain()
+        while server.in_flight == 0:
+            await asyncio.sleep(0.01)
+
+        status, headers, _ = await _request(port, "POST", "/convert?filename=b.txt", b"hello")
+        writer.close()
+        return status, headers
+
+    status, headers = _run(scenario, max_in_flight=1)
+
+    assert status == 429 and headers["retry-after"] == "1"
+
+
+def test_metrics_endpoints_report_finished_conversions():
+    async def scenario(server, port):
+        await _request(port, "POST", "/convert?filename=notes.md", b"# Hi\n\nText\n")
+        text = await _request(port, "GET", "/metrics")
+        snapshot = await _request(port, "GET", "/metrics.json")
+        return text, snapshot
+
+    (status, headers, text), (_, _, snapshot) = _run(scenario)
+
+    assert status == 200 and headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert b'converter_conversions_total{input="md",output="PDF",status="ok"}' in text
+    assert json.loads(snapshot)["formats"]["md/PDF"]["counts"]["pages"] >= 1
+
+
+def test_unexpected_conversion_error_gets_a_response():
+    async def scenario(server, port):
+        return await _request(port, "POST", "/convert?filename=nb.ipynb", b"{not json")
+
+    status, headers, body = _run(scenario)
+
+    assert status == 422 and headers["content-type"] == "application/json"
+    assert json.loads(body)["error"]
+
+
+def test_error_status_follows_subclasses():
+    class NotebookError(ParsingError):
+        pass
+
+    assert error_status(NotebookError("bad")) == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert error_status(KeyError("x")) == HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def test_filename_cannot_inject_headers():
+    async def scenario(server, port):
+        return await _request(port, "POST", "/convert?filename=a%0d%0aX-Injected:%20yes.md", b"# Hi\n")
+
+    status, headers, _ = _run(scenario)
+
+    assert status == 200
+    assert "x-injected" not in headers
+    assert headers["content-disposition"] == 'attachment; filename="aX-Injected: yes.pdf"'
+
+
+def test_non_latin_filename_is_percent_encoded():
+    async def scenario(server, port):
+        return await _request(port, "POST", "/convert?filename=%E6%96%87%E6%A1%A3.md", b"# Hi\n")
+
+    status, headers, body = _run(scenario)
+
+    assert status == 200 and body.startswith(b"%PDF")
+    assert headers["content-disposition"] == "attachment; filename=\"__.pdf\"; filename*=UTF-8''%E6%96%87%E6%A1%A3.pdf"